@@ -0,0 +1,192 @@
+"""
+Artefatos de depuração (screenshots e código fonte da página).
+
+A captura segue uma política configurável: desligada, apenas em falhas ou sempre.
+A gravação em disco acontece em uma thread de fundo, em um diretório por pedido,
+com limites de quantidade de pedidos e de tamanho total.
+"""
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import uuid
+from typing import List, Optional
+from selenium.common.exceptions import WebDriverException
+import config
+
+OFF = "off"
+ON_FAILURE = "on_failure"
+ALWAYS = "always"
+POLICIES = (OFF, ON_FAILURE, ALWAYS)
+
+
+class ArtifactWriter:
+    """
+    Grava artefatos em segundo plano e aplica a retenção do diretório.
+    """
+    def __init__(self, base_dir="artifacts", max_jobs=200, max_bytes=200 * 1024 * 1024):
+        """
+        Inicializa o gravador.
+
+        Args:
+            base_dir (str): Diretório raiz; cada pedido ganha um subdiretório
+            max_jobs (int): Quantidade máxima de diretórios de pedidos mantidos
+            max_bytes (int): Tamanho total máximo do diretório raiz
+        """
+        self.base_dir = base_dir
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="artifact-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, job_id: str, filename: str, content: bytes, compress: bool = False) -> str:
+        """
+        Agenda a gravação de um artefato e retorna o caminho onde ele será salvo.
+        """
+        path = os.path.join(self.base_dir, job_id, filename + (".gz" if compress else ""))
+        self._queue.put((path, content, compress))
+        return path
+
+    def flush(self):
+        """
+        Aguarda a gravação de todos os artefatos agendados.
+        """
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            path, content, compress = self._queue.get()
+            try:
+                new_job = not os.path.isdir(os.path.dirname(path))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if compress:
+                    with gzip.open(path, "wb") as f:
+                        f.write(content)
+                else:
+                    with open(path, "wb") as f:
+                        f.write(content)
+                if new_job:
+                    self._enforce_retention()
+            except Exception as e:
+                logging.warning("Erro ao gravar artefato %s: %s", path, e)
+            finally:
+                self._queue.task_done()
+
+    def _enforce_retention(self):
+        """
+        Remove os diretórios de pedidos mais antigos até respeitar os limites.
+        """
+        jobs = []
+        total = 0
+        for entry in os.scandir(self.base_dir):
+            if not entry.is_dir():
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            jobs.append((entry.stat().st_mtime, entry.path, size))
+            total += size
+        jobs.sort()
+        while jobs and (len(jobs) > self.max_jobs or total > self.max_bytes):
+            _, path, size = jobs.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logging.info("Artefatos antigos removidos: %s", path)
+
+
+class ArtifactRecorder:
+    """
+    Captura os artefatos de um pedido conforme a política configurada.
+    """
+    def __init__(self, writer: Optional[ArtifactWriter], policy: str = ON_FAILURE, job_id: Optional[str] = None):
+        """
+        Inicializa o capturador.
+
+        Args:
+            writer: Gravador de fundo; pode ser None quando a política é 'off'
+            policy (str): 'off', 'on_failure' ou 'always'
+            job_id (str): Identificador do pedido, usado como nome do diretório
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Política de artefatos inválida: {policy}")
+        self.writer = writer
+        self.policy = policy
+        self.job_id = job_id or uuid.uuid4().hex
+        self.paths: List[str] = []
+
+    def _enabled(self, failure: bool) -> bool:
+        if self.policy == OFF or self.writer is None:
+            return False
+        return failure or self.policy == ALWAYS
+
+    def wants(self, failure: bool = False) -> bool:
+        """
+        Indica se a política permite capturar um artefato (para quem captura por conta própria).
+        """
+        return self._enabled(failure)
+
+    def add(self, filename: str, content: bytes, compress: bool = False):
+        """
+        Grava um artefato já capturado, por exemplo pelo backend CDP.
+        """
+        self.paths.append(self.writer.write(self.job_id, filename, content, compress))
+
+    def screenshot(self, name: str, driver, failure: bool = False):
+        """
+        Captura um screenshot, se a política permitir.
+
+        Args:
+            name (str): Nome do artefato, sem extensão
+            driver: Instância do WebDriver
+            failure (bool): True se a captura documenta uma falha
+        """
+        if not self._enabled(failure):
+            return
+        try:
+            content = driver.get_screenshot_as_png()
+        except WebDriverException as e:
+            logging.warning("Não foi possível capturar o screenshot %s: %s", name, e)
+            return
+        self.paths.append(self.writer.write(self.job_id, f"{name}.png", content))
+
+    def page_source(self, name: str, driver, failure: bool = False):
+        """
+        Salva o código fonte da página compactado, se a política permitir.
+
+        Args:
+            name (str): Nome do artefato, sem extensão
+            driver: Instância do WebDriver
+            failure (bool): True se a captura documenta uma falha
+        """
+        if not self._enabled(failure):
+            return
+        try:
+            content = driver.page_source.encode("utf-8")
+        except WebDriverException as e:
+            logging.warning("Não foi possível capturar o código fonte %s: %s", name, e)
+            return
+        self.paths.append(self.writer.write(self.job_id, f"{name}.html", content, compress=True))
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def default_writer() -> ArtifactWriter:
+    """
+    Retorna o gravador compartilhado do processo, criado na primeira chamada.
+    """
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = ArtifactWriter(config.ARTIFACT_DIR, config.ARTIFACT_MAX_JOBS, config.ARTIFACT_MAX_BYTES)
+        return _default_writer
+
+
+def default_recorder(job_id: Optional[str] = None) -> ArtifactRecorder:
+    """
+    Cria um capturador com a política e o gravador configurados no ambiente.
+    """
+    policy = config.ARTIFACT_POLICY
+    return ArtifactRecorder(None if policy == OFF else default_writer(), policy, job_id)
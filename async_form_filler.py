@@ -0,0 +1,470 @@
+"""
+Versão assíncrona do preenchimento do checkout, sobre o backend CDP (cdp.py).
+
+Segue as mesmas etapas de LogzzFormFiller, com os mesmos seletores, limites
+de espera e cache de CEP, mas cada ação é um comando CDP aguardado no event
+loop em vez de uma requisição HTTP bloqueante ao chromedriver. Os campos de
+cada etapa são preenchidos em uma única chamada JavaScript (ver fast_fill.py);
+os que recusam o valor programático recebem o texto por Input.insertText.
+"""
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from artifacts import ArtifactRecorder, default_recorder
+from cache import CepCache, default_cep_cache
+from cdp import CDPError, CDPPage
+from fast_fill import FAST_FILL_JS, fill_payload, parse_results
+from form_filler import COMPLETION_TEXTS, DAYS_JS, DEFAULT_TIMEOUTS, DEFAULT_URL, STAGE_TITLES, choose_day_index
+from locators import LocatorRegistry, default_registry
+import metrics
+from metrics import PAGE_LOAD_SECONDS, span, timed_stage
+from readiness import NETWORK_TRACKER_JS
+from results import OrderResult
+from stages import OrderProgress, RetryPolicy, run_once_async, run_stages_async
+
+# Valor de Locator.by para seletores XPath (o By.XPATH do Selenium)
+XPATH = "xpath"
+
+# Localiza o primeiro candidato visível e habilitado e executa a ação pedida:
+# 'click', 'focus' (limpa o campo e deixa o foco nele) ou 'probe' (só localiza).
+# Retorna [índice do candidato, valor do elemento] ou null.
+ACTION_JS = """
+var candidates = arguments[0], action = arguments[1];
+function lookup(by, value) {
+    if (by === 'id') { return document.getElementById(value); }
+    if (by === 'css selector') { return document.querySelector(value); }
+    if (by === 'name') { return document.getElementsByName(value)[0] || null; }
+    return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+for (var i = 0; i < candidates.length; i++) {
+    var el;
+    try { el = lookup(candidates[i][0], candidates[i][1]); } catch (e) { el = null; }
+    if (!el || el.disabled || el.getClientRects().length === 0) { continue; }
+    if (action === 'click') { el.click(); }
+    if (action === 'focus') {
+        el.focus();
+        if ('value' in el) { el.value = ''; el.dispatchEvent(new Event('input', {bubbles: true})); }
+    }
+    return [i, el.value === undefined ? null : el.value];
+}
+return null;
+"""
+
+TEXT_PRESENT_JS = """
+var xpath = "//*[" + arguments[0].map(function(t) { return "contains(text(), '" + t + "')"; }).join(" or ") + "]";
+return document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+"""
+
+NETWORK_IDLE_JS = """
+if (window.__logzzPending === undefined) { return document.readyState === 'complete'; }
+return window.__logzzPending === 0 && Date.now() - window.__logzzLastActivity >= arguments[0];
+"""
+
+ANY_VALUE_JS = """
+var xpaths = arguments[0];
+for (var i = 0; i < xpaths.length; i++) {
+    var el = document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (el && el.value && el.value.trim() !== '') { return true; }
+}
+return false;
+"""
+
+
+class AsyncLogzzFormFiller:
+    """
+    Preenche o formulário do site Logzz em uma aba controlada por CDP.
+    """
+    def __init__(self, page: CDPPage, url: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                 locators: Optional[LocatorRegistry] = None, artifacts: Optional[ArtifactRecorder] = None,
+                 cep_cache: Optional[CepCache] = None):
+        """
+        Args:
+            page: Aba do backend CDP
+            url: URL do checkout da oferta; usa DEFAULT_URL se omitida
+            timeouts: Limites de espera que substituem os de DEFAULT_TIMEOUTS
+            locators: Registro de seletores; usa o registro compartilhado do processo se omitido
+            artifacts: Capturador de screenshots; usa a política configurada no ambiente se omitido
+            cep_cache: Cache de CEP -> endereço; usa o cache compartilhado do processo se omitido
+        """
+        self.page = page
+        self.url = url or DEFAULT_URL
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.locators = locators or default_registry
+        self.artifacts = artifacts or default_recorder()
+        self.cep_cache = cep_cache or default_cep_cache()
+        # Estratégia de seletor que encontrou cada campo no último preenchimento
+        self.strategies = {}
+        # Progresso do último pedido executado por fill_all
+        self.progress = None
+        # Dias de entrega oferecidos na etapa de agendamento e o dia escolhido
+        self.days: List[Dict[str, Any]] = []
+        self.selected_day: Optional[Dict[str, Any]] = None
+        # Motivo da última falha de etapa, para o resultado do pedido
+        self.failure_reason: Optional[str] = None
+
+    def _fail(self, message: str, *args):
+        """
+        Registra no log uma falha que interrompe a etapa e a guarda como motivo da falha.
+        """
+        logging.error(message, *args)
+        self.failure_reason = message % args if args else message
+
+    async def current_stage(self) -> int:
+        """
+        Identifica, sem esperar, em que etapa a página está.
+
+        Returns:
+            int: 3 (agendamento), 2 (endereço) ou 1 (informações)
+        """
+        for stage in (3, 2):
+            if await self.page.evaluate(TEXT_PRESENT_JS, [STAGE_TITLES[stage]]):
+                return stage
+        return 1
+
+    async def order_confirmed(self) -> bool:
+        """
+        Verifica, sem esperar e sem reenviar nada, se a página já mostra o pedido confirmado.
+        """
+        return bool(await self.page.evaluate(TEXT_PRESENT_JS, COMPLETION_TEXTS))
+
+    async def available_days(self) -> List[Dict[str, Any]]:
+        """
+        Lê os dias de entrega da etapa de agendamento (ver form_filler.DAYS_JS).
+        """
+        try:
+            return await self.page.evaluate(DAYS_JS) or []
+        except CDPError as e:
+            logging.warning("Não foi possível ler os dias de entrega: %s", e)
+            return []
+
+    async def _screenshot(self, name: str, failure: bool = False):
+        if not self.artifacts.wants(failure):
+            return
+        try:
+            self.artifacts.add(f"{name}.png", await self.page.screenshot())
+        except CDPError as e:
+            logging.warning("Não foi possível capturar o screenshot %s: %s", name, e)
+
+    async def _wait_text(self, texts: List[str], timeout: float) -> bool:
+        return bool(await self.page.wait_for(TEXT_PRESENT_JS, texts, timeout=timeout))
+
+    async def _wait_network_idle(self, timeout: float, idle_time: float = 0.5) -> bool:
+        if await self.page.wait_for(NETWORK_IDLE_JS, idle_time * 1000, timeout=timeout):
+            return True
+        logging.warning("Rede não ficou ociosa em %ss, prosseguindo", timeout)
+        return False
+
+    async def _act(self, field: str, action: str, **params) -> Optional[Tuple[int, Any]]:
+        """
+        Aguarda o campo (testando todos os seletores de uma vez) e executa a ação.
+
+        Args:
+            field: Nome do campo no registro de seletores
+            action: 'click', 'focus' ou 'probe'
+            **params: Valores para os marcadores dos seletores (ex.: index=0)
+
+        Returns:
+            tuple: Índice do seletor e valor do elemento, ou None se o campo não apareceu a tempo
+        """
+        candidates = self.locators.candidates(field)
+        payload = [[locator.by, locator.value.format(**params)] for locator in candidates]
+        started = time.perf_counter()
+        found = await self.page.wait_for(ACTION_JS, payload, action, timeout=self.timeouts["element"])
+        if not found:
+            metrics.observe_selector(field, "none", False, time.perf_counter() - started)
+            return None
+        strategy = candidates[found[0]].strategy
+        metrics.observe_selector(field, strategy, True, time.perf_counter() - started)
+        self.locators.remember(field, strategy)
+        self.strategies[field] = strategy
+        return found[0], found[1]
+
+    async def _type_field(self, field: str, value: str) -> bool:
+        """
+        Digita o valor no campo (Input.insertText); o CEP recebe Tab para acionar a busca.
+        """
+        if await self._act(field, "focus") is None:
+            logging.warning("Campo '%s' não encontrado", field)
+            return False
+        await self.page.insert_text(value)
+        if field == "cep":
+            await self.page.press_tab()
+        return True
+
+    async def _fill_fields(self, pairs) -> Dict[str, bool]:
+        """
+        Preenche vários campos com uma única chamada JavaScript; os campos que
+        recusarem o valor programático são digitados.
+
+        Returns:
+            dict: Por campo, True se ficou preenchido
+        """
+        payload, candidates = fill_payload(self.locators, pairs)
+        try:
+            results = await self.page.evaluate(FAST_FILL_JS, payload)
+        except CDPError:
+            results = None
+        filled = {}
+        for field, (ok, strategy) in parse_results(self.locators, pairs, candidates, results).items():
+            if strategy:
+                self.strategies[field] = strategy
+            filled[field] = ok
+        for field, value in pairs:
+            if not filled[field]:
+                logging.info("Campo '%s' não aceitou o preenchimento rápido, digitando", field)
+                filled[field] = await self._type_field(field, value)
+        return filled
+
+    async def _wait_address_autofill(self, cep: str):
+        """
+        Aguarda o site preencher o endereço a partir do CEP e guarda o resultado no cache.
+        """
+        xpaths = [
+            locator.value
+            for field in ("street", "neighborhood")
+            for locator in self.locators.locators[field]
+            if locator.by == XPATH
+        ]
+        with span("stage_two.cep_autofill"):
+            filled = await self.page.wait_for(ANY_VALUE_JS, xpaths, timeout=self.timeouts["cep_autofill"])
+            await self._wait_network_idle(self.timeouts["network_idle"])
+        if not filled:
+            logging.warning("Nenhum dos campos foi preenchido em %ss", self.timeouts['cep_autofill'])
+            return
+        logging.info("Endereço preenchido automaticamente pelo site")
+        street = await self._act("street", "probe")
+        neighborhood = await self._act("neighborhood", "probe")
+        if street and neighborhood:
+            self.cep_cache.put_address(cep, street[1], neighborhood[1])
+
+    @timed_stage("stage_one")
+    async def fill_stage_one(self, data: Dict[str, Any]) -> bool:
+        """
+        Preenche a primeira etapa do formulário (nome e telefone).
+
+        Args:
+            data: Dicionário contendo os dados do cliente
+
+        Returns:
+            bool: True se o preenchimento foi bem-sucedido, False caso contrário
+        """
+        try:
+            logging.info("Preenchendo a primeira etapa do formulário")
+            with span("stage_one.page_load"):
+                logging.info("Acessando o site: %s", self.url)
+                started = time.perf_counter()
+                await self.page.navigate(self.url, self.timeouts["page_load"])
+                PAGE_LOAD_SECONDS.labels("subsequent" if self.page.page_loads else "first").observe(
+                    time.perf_counter() - started)
+                self.page.page_loads += 1
+                # Páginas abertas antes do registro do monitor de rede também passam a tê-lo
+                await self.page.evaluate(NETWORK_TRACKER_JS)
+            with span("stage_one.network_idle"):
+                await self._wait_network_idle(self.timeouts["network_idle"])
+
+            logging.info("Preenchendo nome e telefone: %s, %s", data['nome'], data['telefone'])
+            with span("stage_one.fast_fill"):
+                filled = await self._fill_fields([("name", data["nome"]), ("phone", data["telefone"])])
+            if not all(filled.values()):
+                self._fail("Campos não preenchidos: %s", [f for f, ok in filled.items() if not ok])
+                await self._screenshot("erro_etapa1", failure=True)
+                return False
+            await self._screenshot("form_preenchido")
+
+            logging.info("Clicando no botão continuar")
+            if await self._act("continue_information", "click") is None:
+                self._fail("Botão de continuar não encontrado")
+                await self._screenshot("erro_etapa1", failure=True)
+                return False
+
+            with span("stage_one.transition"):
+                advanced = await self._wait_text([STAGE_TITLES[2]], self.timeouts["stage_transition"])
+            if not advanced:
+                self._fail("Falha ao preencher a primeira etapa: etapa de endereço não apareceu")
+                await self._screenshot("erro_etapa1", failure=True)
+                return False
+            logging.info("Primeira etapa preenchida com sucesso - Passou para a etapa de endereço")
+            await self._screenshot("etapa2_carregada")
+            return True
+
+        except CDPError as e:
+            self._fail("Erro ao preencher a primeira etapa: %s", e)
+            await self._screenshot("erro_etapa1", failure=True)
+            return False
+
+    @timed_stage("stage_two")
+    async def fill_stage_two(self, data: Dict[str, Any]) -> bool:
+        """
+        Preenche a segunda etapa do formulário (endereço).
+
+        Args:
+            data: Dicionário contendo os dados do endereço
+
+        Returns:
+            bool: True se o preenchimento foi bem-sucedido, False caso contrário
+        """
+        try:
+            logging.info("Preenchendo a segunda etapa do formulário (endereço)")
+            if not await self._wait_text([STAGE_TITLES[2]], self.timeouts["stage_check"]):
+                self._fail("Não estamos na etapa de endereço")
+                return False
+            with span("stage_two.network_idle"):
+                await self._wait_network_idle(self.timeouts["network_idle"])
+
+            endereco = data['endereco']
+            if endereco.get('logradouro') and endereco.get('bairro'):
+                known_address = {"logradouro": endereco['logradouro'], "bairro": endereco['bairro']}
+            else:
+                known_address = self.cep_cache.get_address(endereco['cep'])
+
+            pairs = [("cep", endereco['cep'])]
+            if known_address:
+                pairs += [("street", known_address['logradouro']), ("neighborhood", known_address['bairro'])]
+            with span("stage_two.fast_fill"):
+                filled = await self._fill_fields(pairs)
+            if not filled["cep"]:
+                self._fail("Não foi possível preencher o campo de CEP")
+                await self._screenshot("erro_campo_cep_nao_encontrado", failure=True)
+                return False
+            if known_address and filled["street"] and filled["neighborhood"]:
+                # A busca de CEP do site pode responder depois e sobrescrever o endereço
+                with span("stage_two.network_idle"):
+                    await self._wait_network_idle(self.timeouts["network_idle"])
+                with span("stage_two.fast_fill"):
+                    filled = await self._fill_fields(pairs[1:])
+            if not (known_address and filled["street"] and filled["neighborhood"]):
+                logging.info("Aguardando autopreenchimento dos campos de endereço")
+                await self._wait_address_autofill(endereco['cep'])
+            await self._screenshot("apos_preencher_cep")
+
+            pairs = [("number", endereco['numero'])]
+            if endereco.get('complemento'):
+                pairs.append(("complement", endereco['complemento']))
+            if endereco.get('informacoes_adicionais'):
+                pairs.append(("additional_info", endereco['informacoes_adicionais']))
+            with span("stage_two.fast_fill"):
+                filled = await self._fill_fields(pairs)
+            for field, ok in filled.items():
+                if not ok:
+                    # Continuamos mesmo sem o campo, para tentar avançar o máximo possível
+                    logging.warning("Não foi possível preencher o campo '%s'", field)
+            await self._screenshot("endereco_preenchido")
+
+            logging.info("Tentando clicar no botão confirmar endereço")
+            if await self._act("confirm_address", "click") is None:
+                self._fail("Botão de confirmar endereço não encontrado")
+                await self._screenshot("erro_botao_confirmar_nao_encontrado", failure=True)
+                return False
+
+            with span("stage_two.transition"):
+                advanced = await self._wait_text([STAGE_TITLES[3]], self.timeouts["stage_transition"])
+            if not advanced:
+                self._fail("Falha ao preencher a segunda etapa: escolha da data não apareceu")
+                await self._screenshot("erro_etapa2", failure=True)
+                return False
+            logging.info("Segunda etapa preenchida com sucesso - Passou para a etapa de escolha da data")
+            await self._screenshot("etapa3_carregada")
+            return True
+
+        except CDPError as e:
+            self._fail("Erro ao preencher a segunda etapa: %s", e)
+            await self._screenshot("erro_etapa2", failure=True)
+            return False
+
+    @timed_stage("stage_three")
+    async def fill_stage_three(self, data: Dict[str, Any]) -> bool:
+        """
+        Preenche a terceira etapa do formulário (escolha da data de entrega).
+
+        Args:
+            data: Dicionário contendo os dados para escolha da data
+
+        Returns:
+            bool: True se o preenchimento foi bem-sucedido, False caso contrário
+        """
+        try:
+            logging.info("Preenchendo a terceira etapa do formulário (escolha da data)")
+            if not await self._wait_text([STAGE_TITLES[3]], self.timeouts["stage_check"]):
+                self._fail("Não estamos na etapa de escolha da data")
+                return False
+            with span("stage_three.network_idle"):
+                await self._wait_network_idle(self.timeouts["network_idle"])
+
+            self.days = await self.available_days()
+            logging.info("%s dias de entrega disponíveis", len(self.days))
+            try:
+                date_index = choose_day_index(self.days, data)
+            except ValueError as e:
+                self._fail("%s", e)
+                return False
+            selected = await self._act("day", "click", index=date_index)
+            if selected is None:
+                self._fail("Todas as tentativas de selecionar a data falharam")
+                await self._screenshot("erro_selecao_data", failure=True)
+                return False
+            logging.info("Data selecionada (seletor: %s, valor: %s)", self.strategies['day'], selected[1])
+            self.selected_day = next(
+                (day for day in self.days if day['indice'] == date_index),
+                {"indice": date_index, "valor": selected[1]},
+            )
+
+            # A partir do clique a etapa não é refeita, só conferida (ver stages.run_stages_async)
+            if self.progress is not None:
+                self.progress.commit("scheduling")
+            if await self._act("confirm_day", "click") is None:
+                self._fail("Botão de confirmação de data não encontrado")
+                await self._screenshot("erro_botao_confirmar_data_nao_encontrado", failure=True)
+                return False
+
+            if not await self._wait_text(COMPLETION_TEXTS, self.timeouts["completion"]):
+                self._fail("Falha ao verificar conclusão da terceira etapa")
+                await self._screenshot("erro_verificacao_etapa3", failure=True)
+                return False
+            logging.info("Terceira etapa preenchida com sucesso - Processo concluído ou passou para etapa de pagamento")
+            await self._screenshot("processo_concluido")
+            return True
+
+        except CDPError as e:
+            self._fail("Erro ao preencher a terceira etapa: %s", e)
+            await self._screenshot("erro_etapa3", failure=True)
+            return False
+
+    @timed_stage("order")
+    async def fill_all(self, data: Dict[str, Any], retry_policy: Optional[RetryPolicy] = None,
+                       progress: Optional[OrderProgress] = None) -> OrderResult:
+        """
+        Executa as três etapas do formulário, repetindo só a etapa que falhar.
+
+        Returns:
+            OrderResult: Resultado estruturado do pedido; verdadeiro se as três etapas foram concluídas
+        """
+        self.progress = progress or OrderProgress()
+        self.failure_reason = None
+        stage_functions = {
+            "information": lambda: self.fill_stage_one(data),
+            "address": lambda: self.fill_stage_two(data),
+            "scheduling": lambda: self.fill_stage_three(data),
+        }
+        success = await run_stages_async(stage_functions, self.current_stage, retry_policy, self.progress,
+                                         confirmed=self.order_confirmed)
+        return OrderResult.from_filler(self, success)
+
+    @timed_stage("quote")
+    async def quote(self, data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Executa as etapas de informações e endereço e lê os dias de entrega, sem escolher nenhum.
+
+        Returns:
+            list: Dias de entrega disponíveis, ou None se as duas etapas não foram concluídas
+        """
+        self.progress = OrderProgress()
+        self.failure_reason = None
+        if not (await run_once_async(self.progress, "information", lambda: self.fill_stage_one(data))
+                and await run_once_async(self.progress, "address", lambda: self.fill_stage_two(data))):
+            return None
+        with span("quote.days"):
+            await self._wait_network_idle(self.timeouts["network_idle"])
+            self.days = await self.page.wait_for(DAYS_JS, timeout=self.timeouts["element"]) or []
+        if not self.days:
+            logging.warning("Nenhum dia de entrega apareceu em %ss", self.timeouts['element'])
+        return self.days
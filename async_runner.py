@@ -0,0 +1,244 @@
+"""
+Execução de pedidos pelo backend CDP (LOGZZ_DRIVER_BACKEND=cdp).
+
+Um único Chrome e um event loop em uma thread de fundo atendem todos os
+pedidos: cada pedido ganha uma aba em um contexto de navegação próprio
+(cookies e armazenamento isolados), descartado ao fim do pedido. A interface
+é a mesma de OrderRunner, então o servidor web, a fila e o supervisor usam
+qualquer um dos dois backends sem mudanças. O servidor web segue síncrono
+(Flask): cada requisição aguarda, na própria thread, a corrotina do pedido
+no event loop do backend.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from artifacts import default_recorder
+from async_form_filler import AsyncLogzzFormFiller
+from browser_pool import PoolExhaustedError
+from cdp import CDPBrowser
+from http_filler import fill_with_fallback
+from offers import OfferRegistry
+from results import OrderResult
+from run_log import RunLog
+from runner import ORDER, QUOTE, STAGE_ONE, commit_recorder, order_result, quote_result
+from stages import OrderProgress, run_once_async
+import config
+
+
+class ContextPool:
+    """
+    Abas de um Chrome controlado por CDP, cada uma em um contexto isolado, com limite de abas simultâneas.
+    """
+    def __init__(self, size: int = 8, headless: bool = True, browser_factory=None):
+        """
+        Args:
+            size: Máximo de abas (pedidos) abertas ao mesmo tempo
+            headless: Se True, o Chrome roda sem interface gráfica
+            browser_factory: Função sem argumentos que cria o CDPBrowser; usa CDPBrowser(headless) se omitida
+        """
+        self.size = size
+        self.headless = headless
+        self.browser_factory = browser_factory or (lambda: CDPBrowser(headless=headless))
+        self.browser = None
+        self._slots = None
+        self._restart_lock = None
+        self._in_use = 0
+
+    async def start(self):
+        """
+        Inicia o Chrome antes do primeiro pedido; sem isso, page() o inicia na primeira aba.
+        """
+        await self._ensure_browser()
+
+    def _init_locks(self):
+        """
+        Cria o limite de abas e o lock de reinício no event loop em uso, na primeira chamada.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+            self._restart_lock = asyncio.Lock()
+
+    async def _ensure_browser(self):
+        """
+        Inicia o Chrome, ou o reinicia se ele morreu ou perdeu a conexão.
+        """
+        self._init_locks()
+        async with self._restart_lock:
+            if self.browser is not None and self.browser.is_alive():
+                return
+            if self.browser is not None:
+                logging.warning("Chrome (CDP) não está respondendo, reiniciando")
+                await self.browser.close()
+            browser = self.browser_factory()
+            await browser.start()
+            self.browser = browser
+
+    @asynccontextmanager
+    async def page(self, timeout: Optional[float] = None):
+        """
+        Abre uma aba em um contexto novo, aguardando vaga se o limite foi atingido.
+
+        Args:
+            timeout: Tempo máximo de espera por uma vaga; usa LOGZZ_POOL_CHECKOUT_TIMEOUT se omitido
+
+        Raises:
+            PoolExhaustedError: Se nenhuma vaga abriu dentro do limite
+        """
+        timeout = config.POOL_CHECKOUT_TIMEOUT if timeout is None else timeout
+        self._init_locks()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhaustedError(f"Nenhuma aba disponível em {timeout}s")
+        self._in_use += 1
+        try:
+            await self._ensure_browser()
+            browser = self.browser
+            page = await browser.new_page(isolated=True)
+            try:
+                yield page
+            finally:
+                await browser.close_page(page)
+        finally:
+            self._in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"total": self.size, "idle": self.size - self._in_use, "in_use": self._in_use}
+
+    async def close(self):
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+
+
+class AsyncOrderRunner:
+    """
+    Executa pedidos com o backend CDP, com a mesma interface de OrderRunner.
+    """
+    def __init__(self, offers: Optional[OfferRegistry] = None, pool: Optional[ContextPool] = None,
+                 run_log: Optional[RunLog] = None):
+        """
+        Args:
+            offers: Registro de ofertas; carrega o configurado se omitido
+            pool: Abas do Chrome; cria um com LOGZZ_CDP_MAX_CONTEXTS abas se omitido
+            run_log: Registro onde run grava o resultado de cada tarefa (None para não registrar)
+        """
+        self.offers = offers or OfferRegistry.load()
+        self.run_log = run_log
+        self.pool = pool or ContextPool(size=config.CDP_MAX_CONTEXTS, headless=config.HEADLESS)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="cdp-loop", daemon=True)
+        self._thread.start()
+        # Corrotina em execução para cada thread que chamou _call, para cancel
+        self._running: Dict[int, Any] = {}
+
+    def _call(self, coroutine):
+        """
+        Executa a corrotina no event loop do backend e aguarda o resultado na thread atual.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        thread_id = threading.get_ident()
+        self._running[thread_id] = future
+        try:
+            return future.result()
+        finally:
+            self._running.pop(thread_id, None)
+
+    def cancel(self, thread_id: int) -> bool:
+        """
+        Cancela a corrotina da tarefa que roda na thread indicada; a aba dela é fechada
+        ao sair de ContextPool.page, e as abas das demais tarefas seguem abertas.
+
+        Returns:
+            bool: True se a thread estava executando uma corrotina
+        """
+        future = self._running.get(thread_id)
+        if future is None:
+            return False
+        logging.warning("Cancelando a tarefa travada e fechando a aba dela")
+        future.cancel()
+        return True
+
+    def start(self):
+        """
+        Inicia o Chrome compartilhado pelos pedidos.
+        """
+        self._call(self.pool.start())
+
+    def _filler(self, page, offer, job_id: Optional[str]) -> AsyncLogzzFormFiller:
+        return AsyncLogzzFormFiller(page, url=offer.url, timeouts=offer.timeouts, locators=offer.locators,
+                                    artifacts=default_recorder(job_id))
+
+    async def fill(self, data: Dict[str, Any], progress: Optional[OrderProgress] = None,
+                   job_id: Optional[str] = None) -> OrderResult:
+        """
+        Executa as três etapas do formulário em uma aba isolada.
+        """
+        offer = self.offers.for_order(data)
+        async with self.pool.page() as page:
+            return await self._filler(page, offer, job_id).fill_all(data, progress=progress)
+
+    async def fill_stage_one(self, data: Dict[str, Any], job_id: Optional[str] = None) -> OrderResult:
+        offer = self.offers.for_order(data)
+        async with self.pool.page() as page:
+            filler = self._filler(page, offer, job_id)
+            filler.progress = OrderProgress()
+            success = await run_once_async(filler.progress, "information", lambda: filler.fill_stage_one(data))
+        return OrderResult.from_filler(filler, success)
+
+    async def quote(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        offer = self.offers.for_order(data)
+        async with self.pool.page() as page:
+            filler = self._filler(page, offer, job_id)
+            days = await filler.quote(data)
+        return quote_result(filler, days)
+
+    def run_order(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa um pedido completo com o motor configurado em LOGZZ_SUBMIT_ENGINE.
+        """
+        on_commit = commit_recorder(job_id)
+        with_browser = lambda order: self._call(self.fill(order, OrderProgress(on_commit), job_id))
+        if config.SUBMIT_ENGINE == "http":
+            offer = self.offers.for_order(data)
+            return order_result(fill_with_fallback(data, offer.url, with_browser, offer.endpoints, on_commit), job_id)
+        return order_result(with_browser(data), job_id)
+
+    def run_stage_one(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa apenas a primeira etapa (nome e telefone).
+        """
+        return self._call(self.fill_stage_one(data, job_id)).to_dict()
+
+    def run_quote(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa as etapas de informações e endereço e devolve os dias de entrega disponíveis.
+        """
+        return self._call(self.quote(data, job_id))
+
+    def run(self, kind: str, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa uma tarefa pelo tipo (ORDER, STAGE_ONE ou QUOTE).
+        """
+        if self.run_log is None:
+            return self._run(kind, data, job_id)
+        return self.run_log.run(kind, data, job_id, lambda: self._run(kind, data, job_id))
+
+    def _run(self, kind: str, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        if kind == STAGE_ONE:
+            return self.run_stage_one(data, job_id)
+        if kind == ORDER:
+            return self.run_order(data, job_id)
+        if kind == QUOTE:
+            return self.run_quote(data, job_id)
+        raise ValueError(f"Tipo de tarefa desconhecido: {kind}")
+
+    def close(self):
+        try:
+            self._call(self.pool.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
@@ -0,0 +1,200 @@
+"""
+Processamento de pedidos em lote.
+
+Lê registros de clientes em JSON, JSON Lines ou CSV, distribui os pedidos entre
+vários navegadores em paralelo e devolve cada resultado assim que termina.
+
+Uso:
+    python batch.py pedidos.csv --workers 4 > resultados.jsonl
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Iterable, Iterator
+
+# Colunas do CSV que pertencem ao endereço do cliente
+ADDRESS_FIELDS = ("cep", "logradouro", "numero", "complemento", "bairro", "informacoes_adicionais")
+
+
+def detect_format(name: str) -> str:
+    """
+    Deduz o formato pela extensão do arquivo (padrão: jsonl).
+    """
+    lowered = name.lower()
+    if lowered.endswith(".csv"):
+        return "csv"
+    if lowered.endswith(".json"):
+        return "json"
+    return "jsonl"
+
+
+def csv_row_to_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Converte uma linha plana do CSV no formato de dados_cliente.
+
+    Args:
+        row: Linha do CSV (nome, telefone, cep, logradouro, numero, ...)
+
+    Returns:
+        dict: Dados do cliente com o endereço aninhado em 'endereco'
+    """
+    record = {"endereco": {}}
+    for key, value in row.items():
+        if key is None:
+            continue
+        key = key.strip()
+        value = (value or "").strip()
+        if key.startswith("endereco."):
+            key = key[len("endereco."):]
+        if key in ADDRESS_FIELDS:
+            record["endereco"][key] = value
+        elif key == "data_index":
+            if value:
+                record["data_index"] = int(value)
+        else:
+            record[key] = value
+    return record
+
+
+def read_records(stream: Iterable[str], fmt: str = "jsonl") -> Iterator[Dict[str, Any]]:
+    """
+    Lê registros de clientes de um stream de texto.
+
+    Args:
+        stream: Arquivo (ou qualquer iterável de linhas) aberto em modo texto
+        fmt: 'json' (lista de objetos), 'jsonl' (um objeto por linha) ou 'csv'
+
+    Yields:
+        dict: Dados de cada cliente
+    """
+    if fmt == "json":
+        text = stream.read() if hasattr(stream, "read") else "".join(stream)
+        yield from json.loads(text)
+    elif fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield csv_row_to_record(row)
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Formato desconhecido: {fmt}")
+
+
+class BatchSummary:
+    """
+    Acumula contagens e vazão de um lote.
+    """
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.total = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def add(self, result: Dict[str, Any]):
+        self.total += 1
+        if result.get("sucesso"):
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "total": self.total,
+            "sucessos": self.succeeded,
+            "falhas": self.failed,
+            "duracao_segundos": round(elapsed, 2),
+            "pedidos_por_minuto": round(self.total / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def run_batch(records: Iterable[Dict[str, Any]], run_order, workers: int = 2, summary: BatchSummary = None) -> Iterator[Dict[str, Any]]:
+    """
+    Executa os pedidos em paralelo e devolve os resultados conforme terminam.
+
+    A leitura dos registros é preguiçosa: no máximo 2 * workers pedidos ficam
+    em andamento, então lotes grandes não são carregados inteiros na memória.
+
+    Args:
+        records: Dados dos clientes
+        run_order: Função que recebe os dados de um cliente e retorna um dict com 'sucesso'
+        workers: Quantidade de pedidos executados ao mesmo tempo
+        summary: Resumo opcional atualizado a cada resultado
+
+    Yields:
+        dict: Resultado de cada pedido com seu índice de entrada, na ordem de conclusão
+    """
+    def execute(index, record):
+        started = time.monotonic()
+        try:
+            result = dict(run_order(record))
+            result.setdefault("erro", None)
+        except Exception as e:
+            logging.error("Erro ao processar pedido %s do lote: %s", index, e)
+            result = {"sucesso": False, "erro": str(e)}
+        result["indice"] = index
+        result["duracao_segundos"] = round(time.monotonic() - started, 2)
+        return result
+
+    iterator = enumerate(records)
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < workers * 2:
+                item = next(iterator, None)
+                if item is None:
+                    break
+                pending.add(executor.submit(execute, *item))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if summary is not None:
+                    summary.add(result)
+                yield result
+
+
+def main(argv=None):
+    from browser_pool import ShardedBrowserPool
+    from offers import OfferRegistry
+    from run_log import default_run_log
+    from runner import ORDER, OrderRunner
+
+    parser = argparse.ArgumentParser(description="Preenche pedidos da Logzz em lote")
+    parser.add_argument("entrada", help="Arquivo JSON, JSONL ou CSV ('-' para stdin)")
+    parser.add_argument("--formato", choices=["json", "jsonl", "csv"], help="Formato da entrada (padrão: pela extensão)")
+    parser.add_argument("--workers", type=int, default=2, help="Navegadores em paralelo")
+    parser.add_argument("--ofertas", help="Arquivo JSON com o registro de ofertas (padrão: LOGZZ_OFFERS_FILE)")
+    parser.add_argument("--visivel", action="store_true", help="Abre os navegadores com interface gráfica")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    fmt = args.formato or detect_format(args.entrada)
+    stream = sys.stdin if args.entrada == "-" else open(args.entrada, encoding="utf-8", newline="")
+
+    runner = OrderRunner(OfferRegistry.load(args.ofertas), ShardedBrowserPool(size=args.workers, headless=not args.visivel),
+                         run_log=default_run_log())
+    runner.start()
+
+    summary = BatchSummary()
+    try:
+        for result in run_batch(read_records(stream, fmt), lambda record: runner.run(ORDER, record), workers=args.workers, summary=summary):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        runner.close()
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(json.dumps({"resumo": summary.to_dict()}, ensure_ascii=False), file=sys.stderr)
+    return 0 if summary.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark do bloqueio de recursos: tempo até o formulário ficar pronto e memória
+(RSS) da árvore de processos do Chrome, com e sem bloqueio.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.resource_blocking --repeticoes 3
+"""
+import argparse
+import json
+import statistics
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from browser import Browser
+from form_filler import DEFAULT_URL
+from processes import rss_bytes
+
+
+def measure(url, block_resources, headless=True):
+    """
+    Abre a página do checkout e mede o tempo até o campo de nome ficar clicável.
+
+    Returns:
+        tuple: Tempo até a página ficar pronta (segundos) e RSS total (bytes)
+    """
+    browser = Browser(headless=headless, block_resources=block_resources)
+    browser.start()
+    try:
+        started = time.perf_counter()
+        browser.driver.get(url)
+        WebDriverWait(browser.driver, 30).until(
+            EC.element_to_be_clickable((By.XPATH, '//*[@id="order_name"]'))
+        )
+        ready = time.perf_counter() - started
+        return ready, rss_bytes(browser.process_ids())
+    finally:
+        browser.close()
+
+
+def run(url, repetitions=3, headless=True):
+    """
+    Executa as medições alternando os modos com e sem bloqueio.
+
+    Returns:
+        dict: Medianas de tempo e memória de cada modo
+    """
+    samples = {False: [], True: []}
+    for _ in range(repetitions):
+        for block in (False, True):
+            samples[block].append(measure(url, block, headless))
+
+    report = {}
+    for block, values in samples.items():
+        report["com_bloqueio" if block else "sem_bloqueio"] = {
+            "pagina_pronta_mediana_segundos": round(statistics.median(v[0] for v in values), 3),
+            "rss_mediana_mb": round(statistics.median(v[1] for v in values) / (1024 * 1024), 1),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara o checkout com e sem bloqueio de recursos")
+    parser.add_argument("--url", default=DEFAULT_URL, help="URL do checkout")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Medições por modo")
+    parser.add_argument("--visivel", action="store_true", help="Abre o navegador com interface gráfica")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.url, args.repeticoes, headless=not args.visivel), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
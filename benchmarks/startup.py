@@ -0,0 +1,62 @@
+"""
+Benchmark de inicialização do navegador: Browser.start() a frio e a quente.
+
+A primeira inicialização do processo inclui a resolução do chromedriver; as
+seguintes reaproveitam o caminho já resolvido.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.startup --repeticoes 5
+"""
+import argparse
+import json
+import statistics
+import time
+import browser as browser_module
+from browser import Browser
+
+
+def measure_start(headless=True):
+    """
+    Mede o tempo de Browser.start() e fecha o navegador em seguida.
+
+    Returns:
+        float: Duração da inicialização em segundos
+    """
+    browser = Browser(headless=headless)
+    started = time.perf_counter()
+    browser.start()
+    elapsed = time.perf_counter() - started
+    browser.close()
+    return elapsed
+
+
+def run(repetitions=5, headless=True):
+    """
+    Executa uma inicialização a frio e `repetitions` inicializações a quente.
+
+    Returns:
+        dict: Tempos a frio e estatísticas das inicializações a quente
+    """
+    # Garante que a primeira medição pague a resolução do chromedriver
+    browser_module._driver_path = None
+    cold = measure_start(headless)
+    warm = [measure_start(headless) for _ in range(repetitions)]
+    return {
+        "frio_segundos": round(cold, 3),
+        "quente_mediana_segundos": round(statistics.median(warm), 3),
+        "quente_min_segundos": round(min(warm), 3),
+        "quente_max_segundos": round(max(warm), 3),
+        "repeticoes": repetitions,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede Browser.start() a frio e a quente")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Inicializações a quente")
+    parser.add_argument("--visivel", action="store_true", help="Abre o navegador com interface gráfica")
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.repeticoes, headless=not args.visivel), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Benchmark de ponta a ponta contra o checkout local (mock_logzz): pedidos por
+minuto, percentis p50/p95/p99 de cada etapa e custo de inicialização dos
+navegadores em vários níveis de concorrência.
+
+O relatório inclui a versão (commit) e os parâmetros usados; gravado com
+--saida, pode ser passado em --comparar na execução de outra versão para
+mostrar as diferenças.
+
+Uso (a partir da raiz do repositório):
+    python -m benchmarks.throughput --pedidos 40 --concorrencia 1,2,4 --saida antes.json
+    python -m benchmarks.throughput --pedidos 40 --concorrencia 1,2,4 --comparar antes.json
+"""
+import argparse
+import json
+import logging
+import math
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+import config
+import mock_logzz
+from batch import run_batch
+from browser import Browser
+from browser_pool import ShardedBrowserPool
+from offers import Offer, OfferRegistry
+from run_log import default_run_log
+from runner import ORDER, OrderRunner
+from stages import STAGES
+
+MOCK_PATH = "/pay/MOCK/oferta-benchmark"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Percentil pelo método do posto mais próximo (0.0 se não houver valores).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "amostras": len(values),
+    }
+
+
+def make_orders(count: int, with_address: bool = False) -> List[Dict[str, Any]]:
+    """
+    Gera pedidos sintéticos determinísticos (os mesmos em todas as execuções).
+    """
+    orders = []
+    for index in range(count):
+        cep = f"{10000000 + index * 7919 % 89999999:08d}"
+        endereco = {"cep": cep, "numero": str(index + 1), "complemento": ""}
+        if with_address:
+            endereco.update({"logradouro": f"Rua Simulada {cep[:5]}", "bairro": f"Bairro {cep[5:]}"})
+        orders.append({
+            "nome": f"Cliente Benchmark {index}",
+            "telefone": f"119{index:08d}",
+            "endereco": endereco,
+            "data_index": index % 3,
+        })
+    return orders
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecida"
+
+
+def run_level(url: str, concurrency: int, orders: List[Dict[str, Any]], headless: bool = True) -> Dict[str, Any]:
+    """
+    Executa os pedidos com `concurrency` navegadores e mede vazão, etapas e inicialização.
+    """
+    starts = []
+
+    class TimedBrowser(Browser):
+        def start(self):
+            started = time.perf_counter()
+            try:
+                return super().start()
+            finally:
+                starts.append(time.perf_counter() - started)
+
+    offers = OfferRegistry({"benchmark": Offer("benchmark", url)}, "benchmark")
+    pool = ShardedBrowserPool(size=concurrency, headless=headless,
+                              browser_factory=lambda: TimedBrowser(headless=headless))
+    runner = OrderRunner(offers, pool, run_log=default_run_log())
+
+    started = time.perf_counter()
+    runner.start()
+    pool_start = time.perf_counter() - started
+
+    stage_seconds = {stage: [] for stage in STAGES}
+    order_seconds = []
+    succeeded = 0
+    retries = 0
+    started = time.perf_counter()
+    try:
+        for result in run_batch(orders, lambda order: runner.run(ORDER, order), workers=concurrency):
+            order_seconds.append(result["duracao_segundos"])
+            succeeded += bool(result.get("sucesso"))
+            progress = result.get("progresso") or {}
+            retries += progress.get("novas_tentativas", 0)
+            for entry in progress.get("historico", []):
+                stage_seconds[entry["etapa"]].append(entry["segundos"])
+    finally:
+        elapsed = time.perf_counter() - started
+        runner.close()
+
+    return {
+        "concorrencia": concurrency,
+        "pedidos": len(orders),
+        "sucessos": succeeded,
+        "novas_tentativas": retries,
+        "pedidos_por_minuto": round(succeeded / elapsed * 60, 2) if elapsed else 0.0,
+        "duracao_segundos": round(elapsed, 3),
+        "pedido_segundos": summarize(order_seconds),
+        "etapas_segundos": {stage: summarize(values) for stage, values in stage_seconds.items()},
+        "inicializacao": {
+            "pool_segundos": round(pool_start, 3),
+            "navegador_segundos": summarize(starts),
+        },
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Diferença percentual entre o relatório atual e um anterior, por nível de concorrência.
+    """
+    def delta(current, previous):
+        return round((current - previous) / previous * 100, 1) if previous else None
+
+    previous_levels = {level["concorrencia"]: level for level in baseline.get("niveis", [])}
+    differences = {}
+    for level in report["niveis"]:
+        previous = previous_levels.get(level["concorrencia"])
+        if previous is None:
+            continue
+        differences[str(level["concorrencia"])] = {
+            "pedidos_por_minuto_pct": delta(level["pedidos_por_minuto"], previous["pedidos_por_minuto"]),
+            "pedido_p50_pct": delta(level["pedido_segundos"]["p50"], previous["pedido_segundos"]["p50"]),
+            "etapas_p50_pct": {
+                stage: delta(values["p50"], previous["etapas_segundos"][stage]["p50"])
+                for stage, values in level["etapas_segundos"].items()
+            },
+        }
+    return {"versao_base": baseline.get("versao"), "niveis": differences}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede a vazão do preenchimento contra o checkout local")
+    parser.add_argument("--pedidos", type=int, default=20, help="Pedidos por nível de concorrência")
+    parser.add_argument("--concorrencia", default="1,2,4", help="Níveis de concorrência separados por vírgula")
+    parser.add_argument("--com-endereco", action="store_true",
+                        help="Informa logradouro e bairro nos pedidos (sem esperar a busca de CEP)")
+    parser.add_argument("--saida", help="Grava o relatório JSON neste arquivo")
+    parser.add_argument("--comparar", help="Relatório JSON de outra versão para comparar")
+    parser.add_argument("--visivel", action="store_true", help="Abre os navegadores com interface gráfica")
+    mock_logzz.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    # Execuções comparáveis: sem artefatos em disco e sem cache de CEP de execuções anteriores
+    config.ARTIFACT_POLICY = "off"
+    config.CEP_CACHE_PATH = None
+
+    settings = mock_logzz.settings_from_args(args)
+    mock_logzz.configure(**settings)
+    base_url, server = mock_logzz.serve_in_background()
+    orders = make_orders(args.pedidos, args.com_endereco)
+
+    report = {
+        "versao": git_version(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "parametros": {
+            "pedidos": args.pedidos,
+            "com_endereco": args.com_endereco,
+            "motor": config.SUBMIT_ENGINE,
+            "bloqueio_recursos": config.BLOCK_RESOURCES,
+            "mock": settings,
+        },
+        "niveis": [],
+    }
+    try:
+        for level in (int(value) for value in args.concorrencia.split(",") if value.strip()):
+            logging.warning("Executando %s pedidos com concorrência %s", args.pedidos, level)
+            report["niveis"].append(run_level(base_url + MOCK_PATH, level, orders, headless=not args.visivel))
+    finally:
+        server.shutdown()
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            report["comparacao"] = compare(report, json.load(f))
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
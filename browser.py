@@ -1,23 +1,114 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 import logging
+import os
+import shutil
+import sys
+import threading
+import time
+import config
+from metrics import PAGE_LOAD_SECONDS, span, timed_stage
+from processes import descendants
+
+# Recursos que não são necessários para preencher o checkout: fontes, mídia,
+# imagens e scripts de analytics/rastreamento de terceiros
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*facebook.net*", "*facebook.com/tr*", "*connect.facebook*",
+    "*hotjar.com*", "*clarity.ms*", "*analytics.tiktok.com*", "*bat.bing.com*",
+]
+
+# Hosts sempre resolvidos com a allowlist ativa (chromedriver, servidor local de testes)
+LOOPBACK_HOSTS = ["localhost", "127.0.0.1"]
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def allowlist_resolver_rules(allowed_hosts):
+    """
+    Monta o valor de --host-resolver-rules que só resolve os hosts permitidos.
+
+    Os demais hosts falham na resolução de nome antes de qualquer conexão, o que
+    bloqueia toda origem de terceiros fora da lista sem interceptar requisições
+    (o Fetch.requestPaused do CDP exigiria tratar eventos, o que o driver
+    síncrono do Selenium não faz).
+
+    Args:
+        allowed_hosts (list): Hosts permitidos; aceitam curinga (ex.: "*.logzz.com.br")
+
+    Returns:
+        str: Regras no formato do Chrome
+    """
+    excluded = list(dict.fromkeys(LOOPBACK_HOSTS + list(allowed_hosts)))
+    return ", ".join(["MAP * ~NOTFOUND"] + [f"EXCLUDE {host}" for host in excluded])
+
+def resolve_driver_path():
+    """
+    Resolve o caminho do chromedriver uma única vez por processo.
+    
+    Ordem de preferência: caminho configurado em LOGZZ_CHROMEDRIVER_PATH,
+    chromedriver disponível no PATH e, por último, download/detecção de versão
+    pelo webdriver-manager.
+    
+    Returns:
+        str: Caminho do executável do chromedriver
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+        if config.CHROMEDRIVER_PATH:
+            if not os.path.isfile(config.CHROMEDRIVER_PATH):
+                raise FileNotFoundError(f"Chromedriver configurado não encontrado: {config.CHROMEDRIVER_PATH}")
+            _driver_path = config.CHROMEDRIVER_PATH
+            logging.info("Usando chromedriver configurado: %s", _driver_path)
+        elif shutil.which("chromedriver"):
+            _driver_path = shutil.which("chromedriver")
+            logging.info("Usando chromedriver do PATH: %s", _driver_path)
+        else:
+            logging.info("Resolvendo chromedriver com o webdriver-manager")
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
 
 class Browser:
     """
     Classe para gerenciar o navegador usando Selenium.
     """
-    def __init__(self, headless=True):  
+    def __init__(self, headless=True, block_resources=None, blocked_url_patterns=None, allowed_hosts=None):
         """
         Inicializa o gerenciador de navegador.
         
         Args:
             headless (bool): Se True, o navegador rodará em modo headless (sem interface gráfica).
                              Se False, o navegador será visível durante a execução.
+            block_resources (bool): Se True, bloqueia fontes, mídia e terceiros; usa
+                                    LOGZZ_BLOCK_RESOURCES se omitido
+            blocked_url_patterns (list): Padrões de URL bloqueados; usa
+                                         DEFAULT_BLOCKED_URL_PATTERNS mais os extras configurados se omitido
+            allowed_hosts (list): Únicos hosts que o Chrome resolve (ver allowlist_resolver_rules);
+                                  usa LOGZZ_ALLOWED_HOSTS se omitido, e lista vazia desativa
         """
         self.headless = headless
+        self.block_resources = config.BLOCK_RESOURCES if block_resources is None else block_resources
+        if blocked_url_patterns is None:
+            blocked_url_patterns = DEFAULT_BLOCKED_URL_PATTERNS + config.EXTRA_BLOCKED_URL_PATTERNS
+        self.blocked_url_patterns = blocked_url_patterns
+        self.allowed_hosts = config.ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
         self.driver = None
+        # Página do checkout já carregada e limpa, pronta para o próximo pedido
+        self.warm_url = None
+        self.warm_since = 0.0
+        # Quantidade de carregamentos da página do checkout nesta sessão
+        self.page_loads = 0
         
+    @timed_stage("browser_start")
     def start(self):
         """
         Inicia o navegador e configura as opções.
@@ -49,7 +140,24 @@ class Browser:
         options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
         options.add_experimental_option('useAutomationExtension', False)
         
-        # Inicializa o WebDriver com o ChromeDriverManager para baixar automaticamente o driver
+        if self.block_resources:
+            # Perfil enxuto: sem fontes remotas e sem serviços de fundo do Chrome
+            options.add_argument('--disable-remote-fonts')
+            options.add_argument('--disable-background-networking')
+            options.add_argument('--disable-component-update')
+            options.add_argument('--disable-default-apps')
+            options.add_argument('--disable-sync')
+            options.add_argument('--no-first-run')
+            options.add_argument('--mute-audio')
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            if self.allowed_hosts:
+                # Allowlist: hosts fora da lista nem chegam a ser resolvidos
+                options.add_argument(f'--host-resolver-rules={allowlist_resolver_rules(self.allowed_hosts)}')
+        
+        if config.CHROME_BINARY:
+            options.binary_location = config.CHROME_BINARY
+        
+        # Inicializa o WebDriver com o chromedriver resolvido uma única vez por processo
         try:
             # Configuração para ambiente de nuvem sem GUI
             chrome_prefs = {}
@@ -57,14 +165,20 @@ class Browser:
             chrome_prefs["profile.default_content_settings"] = {"images": 2}  # Desabilitar carregar imagens
             chrome_prefs["profile.managed_default_content_settings"] = {"images": 2}
             
-            self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+            with span("browser_start.driver_resolve"):
+                driver_path = resolve_driver_path()
+            with span("browser_start.chrome_launch"):
+                self.driver = webdriver.Chrome(service=Service(driver_path), options=options)
             logging.info("Driver do Chrome iniciado com sucesso")
         except Exception as e:
-            logging.error(f"Erro ao iniciar o driver do Chrome: {str(e)}")
+            logging.error("Erro ao iniciar o driver do Chrome: %s", e)
             raise
         
-        # Configura um timeout implícito mais longo
-        self.driver.implicitly_wait(15)
+        # Sem espera implícita: as esperas explícitas (WebDriverWait) controlam os limites
+        self.driver.implicitly_wait(0)
+        
+        if self.block_resources:
+            self._block_urls()
         
         # Maximizar janela para telas maiores
         if not self.headless:
@@ -72,7 +186,108 @@ class Browser:
             logging.info("Janela do navegador maximizada")
         
         return self.driver
+
+    def _block_urls(self):
+        """
+        Bloqueia via CDP as requisições que casam com os padrões configurados.
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.blocked_url_patterns})
+            logging.info("%s padrões de URL bloqueados", len(self.blocked_url_patterns))
+        except WebDriverException as e:
+            logging.warning("Não foi possível bloquear recursos via CDP: %s", e)
+
+    def process_ids(self):
+        """
+        Retorna os pids do chromedriver e de todos os processos do Chrome abertos por ele.
         
+        Returns:
+            list: Pids da árvore de processos do navegador (vazia se não iniciado)
+        """
+        if not self.driver:
+            return []
+        root = self.driver.service.process.pid
+        return [root] + descendants(root)
+
+    def is_alive(self):
+        """
+        Verifica se o navegador ainda responde aos comandos do WebDriver.
+
+        Returns:
+            bool: True se o driver está ativo e respondendo, False caso contrário
+        """
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException as e:
+            logging.warning("Navegador não está respondendo: %s", e)
+            return False
+
+    def reset_session(self, url=None):
+        """
+        Limpa cookies e armazenamento do site para que a próxima sessão comece limpa.
+        
+        O cache HTTP (JS, CSS) é preservado. Se uma URL for informada, ela é carregada
+        em seguida e fica marcada como página "quente", pronta para o próximo pedido.
+        
+        Args:
+            url (str): Página a carregar após a limpeza; about:blank se omitida
+        """
+        logging.info("Limpando cookies e armazenamento da sessão")
+        try:
+            origin = self.driver.execute_script("return window.location.origin")
+            if origin and origin != "null":
+                self.driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": origin,
+                    "storageTypes": "local_storage,session_storage,indexeddb,websql,service_workers,cache_storage",
+                })
+        except (WebDriverException, AttributeError):
+            try:
+                self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except WebDriverException:
+                # Páginas como about:blank não têm armazenamento acessível
+                pass
+        try:
+            # Limpa os cookies de todos os domínios, não apenas do domínio atual
+            self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except (WebDriverException, AttributeError):
+            self.driver.delete_all_cookies()
+        
+        self.warm_url = None
+        if not url:
+            self.driver.get("about:blank")
+            return
+        self._load_warm_page(url)
+
+    def _load_warm_page(self, url):
+        """
+        Carrega o checkout e o marca como página quente, pronta para o próximo pedido.
+        """
+        started = time.perf_counter()
+        self.driver.get(url)
+        PAGE_LOAD_SECONDS.labels("subsequent" if self.page_loads else "first").observe(time.perf_counter() - started)
+        self.page_loads += 1
+        self.warm_url = url
+        self.warm_since = time.monotonic()
+
+    def take_warm_page(self, url, max_age):
+        """
+        Consome a página quente, se for a URL pedida e tiver sido carregada há pouco.
+        
+        Args:
+            url (str): URL do checkout que será preenchido
+            max_age (float): Idade máxima da página, em segundos
+            
+        Returns:
+            bool: True se a página atual pode ser usada sem nova navegação
+        """
+        warm = self.warm_url == url and time.monotonic() - self.warm_since <= max_age
+        self.warm_url = None
+        return warm
+
     def close(self):
         """
         Fecha o navegador e libera os recursos.
@@ -80,3 +295,9 @@ class Browser:
         logging.info("Fechando o navegador")
         if self.driver:
             self.driver.quit()
+            self.driver = None
+
+if __name__ == '__main__':
+    # Resolve o chromedriver no deploy e imprime a variável para configurar os workers
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    print(f"LOGZZ_CHROMEDRIVER_PATH={resolve_driver_path()}")
@@ -0,0 +1,259 @@
+"""
+Vários contextos de navegação isolados em um mesmo processo do Chrome.
+
+Cada contexto tem cookies, armazenamento e cache próprios, como uma janela
+anônima, mas divide com os demais o processo do navegador, o que custa uma
+fração da memória de um Chrome por pedido. Cada contexto é controlado por uma
+sessão própria do chromedriver conectada ao Chrome compartilhado (pelo
+endereço de depuração), então os pedidos seguem em paralelo; entre um pedido
+e outro o contexto é descartado e outro é criado no lugar.
+"""
+import logging
+import threading
+from typing import Dict, List, Tuple
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+from browser import Browser, resolve_driver_path
+from metrics import span
+from processes import kill_tree
+from readiness import install_network_tracker
+
+
+class ChromeHost:
+    """
+    Um processo do Chrome que hospeda contextos de navegação.
+    """
+    def __init__(self, browser: Browser):
+        """
+        Args:
+            browser: Navegador já iniciado; sua janela inicial não é usada pelos pedidos
+        """
+        self.browser = browser
+        self.contexts = 0
+        self._lock = threading.Lock()
+
+    @property
+    def debugger_address(self) -> str:
+        return self.browser.driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+    def create_context(self) -> Tuple[str, str]:
+        """
+        Cria um contexto isolado com uma janela em branco.
+
+        Returns:
+            tuple: Identificador do contexto e da janela (também o window handle no Selenium)
+        """
+        with self._lock:
+            context_id = self.browser.driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+            target_id = self.browser.driver.execute_cdp_cmd("Target.createTarget", {
+                "url": "about:blank",
+                "browserContextId": context_id,
+            })["targetId"]
+        return context_id, target_id
+
+    def dispose_context(self, context_id: str, target_id: str):
+        """
+        Fecha a janela e descarta o contexto com seus cookies, armazenamento e cache.
+        """
+        with self._lock:
+            try:
+                self.browser.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": target_id})
+                self.browser.driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            except WebDriverException as e:
+                logging.warning("Não foi possível descartar o contexto %s: %s", context_id, e)
+
+    def is_alive(self) -> bool:
+        return self.browser.is_alive()
+
+    def close(self):
+        """
+        Fecha o Chrome; se o chromedriver não conseguir, encerra a árvore de processos.
+        """
+        driver = self.browser.driver
+        pid = driver.service.process.pid if driver else None
+        try:
+            self.browser.close()
+        except Exception as e:
+            logging.warning("Erro ao fechar o Chrome compartilhado: %s", e)
+            if pid is not None:
+                kill_tree(pid)
+
+
+class BrowserContext(Browser):
+    """
+    Navegador do pool que é, na verdade, um contexto isolado em um Chrome compartilhado.
+
+    Tem a mesma interface de Browser, então o pool e o LogzzFormFiller o usam
+    sem distinção.
+    """
+    def __init__(self, shared: "SharedChrome", headless=True, block_resources=None, blocked_url_patterns=None):
+        """
+        Args:
+            shared: Processos do Chrome compartilhados de onde o contexto é criado
+            headless (bool): Se True, o Chrome compartilhado roda sem interface gráfica
+            block_resources (bool): Se True, bloqueia fontes, mídia e terceiros; usa
+                                    LOGZZ_BLOCK_RESOURCES se omitido
+            blocked_url_patterns (list): Padrões de URL bloqueados; usa os padrões de Browser se omitido
+        """
+        super().__init__(headless, block_resources, blocked_url_patterns)
+        self.shared = shared
+        self.host = None
+        self.context_id = None
+        self.target_id = None
+
+    def start(self):
+        """
+        Cria o contexto em um Chrome com vaga e conecta uma sessão do chromedriver a ele.
+
+        Returns:
+            WebDriver: Sessão do Selenium posicionada na janela do contexto
+        """
+        self.host = self.shared.acquire_host()
+        try:
+            self.context_id, self.target_id = self.host.create_context()
+            options = webdriver.ChromeOptions()
+            options.debugger_address = self.host.debugger_address
+            with span("browser_start.context_attach"):
+                self.driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
+            self.driver.implicitly_wait(0)
+            self.driver.switch_to.window(self.target_id)
+        except Exception:
+            self._release()
+            raise
+        if self.block_resources:
+            self._block_urls()
+        logging.info("Contexto %s criado no Chrome compartilhado", self.context_id)
+        return self.driver
+
+    def reset_session(self, url=None):
+        """
+        Troca o contexto do pedido anterior por um novo, sem cookies, armazenamento nem cache.
+
+        Args:
+            url (str): Página a carregar no novo contexto; about:blank se omitida
+        """
+        logging.info("Descartando o contexto do pedido anterior")
+        old_context, old_target = self.context_id, self.target_id
+        self.context_id, self.target_id = self.host.create_context()
+        self.driver.switch_to.window(self.target_id)
+        self.host.dispose_context(old_context, old_target)
+        if self.block_resources:
+            # O bloqueio vale por janela: aplicamos de novo na janela do novo contexto
+            self._block_urls()
+        # O monitor de rede também foi registrado só na janela anterior
+        self.driver._logzz_tracker_registered = False
+        install_network_tracker(self.driver)
+        self.warm_url = None
+        if url:
+            self._load_warm_page(url)
+
+    def process_ids(self):
+        """
+        Retorna os pids do chromedriver deste contexto (o Chrome é compartilhado).
+        """
+        if not self.driver:
+            return []
+        return [self.driver.service.process.pid]
+
+    def is_alive(self):
+        return self.host is not None and self.host.is_alive() and super().is_alive()
+
+    def close(self):
+        """
+        Encerra a sessão do chromedriver e descarta o contexto; o Chrome só fecha sem contextos.
+        """
+        if self.driver:
+            # Sessões conectadas por endereço de depuração não fecham o Chrome ao sair
+            try:
+                self.driver.quit()
+            except WebDriverException as e:
+                logging.warning("Erro ao encerrar a sessão do contexto: %s", e)
+            self.driver = None
+        self._release()
+
+    def _release(self):
+        if self.host is None:
+            return
+        if self.context_id:
+            self.host.dispose_context(self.context_id, self.target_id)
+        self.shared.release_host(self.host)
+        self.host = None
+        self.context_id = None
+        self.target_id = None
+
+
+class SharedChrome:
+    """
+    Processos do Chrome compartilhados, cada um com até N contextos de navegação.
+    """
+    def __init__(self, contexts_per_chrome: int = 8, headless: bool = True, browser_factory=None):
+        """
+        Args:
+            contexts_per_chrome: Máximo de contextos (pedidos simultâneos) por processo do Chrome
+            headless: Se True, o Chrome roda sem interface gráfica
+            browser_factory: Função sem argumentos que cria o Browser de cada processo; usa Browser(headless) se omitida
+        """
+        self.contexts_per_chrome = contexts_per_chrome
+        self.headless = headless
+        self.browser_factory = browser_factory or (lambda: Browser(headless=headless))
+        self.hosts: List[ChromeHost] = []
+        self._lock = threading.Lock()
+
+    def context(self) -> BrowserContext:
+        """
+        Cria um contexto ainda não iniciado; serve de browser_factory para o BrowserPool.
+        """
+        return BrowserContext(self, headless=self.headless)
+
+    def acquire_host(self) -> ChromeHost:
+        """
+        Reserva uma vaga em um Chrome ativo com contextos livres, iniciando outro se todos estiverem cheios.
+        """
+        dead = []
+        try:
+            with self._lock:
+                for host in list(self.hosts):
+                    if not host.is_alive():
+                        logging.warning("Chrome compartilhado não está respondendo, descartando")
+                        self.hosts.remove(host)
+                        dead.append(host)
+                        continue
+                    if host.contexts < self.contexts_per_chrome:
+                        host.contexts += 1
+                        return host
+                # Iniciado sob o lock para que pedidos simultâneos não abram vários Chromes de uma vez
+                browser = self.browser_factory()
+                browser.start()
+                host = ChromeHost(browser)
+                host.contexts = 1
+                self.hosts.append(host)
+                logging.info("Chrome compartilhado iniciado (%s em execução)", len(self.hosts))
+                return host
+        finally:
+            # Fora do lock: encerrar um Chrome travado pode demorar
+            for host in dead:
+                host.close()
+
+    def release_host(self, host: ChromeHost):
+        """
+        Libera a vaga do contexto e fecha o Chrome que ficou sem contextos.
+        """
+        with self._lock:
+            host.contexts -= 1
+            if host.contexts > 0:
+                return
+            if host in self.hosts:
+                self.hosts.remove(host)
+        host.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"chromes": len(self.hosts), "contexts": sum(host.contexts for host in self.hosts)}
+
+    def close(self):
+        with self._lock:
+            hosts, self.hosts = self.hosts, []
+        for host in hosts:
+            host.close()
+
@@ -0,0 +1,427 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from browser import Browser
+
+
+class PoolExhaustedError(Exception):
+    """
+    Nenhum navegador ficou disponível dentro do tempo limite de empréstimo.
+    """
+
+
+class PoolCapacity:
+    """
+    Limite global de navegadores dividido entre vários pools (um por oferta).
+
+    Quando o limite é atingido, um pool que precisa crescer pode fechar um
+    navegador livre de outro pool para ocupar a vaga.
+    """
+    def __init__(self, limit):
+        """
+        Args:
+            limit (int): Número máximo de navegadores somando todos os pools
+        """
+        self.limit = limit
+        self._used = 0
+        self._pools = []
+        self._lock = threading.Lock()
+
+    def register(self, pool):
+        with self._lock:
+            self._pools.append(pool)
+
+    def try_reserve(self):
+        """
+        Reserva uma vaga, se houver; retorna False quando o limite foi atingido.
+        """
+        with self._lock:
+            if self._used >= self.limit:
+                return False
+            self._used += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._used -= 1
+
+    def evict_idle(self, requester):
+        """
+        Fecha um navegador livre de outro pool para liberar uma vaga.
+
+        Returns:
+            bool: True se alguma vaga foi liberada
+        """
+        with self._lock:
+            pools = [pool for pool in self._pools if pool is not requester]
+        # Ordem de preferência: o pool com mais navegadores livres cede primeiro
+        pools.sort(key=lambda pool: pool.stats()["idle"], reverse=True)
+        return any(pool.evict_one_idle() for pool in pools)
+
+
+class BrowserPool:
+    """
+    Pool limitado de instâncias de Browser já iniciadas.
+
+    Evita pagar o custo de inicialização do Chrome a cada pedido: os navegadores
+    são emprestados, usados e devolvidos ao pool com a sessão limpa.
+    """
+    def __init__(self, size=2, max_uses=50, headless=True, checkout_timeout=60, browser_factory=None, warm_url=None,
+                 capacity=None):
+        """
+        Inicializa o pool de navegadores.
+
+        Args:
+            size (int): Número máximo de navegadores mantidos pelo pool
+            max_uses (int): Quantidade de usos após a qual o navegador é reciclado
+            headless (bool): Se True, os navegadores rodarão em modo headless
+            checkout_timeout (float): Tempo máximo (segundos) de espera por um navegador livre
+            browser_factory: Função opcional que cria um Browser ainda não iniciado
+            warm_url (str): Página do checkout deixada carregada nos navegadores livres
+            capacity (PoolCapacity): Limite global compartilhado com outros pools
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.checkout_timeout = checkout_timeout
+        self.browser_factory = browser_factory or (lambda: Browser(headless=self.headless))
+        self.warm_url = warm_url
+        self.capacity = capacity
+        if capacity is not None:
+            capacity.register(self)
+
+        self._idle = []
+        self._uses = {}
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def start(self):
+        """
+        Pré-inicia os navegadores até o tamanho do pool.
+        """
+        logging.info("Pré-iniciando pool com %s navegadores", self.size)
+        while True:
+            with self._condition:
+                if self._closed or self._total >= self.size or not self._reserve():
+                    return
+                self._total += 1
+            self._add_new_browser()
+
+    def acquire(self, timeout=None):
+        """
+        Empresta um navegador saudável do pool.
+
+        Args:
+            timeout (float): Tempo máximo de espera; usa checkout_timeout se omitido
+
+        Returns:
+            Browser: Navegador iniciado e pronto para uso
+
+        Raises:
+            PoolExhaustedError: Se nenhum navegador ficar livre a tempo
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            at_capacity = False
+            with self._condition:
+                while not self._idle:
+                    if self._total < self.size:
+                        if self._reserve():
+                            break
+                        # Limite global atingido: tentamos liberar uma vaga fora do lock
+                        at_capacity = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        raise PoolExhaustedError(f"Nenhum navegador livre após {timeout}s")
+                    self._condition.wait(remaining)
+
+                if self._idle:
+                    browser = self._idle.pop()
+                elif not at_capacity:
+                    # Ainda há espaço no pool: reservamos a vaga e criamos fora do lock
+                    self._total += 1
+                    browser = None
+
+            if at_capacity:
+                if not self.capacity.evict_idle(self):
+                    remaining = deadline - time.monotonic()
+                    if self._closed or remaining <= 0:
+                        raise PoolExhaustedError(f"Nenhum navegador livre após {timeout}s")
+                    # Os navegadores dos outros pools estão em uso: aguardamos um ser devolvido
+                    with self._condition:
+                        self._condition.wait(min(remaining, 0.2))
+                continue
+
+            if browser is None:
+                try:
+                    browser = self._create_browser()
+                except Exception:
+                    self._discard(None)
+                    raise
+                return browser
+
+            # Verificação de saúde antes de entregar o navegador
+            if browser.is_alive():
+                return browser
+            logging.warning("Navegador do pool não respondeu, descartando")
+            self._discard(browser)
+
+    def release(self, browser, failed=False):
+        """
+        Devolve um navegador ao pool.
+
+        O navegador é reciclado se a execução falhou com exceção, se ele parou
+        de responder ou se atingiu o limite de usos; caso contrário, a sessão
+        é limpa e ele volta a ficar disponível.
+
+        Args:
+            browser (Browser): Navegador emprestado por acquire()
+            failed (bool): True se o uso terminou com erro inesperado
+        """
+        with self._condition:
+            self._uses[id(browser)] = self._uses.get(id(browser), 0) + 1
+            uses = self._uses[id(browser)]
+
+        if failed or uses >= self.max_uses or not browser.is_alive():
+            logging.info("Reciclando navegador após %s usos (falha: %s)", uses, failed)
+            self._discard(browser)
+            self._replenish()
+            return
+
+        if self.warm_url:
+            # Recarregar o checkout leva tempo: fazemos isso fora da requisição que devolveu o navegador
+            threading.Thread(target=self._reset_and_return, args=(browser,), daemon=True).start()
+        else:
+            self._reset_and_return(browser)
+
+    def _reset_and_return(self, browser):
+        """
+        Limpa a sessão do navegador (deixando o checkout carregado, se configurado)
+        e o devolve à lista de livres.
+        """
+        try:
+            browser.reset_session(url=self.warm_url)
+        except Exception as e:
+            logging.warning("Falha ao limpar sessão do navegador, reciclando: %s", e)
+            self._discard(browser)
+            self._replenish()
+            return
+
+        with self._condition:
+            if self._closed:
+                self._total -= 1
+                self._uses.pop(id(browser), None)
+                self._unreserve()
+                close = True
+            else:
+                self._idle.append(browser)
+                close = False
+            self._condition.notify()
+        if close:
+            browser.close()
+
+    @contextmanager
+    def browser(self, timeout=None):
+        """
+        Empresta um navegador durante um bloco with e o devolve ao final.
+
+        Args:
+            timeout (float): Tempo máximo de espera por um navegador livre
+
+        Yields:
+            Browser: Navegador iniciado
+        """
+        browser = self.acquire(timeout)
+        try:
+            yield browser
+        except Exception:
+            self.release(browser, failed=True)
+            raise
+        self.release(browser)
+
+    def evict_one_idle(self):
+        """
+        Fecha o navegador livre mais antigo, liberando sua vaga no limite global.
+
+        Returns:
+            bool: True se havia um navegador livre
+        """
+        with self._condition:
+            if not self._idle:
+                return False
+            browser = self._idle.pop(0)
+        logging.info("Cedendo navegador livre a outro pool")
+        self._discard(browser)
+        return True
+
+    def stats(self):
+        """
+        Retorna o estado atual do pool.
+
+        Returns:
+            dict: Tamanho máximo, navegadores ativos, livres e em uso
+        """
+        with self._condition:
+            idle = len(self._idle)
+            return {"size": self.size, "total": self._total, "idle": idle, "in_use": self._total - idle}
+
+    def close(self):
+        """
+        Fecha todos os navegadores livres; os emprestados são fechados ao serem devolvidos.
+        """
+        logging.info("Encerrando pool de navegadores")
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for browser in idle:
+            self._unreserve()
+            self._uses.pop(id(browser), None)
+            browser.close()
+
+    def _reserve(self):
+        return self.capacity is None or self.capacity.try_reserve()
+
+    def _unreserve(self):
+        if self.capacity is not None:
+            self.capacity.release()
+
+    def _create_browser(self):
+        browser = self.browser_factory()
+        browser.start()
+        if self.warm_url:
+            browser.reset_session(url=self.warm_url)
+        return browser
+
+    def _add_new_browser(self):
+        """
+        Cria um navegador para uma vaga já reservada e o coloca como livre.
+        """
+        try:
+            browser = self._create_browser()
+        except Exception as e:
+            logging.error("Erro ao criar navegador para o pool: %s", e)
+            self._discard(None)
+            return
+        with self._condition:
+            self._idle.append(browser)
+            self._condition.notify()
+
+    def _replenish(self):
+        """
+        Repõe em segundo plano um navegador reciclado, mantendo o pool aquecido.
+        """
+        with self._condition:
+            if self._closed or self._total >= self.size or not self._reserve():
+                return
+            self._total += 1
+        threading.Thread(target=self._add_new_browser, daemon=True).start()
+
+    def _discard(self, browser):
+        """
+        Remove um navegador (ou uma vaga reservada) do pool e libera a vaga.
+        """
+        with self._condition:
+            self._total -= 1
+            if browser is not None:
+                self._uses.pop(id(browser), None)
+            self._unreserve()
+            self._condition.notify()
+        if browser is not None:
+            try:
+                browser.close()
+            except Exception as e:
+                logging.warning("Erro ao fechar navegador descartado: %s", e)
+
+
+class ShardedBrowserPool:
+    """
+    Um BrowserPool por oferta, com limite global de navegadores.
+
+    Cada oferta mantém a própria página do checkout aquecida, então pedidos de
+    ofertas diferentes não recarregam a página um do outro; a capacidade total
+    é compartilhada, e navegadores livres de uma oferta são cedidos a outra
+    quando necessário.
+    """
+    def __init__(self, size=2, max_uses=50, headless=True, checkout_timeout=60, browser_factory=None):
+        """
+        Args:
+            size (int): Número máximo de navegadores somando todas as ofertas
+            max_uses (int): Quantidade de usos após a qual o navegador é reciclado
+            headless (bool): Se True, os navegadores rodarão em modo headless
+            checkout_timeout (float): Tempo máximo (segundos) de espera por um navegador livre
+            browser_factory: Função opcional que cria um Browser ainda não iniciado
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.headless = headless
+        self.checkout_timeout = checkout_timeout
+        self.browser_factory = browser_factory
+        self.capacity = PoolCapacity(size)
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def shard(self, key, warm_url=None):
+        """
+        Retorna (criando, se preciso) o pool da oferta.
+
+        Args:
+            key (str): Identificador da oferta
+            warm_url (str): Página do checkout da oferta
+        """
+        with self._lock:
+            pool = self._shards.get(key)
+            if pool is None:
+                pool = BrowserPool(
+                    size=self.size,
+                    max_uses=self.max_uses,
+                    headless=self.headless,
+                    checkout_timeout=self.checkout_timeout,
+                    browser_factory=self.browser_factory,
+                    warm_url=warm_url,
+                    capacity=self.capacity,
+                )
+                self._shards[key] = pool
+            return pool
+
+    def start(self, key, warm_url=None):
+        """
+        Pré-inicia navegadores para uma oferta (normalmente a padrão).
+        """
+        self.shard(key, warm_url).start()
+
+    @contextmanager
+    def browser(self, key, warm_url=None, timeout=None):
+        """
+        Empresta um navegador do pool da oferta durante um bloco with.
+        """
+        with self.shard(key, warm_url).browser(timeout) as browser:
+            yield browser
+
+    def stats(self):
+        """
+        Retorna o estado somado de todas as ofertas.
+
+        Returns:
+            dict: Limite global, navegadores ativos, livres e em uso
+        """
+        with self._lock:
+            shards = list(self._shards.values())
+        totals = {"size": self.size, "total": 0, "idle": 0, "in_use": 0}
+        for pool in shards:
+            stats = pool.stats()
+            for key in ("total", "idle", "in_use"):
+                totals[key] += stats[key]
+        return totals
+
+    def close(self):
+        with self._lock:
+            shards = list(self._shards.values())
+        for pool in shards:
+            pool.close()
@@ -0,0 +1,230 @@
+"""
+Caches locais com expiração (TTL), descarte LRU e persistência em disco.
+
+Uso para pré-aquecer o cache de CEP com pedidos antigos:
+    python cache.py pedidos_antigos.csv
+"""
+import atexit
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+import config
+import metrics
+
+
+class TTLCache:
+    """
+    Cache chave/valor com expiração, limite de itens (LRU) e persistência opcional em JSON.
+    """
+    def __init__(self, ttl: float, max_items: int = 10000, path: Optional[str] = None, save_interval: float = 30):
+        """
+        Inicializa o cache.
+
+        Args:
+            ttl: Tempo de vida de cada item, em segundos
+            max_items: Quantidade máxima de itens; os menos usados são descartados
+            path: Arquivo JSON onde o cache é persistido (None para manter só em memória)
+            save_interval: Intervalo mínimo entre gravações automáticas, em segundos
+        """
+        self.ttl = ttl
+        self.max_items = max_items
+        self.path = path
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.monotonic()
+        if path and os.path.exists(path):
+            self.load()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retorna o valor da chave, ou None se não existir ou tiver expirado.
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > time.time():
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._items[key]
+                self._dirty = True
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Armazena um valor, descartando os itens menos usados se o limite for excedido.
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._items[key] = (expires_at, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+            self._dirty = True
+            should_save = self.path and time.monotonic() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def delete(self, key: str):
+        """
+        Remove uma chave do cache, se existir.
+        """
+        with self._lock:
+            if self._items.pop(key, None) is not None:
+                self._dirty = True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna quantidade de itens, acertos, faltas e taxa de acerto.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "itens": len(self._items),
+                "acertos": self.hits,
+                "faltas": self.misses,
+                "taxa_acerto": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def load(self):
+        """
+        Carrega os itens não expirados do arquivo de persistência.
+        """
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning("Não foi possível carregar o cache %s: %s", self.path, e)
+            return
+        now = time.time()
+        with self._lock:
+            for key, (expires_at, value) in stored.items():
+                if expires_at > now:
+                    self._items[key] = (expires_at, value)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        logging.info("Cache %s carregado com %s itens", self.path, len(self._items))
+
+    def save(self):
+        """
+        Grava o cache no arquivo de persistência (de forma atômica), se houve mudanças.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._items)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        # Arquivo temporário exclusivo: processos gravando o mesmo cache não disputam o mesmo .tmp
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(self.path) or ".",
+                                             prefix=f"{os.path.basename(self.path)}.", suffix=".tmp",
+                                             delete=False) as f:
+                tmp_path = f.name
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning("Não foi possível gravar o cache %s: %s", self.path, e)
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            with self._lock:
+                self._dirty = True
+
+
+def normalize_cep(cep: str) -> str:
+    """
+    Mantém apenas os dígitos do CEP ("04001-000" -> "04001000").
+    """
+    return re.sub(r"\D", "", cep or "")
+
+
+class CepCache(TTLCache):
+    """
+    Cache de CEP -> endereço (logradouro e bairro).
+    """
+    def get_address(self, cep: str) -> Optional[Dict[str, str]]:
+        """
+        Retorna o endereço conhecido do CEP, ou None se não estiver no cache.
+        """
+        address = self.get(normalize_cep(cep))
+        metrics.CEP_CACHE_LOOKUPS.labels("hit" if address else "miss").inc()
+        return address
+
+    def put_address(self, cep: str, logradouro: str, bairro: str):
+        """
+        Armazena o endereço de um CEP; ignora endereços incompletos.
+        """
+        cep = normalize_cep(cep)
+        if len(cep) != 8 or not logradouro or not bairro:
+            return
+        self.put(cep, {"logradouro": logradouro, "bairro": bairro})
+
+    def prewarm(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Pré-aquece o cache com pedidos antigos que já tenham logradouro e bairro.
+
+        Args:
+            records: Dados de clientes no formato de dados_cliente
+
+        Returns:
+            int: Quantidade de registros aproveitados
+        """
+        count = 0
+        for record in records:
+            endereco = record.get("endereco") or {}
+            if endereco.get("cep") and endereco.get("logradouro") and endereco.get("bairro"):
+                self.put_address(endereco["cep"], endereco["logradouro"], endereco["bairro"])
+                count += 1
+        self.save()
+        return count
+
+
+_default_cep_cache = None
+_default_cep_cache_lock = threading.Lock()
+
+
+def default_cep_cache() -> CepCache:
+    """
+    Retorna o cache de CEP compartilhado do processo, criado na primeira chamada.
+    """
+    global _default_cep_cache
+    with _default_cep_cache_lock:
+        if _default_cep_cache is None:
+            _default_cep_cache = CepCache(config.CEP_CACHE_TTL, config.CEP_CACHE_MAX_ITEMS, config.CEP_CACHE_PATH)
+            atexit.register(_default_cep_cache.save)
+        return _default_cep_cache
+
+
+def main(argv=None):
+    from batch import detect_format, read_records
+
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    cep_cache = default_cep_cache()
+    for path in argv:
+        with open(path, encoding="utf-8", newline="") as stream:
+            count = cep_cache.prewarm(read_records(stream, detect_format(path)))
+        logging.info("%s endereços de %s adicionados ao cache de CEP", count, path)
+    print(json.dumps(cep_cache.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
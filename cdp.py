@@ -0,0 +1,419 @@
+"""
+Cliente assíncrono do protocolo DevTools (CDP), sem Selenium nem chromedriver.
+
+Uma única conexão websocket com o Chrome multiplexa todas as abas: cada
+comando é uma mensagem com id e as respostas chegam pela mesma conexão, então
+um event loop conduz dezenas de abas sem uma thread por navegador. Cada aba
+pode ficar em um contexto de navegação próprio (cookies e armazenamento
+isolados, como uma janela anônima), criado e descartado em milissegundos.
+"""
+import asyncio
+import base64
+import itertools
+import json
+import logging
+import re
+import shutil
+import tempfile
+from typing import Any, Dict, List, Optional
+import websockets
+import config
+from browser import DEFAULT_BLOCKED_URL_PATTERNS, allowlist_resolver_rules
+from metrics import span
+from processes import descendants, kill_tree
+from readiness import NETWORK_TRACKER_JS, POLL_INTERVAL
+
+# Linha que o Chrome escreve no stderr com o endereço da conexão de depuração
+DEVTOOLS_LISTENING = re.compile(r"DevTools listening on (ws://\S+)")
+
+# Executáveis procurados no PATH quando LOGZZ_CHROME_BINARY não está configurado
+CHROME_EXECUTABLES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]
+
+
+class CDPError(Exception):
+    """
+    Erro devolvido pelo Chrome para um comando, ou conexão encerrada.
+    """
+
+
+class CDPConnection:
+    """
+    Conexão websocket com o Chrome, compartilhada por todas as abas.
+    """
+    def __init__(self, url: str):
+        self.url = url
+        self._ws = None
+        self._ids = itertools.count(1)
+        self._calls: Dict[int, asyncio.Future] = {}
+        self._listeners: List[tuple] = []
+        self._reader = None
+        self.closed = False
+
+    async def connect(self):
+        # Screenshots e código fonte podem passar do limite padrão de 1 MiB por mensagem
+        self._ws = await websockets.connect(self.url, max_size=None, ping_interval=None)
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None,
+                   timeout: float = 30) -> Dict[str, Any]:
+        """
+        Envia um comando e aguarda a resposta.
+
+        Args:
+            method: Método do protocolo (ex.: 'Page.navigate')
+            params: Parâmetros do comando
+            session_id: Sessão da aba; None para comandos do navegador
+            timeout: Tempo máximo de espera pela resposta, em segundos
+
+        Returns:
+            dict: Campo 'result' da resposta
+
+        Raises:
+            CDPError: Se o Chrome devolver erro ou a conexão estiver encerrada
+        """
+        if self.closed:
+            raise CDPError("Conexão com o Chrome encerrada")
+        call_id = next(self._ids)
+        message = {"id": call_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = future
+        try:
+            await self._ws.send(json.dumps(message))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{method} sem resposta em {timeout}s")
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def wait_event(self, method: str, session_id: Optional[str] = None, timeout: float = 30) -> Dict[str, Any]:
+        """
+        Aguarda o próximo evento com o nome indicado (da aba, se session_id for informado).
+
+        Raises:
+            CDPError: Se o evento não chegar dentro do limite
+        """
+        future = asyncio.get_running_loop().create_future()
+        listener = (method, session_id, future)
+        self._listeners.append(listener)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"Evento {method} não chegou em {timeout}s")
+        finally:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    async def _read_loop(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self._calls.get(message["id"])
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CDPError(message["error"].get("message", str(message["error"]))))
+                    else:
+                        future.set_result(message.get("result", {}))
+                    continue
+                for listener in list(self._listeners):
+                    method, session_id, future = listener
+                    if method == message.get("method") and session_id in (None, message.get("sessionId")):
+                        if not future.done():
+                            future.set_result(message.get("params", {}))
+                        self._listeners.remove(listener)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.closed = True
+            # Quem aguarda uma resposta recebe o erro em vez de esperar o limite
+            for future in list(self._calls.values()) + [listener[2] for listener in self._listeners]:
+                if not future.done():
+                    future.set_exception(CDPError("Conexão com o Chrome encerrada"))
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+        self.closed = True
+
+
+class CDPPage:
+    """
+    Aba conectada por uma sessão CDP, opcionalmente em um contexto de navegação próprio.
+    """
+    def __init__(self, connection: CDPConnection, target_id: str, session_id: str, context_id: Optional[str] = None):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        self.context_id = context_id
+        # Quantas vezes esta aba carregou uma página (primeiro carregamento vs seguintes)
+        self.page_loads = 0
+
+    async def send(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30) -> Dict[str, Any]:
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def evaluate(self, script: str, *args, timeout: float = 30) -> Any:
+        """
+        Executa o corpo de uma função JavaScript com os argumentos informados.
+
+        O script segue a convenção de execute_script do Selenium (usa arguments[i]
+        e return), para que os mesmos scripts sirvam aos dois backends.
+
+        Returns:
+            O valor retornado, convertido de JSON
+
+        Raises:
+            CDPError: Se o script lançar uma exceção
+        """
+        expression = f"(function() {{\n{script}\n}}).apply(null, {json.dumps(list(args))})"
+        response = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": True,
+        }, timeout)
+        if "exceptionDetails" in response:
+            details = response["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text", "Erro no script"))
+        return response.get("result", {}).get("value")
+
+    async def wait_for(self, script: str, *args, timeout: float = 10) -> Any:
+        """
+        Repete o script até ele retornar um valor verdadeiro.
+
+        Returns:
+            O primeiro valor verdadeiro, ou None se o limite foi atingido
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            try:
+                value = await self.evaluate(script, *args)
+            except CDPError:
+                # A página pode estar navegando entre uma verificação e outra
+                value = None
+            if value:
+                return value
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def navigate(self, url: str, timeout: float = 15) -> bool:
+        """
+        Navega até a URL e aguarda o evento de carregamento.
+
+        Returns:
+            bool: True se a página carregou dentro do limite
+        """
+        loaded = asyncio.ensure_future(self.connection.wait_event("Page.loadEventFired", self.session_id, timeout))
+        try:
+            response = await self.send("Page.navigate", {"url": url}, timeout)
+        except CDPError:
+            loaded.cancel()
+            raise
+        if response.get("errorText"):
+            loaded.cancel()
+            raise CDPError(f"Falha ao acessar {url}: {response['errorText']}")
+        try:
+            await loaded
+            return True
+        except CDPError as e:
+            logging.warning(str(e))
+            return False
+
+    async def insert_text(self, text: str):
+        """
+        Digita o texto no elemento com foco, como um método de entrada.
+        """
+        await self.send("Input.insertText", {"text": text})
+
+    async def press_tab(self):
+        for event in ("keyDown", "keyUp"):
+            await self.send("Input.dispatchKeyEvent", {
+                "type": event, "key": "Tab", "code": "Tab", "windowsVirtualKeyCode": 9,
+            })
+
+    async def screenshot(self) -> bytes:
+        response = await self.send("Page.captureScreenshot", {"format": "png"})
+        return base64.b64decode(response["data"])
+
+    async def page_source(self) -> str:
+        return await self.evaluate("return document.documentElement.outerHTML")
+
+
+async def launch_chrome(headless: bool = True, block_resources: bool = True,
+                        allowed_hosts: Optional[List[str]] = None):
+    """
+    Inicia o Chrome com a porta de depuração e retorna o processo, o endereço
+    websocket e o diretório de perfil temporário.
+
+    Com block_resources e allowed_hosts, só os hosts da lista são resolvidos (ver browser.allowlist_resolver_rules).
+    """
+    binary = config.CHROME_BINARY or next(filter(None, map(shutil.which, CHROME_EXECUTABLES)), None)
+    if not binary:
+        raise FileNotFoundError("Chrome não encontrado; configure LOGZZ_CHROME_BINARY")
+    profile = tempfile.mkdtemp(prefix="logzz-cdp-")
+    args = [
+        binary,
+        "--remote-debugging-port=0",
+        f"--user-data-dir={profile}",
+        "--disable-gpu",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-extensions",
+        "--disable-notifications",
+        "--disable-popup-blocking",
+        "--window-size=1920,1080",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "about:blank",
+    ]
+    if headless:
+        args.insert(1, "--headless=new")
+    if block_resources:
+        args[1:1] = [
+            "--disable-remote-fonts",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--mute-audio",
+            "--blink-settings=imagesEnabled=false",
+        ]
+        if allowed_hosts:
+            args.insert(1, f"--host-resolver-rules={allowlist_resolver_rules(allowed_hosts)}")
+    process = await asyncio.create_subprocess_exec(
+        *args, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        while True:
+            line = await asyncio.wait_for(process.stderr.readline(), 30)
+            if not line:
+                raise CDPError(f"Chrome encerrou ao iniciar (código {process.returncode})")
+            match = DEVTOOLS_LISTENING.search(line.decode("utf-8", "replace"))
+            if match:
+                break
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+        shutil.rmtree(profile, ignore_errors=True)
+        raise
+    # Continuamos lendo o stderr para o Chrome não travar com o buffer cheio
+    asyncio.ensure_future(_drain(process.stderr))
+    return process, match.group(1), profile
+
+
+async def _drain(stream):
+    while await stream.readline():
+        pass
+
+
+class CDPBrowser:
+    """
+    Um processo do Chrome controlado diretamente pelo protocolo DevTools.
+    """
+    def __init__(self, headless=True, block_resources=None, blocked_url_patterns=None):
+        """
+        Args:
+            headless (bool): Se True, o navegador roda sem interface gráfica
+            block_resources (bool): Se True, bloqueia fontes, mídia e terceiros; usa
+                                    LOGZZ_BLOCK_RESOURCES se omitido
+            blocked_url_patterns (list): Padrões de URL bloqueados; usa
+                                         DEFAULT_BLOCKED_URL_PATTERNS mais os extras configurados se omitido
+        """
+        self.headless = headless
+        self.block_resources = config.BLOCK_RESOURCES if block_resources is None else block_resources
+        if blocked_url_patterns is None:
+            blocked_url_patterns = DEFAULT_BLOCKED_URL_PATTERNS + config.EXTRA_BLOCKED_URL_PATTERNS
+        self.blocked_url_patterns = blocked_url_patterns
+        self.process = None
+        self.connection = None
+        self._profile = None
+        self.pages: Dict[str, CDPPage] = {}
+
+    async def start(self):
+        logging.info("Iniciando o Chrome (CDP)")
+        with span("browser_start.chrome_launch"):
+            self.process, url, self._profile = await launch_chrome(self.headless, self.block_resources,
+                                                                   config.ALLOWED_HOSTS)
+            self.connection = CDPConnection(url)
+            await self.connection.connect()
+        logging.info("Chrome iniciado (pid %s)", self.process.pid)
+
+    async def new_page(self, isolated: bool = True) -> CDPPage:
+        """
+        Abre uma aba, por padrão em um contexto de navegação novo e isolado.
+
+        Args:
+            isolated: Se True, a aba tem cookies, armazenamento e cache próprios
+
+        Returns:
+            CDPPage: Aba pronta, com o monitor de rede e o bloqueio de recursos aplicados
+        """
+        context_id = None
+        if isolated:
+            context_id = (await self.connection.send("Target.createBrowserContext", {
+                "disposeOnDetach": True,
+            }))["browserContextId"]
+        params = {"url": "about:blank"}
+        if context_id:
+            params["browserContextId"] = context_id
+        target_id = (await self.connection.send("Target.createTarget", params))["targetId"]
+        session_id = (await self.connection.send("Target.attachToTarget", {
+            "targetId": target_id, "flatten": True,
+        }))["sessionId"]
+        page = CDPPage(self.connection, target_id, session_id, context_id)
+        await page.send("Page.enable")
+        await page.send("Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_TRACKER_JS})
+        if self.block_resources:
+            await page.send("Network.enable")
+            await page.send("Network.setBlockedURLs", {"urls": self.blocked_url_patterns})
+        self.pages[target_id] = page
+        return page
+
+    async def close_page(self, page: CDPPage):
+        """
+        Fecha a aba e descarta o contexto dela (cookies e armazenamento do pedido).
+        """
+        self.pages.pop(page.target_id, None)
+        if self.connection is None or self.connection.closed:
+            return
+        try:
+            await self.connection.send("Target.closeTarget", {"targetId": page.target_id}, timeout=5)
+            if page.context_id:
+                await self.connection.send("Target.disposeBrowserContext", {"browserContextId": page.context_id}, timeout=5)
+        except CDPError as e:
+            logging.warning("Não foi possível fechar a aba %s: %s", page.target_id, e)
+
+    def process_ids(self):
+        """
+        Retorna os pids do Chrome e de seus processos auxiliares.
+        """
+        if self.process is None:
+            return []
+        return [self.process.pid] + descendants(self.process.pid)
+
+    def is_alive(self) -> bool:
+        return (self.process is not None and self.process.returncode is None
+                and self.connection is not None and not self.connection.closed)
+
+    async def close(self):
+        logging.info("Fechando o Chrome (CDP)")
+        if self.connection is not None:
+            try:
+                await self.connection.send("Browser.close", timeout=5)
+            except CDPError:
+                pass
+            await self.connection.close()
+        if self.process is not None:
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                kill_tree(self.process.pid)
+        if self._profile:
+            shutil.rmtree(self._profile, ignore_errors=True)
+        self.process = None
+        self.connection = None
+        self.pages = {}
@@ -0,0 +1,97 @@
+"""
+Configurações da aplicação, lidas de variáveis de ambiente.
+"""
+import os
+
+def _env_bool(name, default):
+    """
+    Lê uma variável de ambiente booleana ("1", "true", "sim" são verdadeiros).
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "sim", "on")
+
+# Navegador
+HEADLESS = _env_bool("LOGZZ_HEADLESS", True)
+# Caminhos explícitos evitam o webdriver-manager (útil em servidores sem acesso à internet)
+CHROMEDRIVER_PATH = os.environ.get("LOGZZ_CHROMEDRIVER_PATH")
+CHROME_BINARY = os.environ.get("LOGZZ_CHROME_BINARY")
+# Bloqueio de fontes, mídia e scripts de terceiros durante o checkout
+BLOCK_RESOURCES = _env_bool("LOGZZ_BLOCK_RESOURCES", True)
+EXTRA_BLOCKED_URL_PATTERNS = [p.strip() for p in os.environ.get("LOGZZ_BLOCKED_URL_PATTERNS", "").split(",") if p.strip()]
+# Allowlist de hosts (ex.: "logzz.com.br,*.logzz.com.br,viacep.com.br"): quando definida, qualquer
+# outro host deixa de ser resolvido pelo Chrome. Vazia desativa; inclua os hosts de CDN e de busca de CEP do checkout
+ALLOWED_HOSTS = [h.strip() for h in os.environ.get("LOGZZ_ALLOWED_HOSTS", "").split(",") if h.strip()]
+
+# Arquivo JSON com o registro de ofertas (vazio: apenas a oferta padrão)
+OFFERS_FILE = os.environ.get("LOGZZ_OFFERS_FILE")
+
+# Preenchimento rápido: todos os campos de uma etapa em uma única chamada JavaScript
+FAST_FILL = _env_bool("LOGZZ_FAST_FILL", False)
+
+# Backend de controle do navegador: "selenium" (chromedriver) ou "cdp" (protocolo DevTools
+# direto, com asyncio: um Chrome atende vários pedidos em abas isoladas)
+DRIVER_BACKEND = os.environ.get("LOGZZ_DRIVER_BACKEND", "selenium")
+CDP_MAX_CONTEXTS = int(os.environ.get("LOGZZ_CDP_MAX_CONTEXTS", "8"))
+
+# Motor de envio: "selenium" (navegador) ou "http" (requisições diretas, com o navegador como alternativa)
+SUBMIT_ENGINE = os.environ.get("LOGZZ_SUBMIT_ENGINE", "selenium")
+
+# Pool de navegadores pré-iniciados
+POOL_SIZE = int(os.environ.get("LOGZZ_POOL_SIZE", "2"))
+POOL_MAX_USES = int(os.environ.get("LOGZZ_POOL_MAX_USES", "50"))
+POOL_CHECKOUT_TIMEOUT = float(os.environ.get("LOGZZ_POOL_CHECKOUT_TIMEOUT", "60"))
+# Idade máxima de uma página do checkout pré-carregada antes de ser recarregada
+WARM_PAGE_MAX_AGE = float(os.environ.get("LOGZZ_WARM_PAGE_MAX_AGE", "600"))
+
+# Contextos de navegação isolados por processo do Chrome (0: um Chrome por navegador do pool)
+CONTEXTS_PER_CHROME = int(os.environ.get("LOGZZ_CONTEXTS_PER_CHROME", "0"))
+
+# Novas tentativas da etapa que falhou, mantendo a sessão do navegador
+STAGE_RETRIES = int(os.environ.get("LOGZZ_STAGE_RETRIES", "2"))
+STAGE_RETRY_BUDGET = int(os.environ.get("LOGZZ_STAGE_RETRY_BUDGET", "3"))
+STAGE_RETRY_BASE_DELAY = float(os.environ.get("LOGZZ_STAGE_RETRY_BASE_DELAY", "1"))
+STAGE_RETRY_MAX_DELAY = float(os.environ.get("LOGZZ_STAGE_RETRY_MAX_DELAY", "8"))
+STAGE_RETRY_WINDOW = float(os.environ.get("LOGZZ_STAGE_RETRY_WINDOW", "90"))
+
+# Processos de trabalho isolados (0: pedidos executados no próprio processo do servidor). As métricas
+# dos workers vão para PROMETHEUS_MULTIPROC_DIR (esvazie-o a cada início) ou, sem ela, para um diretório temporário
+WORKER_PROCESSES = int(os.environ.get("LOGZZ_WORKER_PROCESSES", "0"))
+WORKER_BROWSERS = int(os.environ.get("LOGZZ_WORKER_BROWSERS", "1"))
+WORKER_TASK_TIMEOUT = float(os.environ.get("LOGZZ_WORKER_TASK_TIMEOUT", "180"))
+# Tempo para uma tarefa cancelada por tempo máximo terminar antes de o worker inteiro ser encerrado
+WORKER_CANCEL_GRACE = float(os.environ.get("LOGZZ_WORKER_CANCEL_GRACE", "15"))
+# Tempo máximo de espera por uma vaga em algum worker antes de recusar a tarefa
+WORKER_QUEUE_TIMEOUT = float(os.environ.get("LOGZZ_WORKER_QUEUE_TIMEOUT", "60"))
+WORKER_MAX_JOBS = int(os.environ.get("LOGZZ_WORKER_MAX_JOBS", "200"))
+
+# Fila de pedidos assíncrona
+JOB_DB_PATH = os.environ.get("LOGZZ_JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.environ.get("LOGZZ_JOB_WORKERS", str(POOL_SIZE)))
+JOB_MAX_PENDING = int(os.environ.get("LOGZZ_JOB_MAX_PENDING", "100"))
+CALLBACK_TIMEOUT = float(os.environ.get("LOGZZ_CALLBACK_TIMEOUT", "10"))
+
+# Idempotência: por quanto tempo uma repetição do mesmo pedido recebe o resultado anterior
+IDEMPOTENCY_TTL = float(os.environ.get("LOGZZ_IDEMPOTENCY_TTL", str(24 * 3600)))
+IDEMPOTENCY_CACHE_PATH = os.environ.get("LOGZZ_IDEMPOTENCY_CACHE_PATH", "idempotency_cache.json")
+
+# Cotação (dias de entrega disponíveis): por quanto tempo a resposta por CEP e oferta é reaproveitada
+QUOTE_CACHE_TTL = float(os.environ.get("LOGZZ_QUOTE_CACHE_TTL", "600"))
+QUOTE_CACHE_MAX_ITEMS = int(os.environ.get("LOGZZ_QUOTE_CACHE_MAX_ITEMS", "5000"))
+
+# Registro de execuções em JSON Lines, uma linha por tarefa (vazio desativa), rotacionado por tamanho
+RUN_LOG_PATH = os.environ.get("LOGZZ_RUN_LOG_PATH", "runs.jsonl")
+RUN_LOG_MAX_BYTES = int(os.environ.get("LOGZZ_RUN_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+RUN_LOG_BACKUPS = int(os.environ.get("LOGZZ_RUN_LOG_BACKUPS", "5"))
+
+# Artefatos de depuração: "off", "on_failure" ou "always"
+ARTIFACT_POLICY = os.environ.get("LOGZZ_ARTIFACT_POLICY", "on_failure")
+ARTIFACT_DIR = os.environ.get("LOGZZ_ARTIFACT_DIR", "artifacts")
+ARTIFACT_MAX_JOBS = int(os.environ.get("LOGZZ_ARTIFACT_MAX_JOBS", "200"))
+ARTIFACT_MAX_BYTES = int(os.environ.get("LOGZZ_ARTIFACT_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Cache local de CEP -> endereço
+CEP_CACHE_PATH = os.environ.get("LOGZZ_CEP_CACHE_PATH", "cep_cache.json")
+CEP_CACHE_TTL = float(os.environ.get("LOGZZ_CEP_CACHE_TTL", str(30 * 24 * 3600)))
+CEP_CACHE_MAX_ITEMS = int(os.environ.get("LOGZZ_CEP_CACHE_MAX_ITEMS", "50000"))
@@ -0,0 +1,98 @@
+"""
+Preenchimento rápido: todos os campos de uma etapa em uma única chamada execute_script.
+
+Cada campo é localizado pelos mesmos seletores do registro, recebe o valor pelo
+setter nativo (para que frameworks como React/Vue percebam a mudança) e dispara
+os eventos que as máscaras e a busca de CEP do site escutam (input, keyup,
+change e blur). O valor final é conferido na mesma chamada; campos que recusam
+o valor programático ficam para o preenchimento tecla a tecla (send_keys).
+"""
+from typing import Dict, List, Optional, Tuple
+from selenium.common.exceptions import WebDriverException
+from locators import LocatorRegistry
+
+FAST_FILL_JS = """
+var fields = arguments[0];
+function lookup(by, value) {
+    if (by === 'id') { return document.getElementById(value); }
+    if (by === 'css selector') { return document.querySelector(value); }
+    if (by === 'name') { return document.getElementsByName(value)[0] || null; }
+    return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+function digits(text) { return (text || '').replace(/\\D/g, ''); }
+function setNative(el, value) {
+    var proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    var setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+    setter.call(el, value);
+}
+var results = [];
+for (var f = 0; f < fields.length; f++) {
+    var candidates = fields[f][1], value = fields[f][2], el = null, index = -1;
+    for (var i = 0; i < candidates.length; i++) {
+        var found;
+        try { found = lookup(candidates[i][0], candidates[i][1]); } catch (e) { found = null; }
+        if (found && !found.disabled && found.getClientRects().length > 0) { el = found; index = i; break; }
+    }
+    if (!el) { results.push([false, -1, null]); continue; }
+    try {
+        el.focus();
+        setNative(el, value);
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new KeyboardEvent('keyup', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        el.blur();
+    } catch (e) {}
+    // Máscaras podem formatar o valor ("04001000" -> "04001-000"): comparamos também só os dígitos
+    var ok = el.value === value || (digits(value) !== '' && digits(el.value) === digits(value));
+    results.push([ok, index, el.value]);
+}
+return results;
+"""
+
+
+def fill_payload(registry: LocatorRegistry, pairs: List[Tuple[str, str]]) -> Tuple[list, Dict[str, list]]:
+    """
+    Monta os argumentos de FAST_FILL_JS e os candidatos de cada campo.
+    """
+    candidates = {field: registry.candidates(field) for field, _ in pairs}
+    payload = [
+        [field, [[locator.by, locator.value] for locator in candidates[field]], value]
+        for field, value in pairs
+    ]
+    return payload, candidates
+
+
+def parse_results(registry: LocatorRegistry, pairs: List[Tuple[str, str]], candidates: Dict[str, list],
+                  results) -> Dict[str, Tuple[bool, Optional[str]]]:
+    """
+    Interpreta o retorno de FAST_FILL_JS e registra a estratégia que encontrou cada campo.
+    """
+    filled = {}
+    for (field, _), (ok, index, _current) in zip(pairs, results or []):
+        strategy = candidates[field][index].strategy if index >= 0 else None
+        if strategy is not None:
+            registry.remember(field, strategy)
+        filled[field] = (bool(ok), strategy)
+    for field, _ in pairs:
+        filled.setdefault(field, (False, None))
+    return filled
+
+
+def fill_fields(driver, registry: LocatorRegistry, pairs: List[Tuple[str, str]]) -> Dict[str, Tuple[bool, Optional[str]]]:
+    """
+    Preenche vários campos em uma única chamada e confere os valores.
+
+    Args:
+        driver: Instância do WebDriver
+        registry: Registro de seletores dos campos
+        pairs: Pares (campo, valor) na ordem de preenchimento
+
+    Returns:
+        dict: Por campo, (aceitou o valor, estratégia que o encontrou ou None)
+    """
+    payload, candidates = fill_payload(registry, pairs)
+    try:
+        results = driver.execute_script(FAST_FILL_JS, payload)
+    except WebDriverException:
+        results = None
+    return parse_results(registry, pairs, candidates, results)
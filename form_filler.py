@@ -1,28 +1,333 @@
 import logging
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from selenium.webdriver.common.keys import Keys
+from readiness import install_network_tracker, wait_document_ready, wait_network_idle, wait_for_any_value
+from metrics import PAGE_LOAD_SECONDS, span, timed_stage
+from locators import LocatorRegistry, default_registry
+from artifacts import ArtifactRecorder, default_recorder
+from cache import CepCache, default_cep_cache
+from results import OrderResult
+from stages import OrderProgress, RetryPolicy, run_once, run_stages
+from fast_fill import fill_fields
+import config
+
+# Página de checkout da oferta
+DEFAULT_URL = "https://entrega.logzz.com.br/pay/QYSLBC/ohcky-1-unidade-escova-alisadora"
+
+# Limites máximos (em segundos) de cada espera; as esperas retornam assim que o sinal chega
+DEFAULT_TIMEOUTS = {
+    "page_load": 15,         # carregamento da página inicial
+    "element": 10,           # localizar um campo ou botão
+    "stage_check": 10,       # confirmar que estamos na etapa esperada
+    "stage_transition": 15,  # aparecimento do título da próxima etapa
+    "network_idle": 5,       # nenhuma requisição XHR/fetch pendente
+    "cep_autofill": 8,       # autopreenchimento do endereço após o CEP
+    "completion": 10,        # confirmação de conclusão da terceira etapa
+}
+
+# Texto que identifica cada etapa na página (a primeira etapa não tem título próprio)
+STAGE_TITLES = {
+    2: "Endereço e entrega",
+    3: "Escolha o dia para receber o entregador",
+}
+
+# Textos que só aparecem depois que o dia de entrega foi confirmado (o título da
+# etapa de agendamento e o botão "Finalizar" continuam na página)
+COMPLETION_TEXTS = ["sucesso", "confirmad", "Pagamento"]
+COMPLETION_XPATH = "//*[" + " or ".join(f"contains(text(), '{text}')" for text in COMPLETION_TEXTS) + "]"
+
+# Lê todos os cards de dia da etapa de agendamento em uma única chamada
+DAYS_JS = """
+var days = [];
+var radios = document.querySelectorAll("input[type='radio'][id^='day-']");
+for (var i = 0; i < radios.length; i++) {
+    var radio = radios[i];
+    var card = radio.closest("[class*='card-day']") || radio.parentElement;
+    var index = parseInt(radio.id.slice(4), 10);
+    days.push({
+        indice: isNaN(index) ? i : index,
+        id: radio.id,
+        valor: radio.value,
+        rotulo: (card ? card.textContent : '').replace(/\\s+/g, ' ').trim(),
+        disponivel: !radio.disabled
+    });
+}
+return days;
+"""
+
+def choose_day_index(days: List[Dict[str, Any]], data: Dict[str, Any]) -> int:
+    """
+    Índice do dia pedido: pela data ('data_entrega', um valor de DAYS_JS) ou pelo
+    índice ('data_index'); padrão, o primeiro dia disponível.
+
+    Raises:
+        ValueError: Se 'data_entrega' não estiver entre os dias disponíveis ou
+            se 'data_index' não for um número inteiro
+    """
+    if data.get('data_entrega'):
+        for day in days:
+            if day['valor'] == data['data_entrega']:
+                logging.info("Data de entrega %s encontrada no índice %s", data['data_entrega'], day['indice'])
+                return day['indice']
+        # Outro dia entregaria o pedido em uma data que o cliente não escolheu
+        raise ValueError(f"Data de entrega {data['data_entrega']} não está entre os dias disponíveis")
+    if 'data_index' in data:
+        try:
+            # Vindo de JSON ou do n8n, o índice costuma chegar como texto ("1")
+            index = int(data['data_index'])
+        except (TypeError, ValueError):
+            raise ValueError(f"Índice de data inválido: {data['data_index']!r}")
+        logging.info("Selecionando data personalizada com índice: %s", index)
+        return index
+    logging.info("Usando data padrão (primeira disponível)")
+    return 0
 
 class LogzzFormFiller:
     """
     Classe para preencher o formulário do site Logzz.
     """
-    def __init__(self, browser):
+    def __init__(self, browser, url: Optional[str] = None, timeouts: Optional[Dict[str, float]] = None,
+                 locators: Optional[LocatorRegistry] = None, artifacts: Optional[ArtifactRecorder] = None,
+                 cep_cache: Optional[CepCache] = None, fast_fill: Optional[bool] = None):
         """
         Inicializa o preenchedor de formulário.
         
         Args:
-            browser: Instância da classe Browser
+            browser: Instância da classe Browser (ou um BrowserContext em um Chrome compartilhado)
+            url: URL do checkout da oferta; usa DEFAULT_URL se omitida
+            timeouts: Limites de espera que substituem os de DEFAULT_TIMEOUTS
+            locators: Registro de seletores; usa o registro compartilhado do processo se omitido
+            artifacts: Capturador de screenshots; usa a política configurada no ambiente se omitido
+            cep_cache: Cache de CEP -> endereço; usa o cache compartilhado do processo se omitido
+            fast_fill: Preenche os campos de cada etapa em uma única chamada JavaScript;
+                       usa LOGZZ_FAST_FILL se omitido
         """
         self.browser = browser
         self.driver = browser.driver
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.locators = locators or default_registry
+        self._default_artifacts = artifacts is None
+        self.artifacts = artifacts or default_recorder()
+        self.cep_cache = cep_cache or default_cep_cache()
+        self.fast_fill = config.FAST_FILL if fast_fill is None else fast_fill
+        # Estratégia de seletor que encontrou cada campo no último preenchimento
+        self.strategies = {}
         #self.url = "https://entrega.logzz.com.br/pay/oferta-padrao"
-        self.url = "https://entrega.logzz.com.br/pay/QYSLBC/ohcky-1-unidade-escova-alisadora"
+        self.url = url or DEFAULT_URL
+        # Progresso do último pedido executado por fill_all
+        self.progress = None
+        # Dias de entrega oferecidos na etapa de agendamento e o dia escolhido
+        self.days: List[Dict[str, Any]] = []
+        self.selected_day: Optional[Dict[str, Any]] = None
+        # Motivo da última falha de etapa, para o resultado do pedido
+        self.failure_reason: Optional[str] = None
+
+    def _fail(self, message: str, *args):
+        """
+        Registra no log uma falha que interrompe a etapa e a guarda como motivo da falha.
+        """
+        logging.error(message, *args)
+        self.failure_reason = message % args if args else message
+
+    def current_stage(self) -> int:
+        """
+        Identifica, sem esperar, em que etapa a página está.
+        
+        Returns:
+            int: 3 (agendamento), 2 (endereço) ou 1 (informações)
+        """
+        for stage in (3, 2):
+            if self.driver.find_elements(By.XPATH, f"//*[contains(text(), '{STAGE_TITLES[stage]}')]"):
+                return stage
+        return 1
+
+    def order_confirmed(self) -> bool:
+        """
+        Verifica, sem esperar e sem reenviar nada, se a página já mostra o pedido confirmado.
+        """
+        return bool(self.driver.find_elements(By.XPATH, COMPLETION_XPATH))
+
+    def available_days(self) -> List[Dict[str, Any]]:
+        """
+        Lê os dias de entrega da etapa de agendamento (índice, id, valor da data e rótulo).
+        
+        Returns:
+            list: Dias na ordem da página (vazia se os cards ainda não apareceram)
+        """
+        try:
+            return self.driver.execute_script(DAYS_JS) or []
+        except WebDriverException as e:
+            logging.warning("Não foi possível ler os dias de entrega: %s", e)
+            return []
+
+    def _find(self, field: str, **params):
+        """
+        Localiza um campo testando todos os seletores registrados de uma só vez.
+        
+        Args:
+            field: Nome do campo no registro de seletores
+            **params: Valores para os marcadores dos seletores (ex.: index=0)
+            
+        Returns:
+            WebElement: Elemento encontrado
+            
+        Raises:
+            TimeoutException: Se nenhum seletor encontrar o campo a tempo
+        """
+        element, strategy = self.locators.find(self.driver, field, self.timeouts["element"], **params)
+        self.strategies[field] = strategy
+        return element
+
+    def _type_field(self, field: str, value: str) -> bool:
+        """
+        Preenche um campo tecla a tecla (send_keys); o CEP recebe Tab para acionar a busca.
+        
+        Returns:
+            bool: True se o campo foi encontrado e preenchido
+        """
+        try:
+            element = self._find(field)
+        except (TimeoutException, NoSuchElementException) as e:
+            logging.warning("Campo '%s' não encontrado: %s", field, e)
+            return False
+        element.clear()
+        element.send_keys(value)
+        if field == "cep":
+            element.send_keys(Keys.TAB)
+        return True
+
+    def _fill_fields(self, pairs) -> Dict[str, bool]:
+        """
+        Preenche vários campos com uma única chamada JavaScript; os campos que
+        recusarem o valor programático são preenchidos tecla a tecla.
+        
+        Args:
+            pairs: Pares (campo, valor) na ordem de preenchimento
+            
+        Returns:
+            dict: Por campo, True se ficou preenchido
+        """
+        filled = {}
+        for field, (ok, strategy) in fill_fields(self.driver, self.locators, pairs).items():
+            if strategy:
+                self.strategies[field] = strategy
+            filled[field] = ok
+        for field, value in pairs:
+            if not filled[field]:
+                logging.info("Campo '%s' não aceitou o preenchimento rápido, digitando", field)
+                filled[field] = self._type_field(field, value)
+        return filled
+
+    def _fill_address_fast(self, endereco: Dict[str, str]) -> bool:
+        """
+        Preenche a etapa de endereço com duas chamadas JavaScript: CEP (e o endereço,
+        se já conhecido) e, depois da busca de CEP do site, número e complementos.
+        
+        Args:
+            endereco: Dados do endereço do pedido
+            
+        Returns:
+            bool: False se o campo de CEP não pôde ser preenchido
+        """
+        if endereco.get('logradouro') and endereco.get('bairro'):
+            known_address = {"logradouro": endereco['logradouro'], "bairro": endereco['bairro']}
+        else:
+            known_address = self.cep_cache.get_address(endereco['cep'])
+        
+        pairs = [("cep", endereco['cep'])]
+        if known_address:
+            pairs += [("street", known_address['logradouro']), ("neighborhood", known_address['bairro'])]
+        logging.info("Preenchimento rápido do CEP %s%s", endereco['cep'], " e do endereço conhecido" if known_address else "")
+        with span("stage_two.fast_fill"):
+            filled = self._fill_fields(pairs)
+        if not filled["cep"]:
+            self._fail("Não foi possível preencher o campo de CEP")
+            self.artifacts.screenshot("erro_campo_cep_nao_encontrado", self.driver, failure=True)
+            return False
+        if known_address and filled["street"] and filled["neighborhood"]:
+            # O evento change do CEP dispara a busca do site, cuja resposta pode chegar
+            # depois e sobrescrever o endereço: esperamos por ela e conferimos de novo
+            with span("stage_two.network_idle"):
+                wait_network_idle(self.driver, self.timeouts["network_idle"])
+            with span("stage_two.fast_fill"):
+                filled = self._fill_fields(pairs[1:])
+        if not (known_address and filled["street"] and filled["neighborhood"]):
+            logging.info("Aguardando autopreenchimento dos campos de endereço")
+            self._wait_address_autofill(endereco['cep'])
+        self.artifacts.screenshot("apos_preencher_cep", self.driver)
+        
+        pairs = [("number", endereco['numero'])]
+        if endereco.get('complemento'):
+            pairs.append(("complement", endereco['complemento']))
+        if endereco.get('informacoes_adicionais'):
+            pairs.append(("additional_info", endereco['informacoes_adicionais']))
+        with span("stage_two.fast_fill"):
+            filled = self._fill_fields(pairs)
+        if not filled["number"]:
+            logging.error("Não foi possível preencher o campo de número")
+            self.artifacts.screenshot("erro_campo_numero_nao_encontrado", self.driver, failure=True)
+            # Continuamos mesmo sem o número, como no preenchimento tecla a tecla
+        for field, ok in filled.items():
+            if not ok and field != "number":
+                logging.warning("Não foi possível preencher o campo '%s'", field)
+        return True
+
+    def _fill_known_address(self, address: Dict[str, str]) -> bool:
+        """
+        Preenche logradouro e bairro diretamente, sem esperar a busca de CEP do site.
+        
+        Args:
+            address: Dicionário com 'logradouro' e 'bairro'
+            
+        Returns:
+            bool: True se os dois campos ficaram com os valores esperados
+        """
+        for field, key in (("street", "logradouro"), ("neighborhood", "bairro")):
+            try:
+                element = self._find(field)
+            except (TimeoutException, NoSuchElementException) as e:
+                logging.warning("Campo de endereço '%s' não encontrado: %s", field, e)
+                return False
+            if element.get_attribute("value") != address[key]:
+                element.clear()
+                element.send_keys(address[key])
+            if element.get_attribute("value") != address[key]:
+                logging.warning("Campo de endereço '%s' não aceitou o valor informado", field)
+                return False
+        return True
+
+    def _wait_address_autofill(self, cep: str):
+        """
+        Aguarda o site preencher o endereço a partir do CEP e guarda o resultado no cache.
         
+        Args:
+            cep: CEP digitado no formulário
+        """
+        xpaths = [
+            locator.value
+            for field in ("street", "neighborhood")
+            for locator in self.locators.locators[field]
+            if locator.by == By.XPATH
+        ]
+        with span("stage_two.cep_autofill"):
+            filled = wait_for_any_value(self.driver, xpaths, self.timeouts["cep_autofill"])
+            wait_network_idle(self.driver, self.timeouts["network_idle"])
+        if not filled:
+            return
+        logging.info("Endereço preenchido automaticamente pelo site")
+        try:
+            logradouro = self._find("street").get_attribute("value")
+            bairro = self._find("neighborhood").get_attribute("value")
+        except (TimeoutException, NoSuchElementException):
+            return
+        self.cep_cache.put_address(cep, logradouro, bairro)
+        
+    @timed_stage("stage_one")
     def fill_stage_one(self, data: Dict[str, Any]) -> bool:
         """
         Preenche a primeira etapa do formulário (nome e telefone).
@@ -36,75 +341,85 @@ class LogzzFormFiller:
         try:
             logging.info("Preenchendo a primeira etapa do formulário")
             
-            # Navegar para o site
-            logging.info(f"Acessando o site: {self.url}")
-            self.driver.get(self.url)
-            
-            # Aguardar carregamento completo da página
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Esperar um momento para o site carregar completamente
-            time.sleep(3)
-            
-            # Preencher nome - usando o seletor ID que é mais confiável
-            logging.info(f"Preenchendo nome: {data['nome']}")
-            name_field = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="order_name"]'))
-            )
-            name_field.clear()
-            name_field.send_keys(data["nome"])
-            logging.info("Campo de nome preenchido com sucesso")
-            
-            # Preencher telefone - usando o seletor XPath completo
-            logging.info(f"Preenchendo telefone: {data['telefone']}")
-            phone_field = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="information"]/div[2]/div/div[1]/div[2]/div/input'))
-            )
-            phone_field.clear()
-            phone_field.send_keys(data["telefone"])
-            logging.info("Campo de telefone preenchido com sucesso")
+            # Navegar para o site, a menos que a página já esteja carregada e limpa
+            install_network_tracker(self.driver)
+            with span("stage_one.page_load"):
+                if getattr(self.browser, "take_warm_page", None) and self.browser.take_warm_page(self.url, config.WARM_PAGE_MAX_AGE):
+                    logging.info("Reaproveitando a página do checkout já carregada")
+                else:
+                    logging.info("Acessando o site: %s", self.url)
+                    started = time.perf_counter()
+                    self.driver.get(self.url)
+                    page_loads = getattr(self.browser, "page_loads", 0)
+                    PAGE_LOAD_SECONDS.labels("subsequent" if page_loads else "first").observe(time.perf_counter() - started)
+                    self.browser.page_loads = page_loads + 1
+                
+                # Aguardar carregamento completo da página
+                WebDriverWait(self.driver, self.timeouts["page_load"]).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                
+                # Aguardar o documento e as requisições iniciais do site terminarem
+                wait_document_ready(self.driver, self.timeouts["page_load"])
+            with span("stage_one.network_idle"):
+                wait_network_idle(self.driver, self.timeouts["network_idle"])
+            
+            if self.fast_fill:
+                logging.info("Preenchendo nome e telefone: %s, %s", data['nome'], data['telefone'])
+                with span("stage_one.fast_fill"):
+                    filled = self._fill_fields([("name", data["nome"]), ("phone", data["telefone"])])
+                if not all(filled.values()):
+                    raise TimeoutException(f"Campos não preenchidos: {[f for f, ok in filled.items() if not ok]}")
+            else:
+                # Preencher nome - usando o seletor ID que é mais confiável
+                logging.info("Preenchendo nome: %s", data['nome'])
+                name_field = self._find("name")
+                name_field.clear()
+                name_field.send_keys(data["nome"])
+                logging.info("Campo de nome preenchido com sucesso")
+                
+                # Preencher telefone - usando o seletor XPath completo
+                logging.info("Preenchendo telefone: %s", data['telefone'])
+                phone_field = self._find("phone")
+                phone_field.clear()
+                phone_field.send_keys(data["telefone"])
+                logging.info("Campo de telefone preenchido com sucesso")
             
             # Tirar screenshot para verificação
-            logging.info("Capturando screenshot após preenchimento dos campos")
-            self.driver.save_screenshot("form_preenchido.png")
+            self.artifacts.screenshot("form_preenchido", self.driver)
             
             # Clicar no botão continuar - usando o seletor XPath fornecido
             logging.info("Clicando no botão continuar")
-            continue_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="information"]/div[2]/div/div[2]/button'))
-            )
+            continue_button = self._find("continue_information")
             continue_button.click()
             logging.info("Botão de continuar clicado")
             
-            # Aguardar carregamento da próxima etapa
-            time.sleep(3)
-            
             # Verificar se avançou para a próxima etapa (verificando se elementos da etapa 2 estão presentes)
             try:
                 # Verificar se há um elemento que indica a próxima etapa (como o título "Endereço e entrega")
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Endereço e entrega')]"))
-                )
+                with span("stage_one.transition"):
+                    WebDriverWait(self.driver, self.timeouts["stage_transition"]).until(
+                        EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Endereço e entrega')]"))
+                    )
                 is_success = True
                 logging.info("Primeira etapa preenchida com sucesso - Passou para a etapa de endereço")
                 # Tirar screenshot para verificar que avançou
-                self.driver.save_screenshot("etapa2_carregada.png")
+                self.artifacts.screenshot("etapa2_carregada", self.driver)
             except (TimeoutException, NoSuchElementException) as e:
                 is_success = False
-                logging.error(f"Falha ao preencher a primeira etapa: {str(e)}")
+                self._fail("Falha ao preencher a primeira etapa: %s", e)
                 # Capturar screenshot em caso de erro
-                self.driver.save_screenshot("erro_etapa1.png")
+                self.artifacts.screenshot("erro_etapa1", self.driver, failure=True)
                 
             return is_success
             
         except Exception as e:
-            logging.error(f"Erro ao preencher a primeira etapa: {str(e)}")
+            self._fail("Erro ao preencher a primeira etapa: %s", e)
             # Capturar screenshot em caso de erro
-            self.driver.save_screenshot("erro_etapa1.png")
+            self.artifacts.screenshot("erro_etapa1", self.driver, failure=True)
             return False
     
+    @timed_stage("stage_two")
     def fill_stage_two(self, data: Dict[str, Any]) -> bool:
         """
         Preenche a segunda etapa do formulário (endereço).
@@ -120,185 +435,151 @@ class LogzzFormFiller:
             
             # Verificar se estamos na etapa correta
             try:
-                address_title = WebDriverWait(self.driver, 10).until(
+                address_title = WebDriverWait(self.driver, self.timeouts["stage_check"]).until(
                     EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Endereço e entrega')]"))
                 )
                 logging.info("Etapa de endereço carregada, prosseguindo com o preenchimento")
             except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não estamos na etapa de endereço: {str(e)}")
+                self._fail("Não estamos na etapa de endereço: %s", e)
                 return False
             
             # Capturar screenshot antes de começar o preenchimento
-            self.driver.save_screenshot("antes_preenchimento_endereco.png")
+            self.artifacts.screenshot("antes_preenchimento_endereco", self.driver)
             
-            # Aguardar para garantir que os elementos estão visíveis
-            time.sleep(2)
+            # Aguardar as requisições da transição de etapa terminarem
+            with span("stage_two.network_idle"):
+                wait_network_idle(self.driver, self.timeouts["network_idle"])
             
             # Capturar o HTML da página atual para depuração
-            page_source = self.driver.page_source
-            with open("endereco_page_source.html", "w", encoding="utf-8") as f:
-                f.write(page_source)
-            logging.info("Código fonte da página salvo para depuração")
+            self.artifacts.page_source("endereco_page_source", self.driver)
             
             # Não vamos mais procurar ou clicar no botão "Editar", pois isso nos levaria de volta à primeira etapa
             logging.info("Iniciando o preenchimento direto dos campos de endereço")
             
-            # Tentar encontrar o campo de CEP com múltiplas abordagens
-            logging.info(f"Tentando encontrar e preencher o campo de CEP: {data['endereco']['cep']}")
-            try:
-                # Tentar encontrar o campo de CEP com o XPath específico fornecido
-                logging.info("Tentando encontrar o campo de CEP com XPath específico")
-                cep_field = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="order_zipcode"]'))
-                )
-                logging.info("Campo de CEP encontrado com XPath específico")
-            except (TimeoutException, NoSuchElementException) as e:
-                logging.warning(f"Não foi possível encontrar o campo de CEP com XPath específico: {str(e)}")
+            if self.fast_fill:
+                if not self._fill_address_fast(data['endereco']):
+                    return False
+            else:
+                # Encontrar o campo de CEP testando todos os seletores conhecidos
+                logging.info("Tentando encontrar e preencher o campo de CEP: %s", data['endereco']['cep'])
                 try:
-                    # Tentar encontrar o campo de CEP de outras formas
-                    logging.info("Tentando encontrar o campo de CEP por ID 'cep'")
-                    cep_field = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.ID, "cep"))
-                    )
-                    logging.info("Campo de CEP encontrado por ID")
+                    cep_field = self._find("cep")
+                    logging.info("Campo de CEP encontrado (seletor: %s)", self.strategies['cep'])
                 except (TimeoutException, NoSuchElementException) as e:
-                    logging.warning(f"Não foi possível encontrar o campo de CEP por ID: {str(e)}")
-                    try:
-                        logging.info("Tentando encontrar o campo de CEP por placeholder")
-                        cep_field = WebDriverWait(self.driver, 10).until(
-                            EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='CEP']"))
-                        )
-                        logging.info("Campo de CEP encontrado por placeholder")
-                    except (TimeoutException, NoSuchElementException) as e:
-                        logging.error(f"Não foi possível encontrar o campo de CEP: {str(e)}")
-                        self.driver.save_screenshot("erro_campo_cep_nao_encontrado.png")
-                        return False
-            
-            # Limpar e preencher o campo de CEP
-            cep_field.click()
-            cep_field.clear()
-            cep_field.send_keys(data['endereco']['cep'])
-            # Pressionar Tab para sair do campo e acionar busca de CEP
-            cep_field.send_keys(Keys.TAB)
-            logging.info("Campo CEP preenchido e Tab pressionado")
-            
-            # Aguardar o autopreenchimento dos campos de endereço
-            logging.info("Aguardando autopreenchimento dos campos de endereço")
-            time.sleep(5)
-            self.driver.save_screenshot("apos_preencher_cep.png")
+                    self._fail("Não foi possível encontrar o campo de CEP: %s", e)
+                    self.artifacts.screenshot("erro_campo_cep_nao_encontrado", self.driver, failure=True)
+                    return False
             
-            # Preencher número usando o XPath específico fornecido
-            logging.info(f"Tentando preencher o campo de número: {data['endereco']['numero']}")
-            try:
-                number_field = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="address"]/div[2]/div/div[4]/div[1]/input'))
-                )
-                logging.info("Campo de número encontrado")
-                number_field.clear()
-                number_field.send_keys(data['endereco']['numero'])
-                logging.info("Campo número preenchido")
-            except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não foi possível encontrar o campo de número: {str(e)}")
-                self.driver.save_screenshot("erro_campo_numero_nao_encontrado.png")
-                
-                # Tentar outras abordagens para encontrar o campo de número
+                # Limpar e preencher o campo de CEP
+                cep_field.click()
+                cep_field.clear()
+                cep_field.send_keys(data['endereco']['cep'])
+                # Pressionar Tab para sair do campo e acionar busca de CEP
+                cep_field.send_keys(Keys.TAB)
+                logging.info("Campo CEP preenchido e Tab pressionado")
+            
+                # Com o endereço já conhecido (informado no pedido ou em cache), preenchemos
+                # logradouro e bairro diretamente; só esperamos a busca do site quando não há
+                endereco = data['endereco']
+                if endereco.get('logradouro') and endereco.get('bairro'):
+                    known_address = {"logradouro": endereco['logradouro'], "bairro": endereco['bairro']}
+                else:
+                    known_address = self.cep_cache.get_address(endereco['cep'])
+            
+                filled_directly = False
+                if known_address:
+                    logging.info("Endereço conhecido, preenchendo depois da busca de CEP do site")
+                    # O Tab já disparou a busca: se a resposta chegasse depois do preenchimento
+                    # direto, sobrescreveria o endereço já conferido
+                    with span("stage_two.network_idle"):
+                        wait_network_idle(self.driver, self.timeouts["network_idle"])
+                    with span("stage_two.address_direct"):
+                        filled_directly = self._fill_known_address(known_address)
+                if not filled_directly:
+                    logging.info("Aguardando autopreenchimento dos campos de endereço")
+                    self._wait_address_autofill(endereco['cep'])
+                self.artifacts.screenshot("apos_preencher_cep", self.driver)
+            
+                # Preencher número
+                logging.info("Tentando preencher o campo de número: %s", data['endereco']['numero'])
                 try:
-                    logging.info("Tentando encontrar o campo de número por ID ou placeholder")
-                    number_field = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//input[@placeholder='Número' or @id='number']"))
-                    )
+                    number_field = self._find("number")
+                    logging.info("Campo de número encontrado (seletor: %s)", self.strategies['number'])
                     number_field.clear()
                     number_field.send_keys(data['endereco']['numero'])
-                    logging.info("Campo número preenchido com abordagem alternativa")
+                    logging.info("Campo número preenchido")
                 except (TimeoutException, NoSuchElementException) as e:
-                    logging.error(f"Todas as tentativas de encontrar o campo de número falharam: {str(e)}")
+                    logging.error("Todas as tentativas de encontrar o campo de número falharam: %s", e)
+                    self.artifacts.screenshot("erro_campo_numero_nao_encontrado", self.driver, failure=True)
                     # Continuamos mesmo sem preencher o número, para tentar avançar o máximo possível
             
-            # Preencher complemento (se fornecido) usando o XPath específico fornecido
-            if 'complemento' in data['endereco'] and data['endereco']['complemento']:
-                logging.info(f"Tentando preencher o campo de complemento: {data['endereco']['complemento']}")
-                try:
-                    complement_field = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, '//*[@id="order_address_complement"]'))
-                    )
-                    complement_field.clear()
-                    complement_field.send_keys(data['endereco']['complemento'])
-                    logging.info("Campo complemento preenchido")
-                except (TimeoutException, NoSuchElementException) as e:
-                    logging.warning(f"Não foi possível encontrar o campo de complemento: {str(e)}")
-                    # Não é crítico, continuamos sem o complemento
+                # Preencher complemento (se fornecido)
+                if 'complemento' in data['endereco'] and data['endereco']['complemento']:
+                    logging.info("Tentando preencher o campo de complemento: %s", data['endereco']['complemento'])
+                    try:
+                        complement_field = self._find("complement")
+                        complement_field.clear()
+                        complement_field.send_keys(data['endereco']['complemento'])
+                        logging.info("Campo complemento preenchido")
+                    except (TimeoutException, NoSuchElementException) as e:
+                        logging.warning("Não foi possível encontrar o campo de complemento: %s", e)
+                        # Não é crítico, continuamos sem o complemento
             
-            # Preencher informações adicionais (se fornecido) usando o XPath específico fornecido
-            if 'informacoes_adicionais' in data['endereco'] and data['endereco']['informacoes_adicionais']:
-                logging.info(f"Tentando preencher o campo de informações adicionais: {data['endereco']['informacoes_adicionais']}")
-                try:
-                    additional_info_field = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, '//*[@id="address"]/div[2]/div/div[5]/div/textarea'))
-                    )
-                    additional_info_field.clear()
-                    additional_info_field.send_keys(data['endereco']['informacoes_adicionais'])
-                    logging.info("Campo informações adicionais preenchido")
-                except (TimeoutException, NoSuchElementException) as e:
-                    logging.warning(f"Não foi possível encontrar o campo de informações adicionais: {str(e)}")
-                    # Não é crítico, continuamos sem as informações adicionais
+                # Preencher informações adicionais (se fornecido)
+                if 'informacoes_adicionais' in data['endereco'] and data['endereco']['informacoes_adicionais']:
+                    logging.info("Tentando preencher o campo de informações adicionais: %s", data['endereco']['informacoes_adicionais'])
+                    try:
+                        additional_info_field = self._find("additional_info")
+                        additional_info_field.clear()
+                        additional_info_field.send_keys(data['endereco']['informacoes_adicionais'])
+                        logging.info("Campo informações adicionais preenchido")
+                    except (TimeoutException, NoSuchElementException) as e:
+                        logging.warning("Não foi possível encontrar o campo de informações adicionais: %s", e)
+                        # Não é crítico, continuamos sem as informações adicionais
             
             # Capturar screenshot após preenchimento
-            logging.info("Capturando screenshot após preenchimento do endereço")
-            self.driver.save_screenshot("endereco_preenchido.png")
+            self.artifacts.screenshot("endereco_preenchido", self.driver)
             
-            # Clicar no botão confirmar endereço usando o XPath específico fornecido
+            # Clicar no botão confirmar endereço
             logging.info("Tentando clicar no botão confirmar endereço")
             try:
-                continue_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="address"]/div[2]/div/div[7]/button'))
-                )
-                logging.info("Botão confirmar endereço encontrado")
+                continue_button = self._find("confirm_address")
+                logging.info("Botão confirmar endereço encontrado (seletor: %s)", self.strategies['confirm_address'])
                 continue_button.click()
                 logging.info("Botão de confirmar endereço clicado")
             except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não foi possível encontrar o botão de confirmar endereço: {str(e)}")
-                self.driver.save_screenshot("erro_botao_confirmar_nao_encontrado.png")
-                
-                # Tentar outras abordagens para encontrar o botão
-                try:
-                    logging.info("Tentando encontrar o botão por texto 'Continuar' ou 'Salvar'")
-                    continue_button = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continuar') or contains(text(), 'Salvar') or contains(text(), 'Próximo')]"))
-                    )
-                    continue_button.click()
-                    logging.info("Botão alternativo encontrado e clicado")
-                except (TimeoutException, NoSuchElementException) as e:
-                    logging.error(f"Todas as tentativas de encontrar o botão falharam: {str(e)}")
-                    return False
+                self._fail("Todas as tentativas de encontrar o botão falharam: %s", e)
+                self.artifacts.screenshot("erro_botao_confirmar_nao_encontrado", self.driver, failure=True)
+                return False
             
-            # Aguardar carregamento da próxima etapa
-            time.sleep(4)
-            self.driver.save_screenshot("apos_clicar_confirmar.png")
+            self.artifacts.screenshot("apos_clicar_confirmar", self.driver)
             
             # Verificar se avançou para a próxima etapa (etapa 3 - escolha do dia para receber o entregador)
             try:
                 # Verificar se há um elemento que indica a próxima etapa
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Escolha o dia para receber o entregador')]"))
-                )
+                with span("stage_two.transition"):
+                    WebDriverWait(self.driver, self.timeouts["stage_transition"]).until(
+                        EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Escolha o dia para receber o entregador')]"))
+                    )
                 is_success = True
                 logging.info("Segunda etapa preenchida com sucesso - Passou para a etapa de escolha da data")
                 # Tirar screenshot para verificar que avançou
-                self.driver.save_screenshot("etapa3_carregada.png")
+                self.artifacts.screenshot("etapa3_carregada", self.driver)
             except (TimeoutException, NoSuchElementException) as e:
                 is_success = False
-                logging.error(f"Falha ao preencher a segunda etapa: {str(e)}")
+                self._fail("Falha ao preencher a segunda etapa: %s", e)
                 # Capturar screenshot em caso de erro
-                self.driver.save_screenshot("erro_etapa2.png")
+                self.artifacts.screenshot("erro_etapa2", self.driver, failure=True)
                 
             return is_success
             
         except Exception as e:
-            logging.error(f"Erro ao preencher a segunda etapa: {str(e)}")
+            self._fail("Erro ao preencher a segunda etapa: %s", e)
             # Capturar screenshot em caso de erro
-            self.driver.save_screenshot("erro_etapa2.png")
+            self.artifacts.screenshot("erro_etapa2", self.driver, failure=True)
             return False
 
+    @timed_stage("stage_three")
     def fill_stage_three(self, data: Dict[str, Any]) -> bool:
         """
         Preenche a terceira etapa do formulário (escolha da data de entrega).
@@ -314,91 +595,69 @@ class LogzzFormFiller:
             
             # Verificar se estamos na etapa correta
             try:
-                scheduling_title = WebDriverWait(self.driver, 10).until(
+                scheduling_title = WebDriverWait(self.driver, self.timeouts["stage_check"]).until(
                     EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Escolha o dia para receber o entregador')]"))
                 )
                 logging.info("Etapa de escolha da data carregada, prosseguindo com o preenchimento")
             except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não estamos na etapa de escolha da data: {str(e)}")
+                self._fail("Não estamos na etapa de escolha da data: %s", e)
                 return False
             
             # Capturar screenshot antes de começar a seleção
-            self.driver.save_screenshot("antes_selecao_data.png")
+            self.artifacts.screenshot("antes_selecao_data", self.driver)
             
-            # Aguardar para garantir que os elementos estão visíveis
-            time.sleep(2)
+            # Aguardar as requisições que carregam os dias disponíveis
+            with span("stage_three.network_idle"):
+                wait_network_idle(self.driver, self.timeouts["network_idle"])
             
-            # Determinar qual data selecionar (padrão: primeira data disponível, ou personalizada se especificada)
-            date_index = 0  # valor padrão: primeira data (index 0)
-            if 'data_index' in data:
-                date_index = data['data_index']
-                logging.info(f"Selecionando data personalizada com índice: {date_index}")
-            else:
-                logging.info("Usando data padrão (primeira disponível)")
+            # Ler os dias oferecidos e determinar qual selecionar
+            self.days = self.available_days()
+            logging.info("%s dias de entrega disponíveis", len(self.days))
+            try:
+                date_index = choose_day_index(self.days, data)
+            except ValueError as e:
+                self._fail("%s", e)
+                return False
             
-            # Tentar selecionar a data com o índice especificado
+            # Selecionar a data pelo radio button ou, como alternativa, pelo card inteiro
             try:
-                date_id = f"day-{date_index}"
-                logging.info(f"Tentando selecionar a data com ID: {date_id}")
-                
-                # Clicar no input radio button
-                date_radio = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, date_id))
-                )
-                date_radio.click()
-                logging.info(f"Data selecionada: {date_id}")
+                logging.info("Tentando selecionar a data com índice: %s", date_index)
+                date_element = self._find("day", index=date_index)
+                date_element.click()
+                logging.info("Data selecionada (seletor: %s)", self.strategies['day'])
                 
                 # Capturar o valor da data selecionada para o log
-                date_value = date_radio.get_attribute("value")
-                logging.info(f"Valor da data selecionada: {date_value}")
+                date_value = date_element.get_attribute("value")
+                logging.info("Valor da data selecionada: %s", date_value)
+                self.selected_day = next(
+                    (day for day in self.days if day['indice'] == date_index),
+                    {"indice": date_index, "valor": date_value},
+                )
                 
                 # Tirar screenshot após a seleção da data
-                self.driver.save_screenshot("data_selecionada.png")
+                self.artifacts.screenshot("data_selecionada", self.driver)
             except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não foi possível selecionar a data com ID {date_id}: {str(e)}")
-                
-                # Tentar uma abordagem alternativa - clicar no card inteiro
-                try:
-                    logging.info(f"Tentando abordagem alternativa: clicando no card da data")
-                    date_card = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, f"//div[contains(@class, 'card-day-{date_index}')]"))
-                    )
-                    date_card.click()
-                    logging.info("Card da data clicado com sucesso")
-                    self.driver.save_screenshot("data_selecionada_alternativa.png")
-                except (TimeoutException, NoSuchElementException) as e:
-                    logging.error(f"Todas as tentativas de selecionar a data falharam: {str(e)}")
-                    self.driver.save_screenshot("erro_selecao_data.png")
-                    return False
+                self._fail("Todas as tentativas de selecionar a data falharam: %s", e)
+                self.artifacts.screenshot("erro_selecao_data", self.driver, failure=True)
+                return False
             
             # Clicar no botão de confirmação da data
             logging.info("Tentando clicar no botão de confirmação de data")
             try:
-                confirm_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="scheduling"]/div[2]/div/div[3]/button'))
-                )
-                logging.info("Botão de confirmação de data encontrado")
+                confirm_button = self._find("confirm_day")
+                logging.info("Botão de confirmação de data encontrado (seletor: %s)", self.strategies['confirm_day'])
+                # O clique pode chegar ao site mesmo se o driver acusar erro: daqui em
+                # diante a etapa não é refeita, só conferida (ver stages.run_stages)
+                if self.progress is not None:
+                    self.progress.commit("scheduling")
                 confirm_button.click()
                 logging.info("Botão de confirmação de data clicado")
             except (TimeoutException, NoSuchElementException) as e:
-                logging.error(f"Não foi possível encontrar o botão de confirmação de data: {str(e)}")
-                self.driver.save_screenshot("erro_botao_confirmar_data_nao_encontrado.png")
-                
-                # Tentar abordagens alternativas para encontrar o botão
-                try:
-                    logging.info("Tentando encontrar o botão por texto")
-                    confirm_button = WebDriverWait(self.driver, 10).until(
-                        EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Finalizar') or contains(text(), 'Continuar') or contains(text(), 'Próximo')]"))
-                    )
-                    confirm_button.click()
-                    logging.info("Botão alternativo encontrado e clicado")
-                except (TimeoutException, NoSuchElementException) as e:
-                    logging.error(f"Todas as tentativas de encontrar o botão falharam: {str(e)}")
-                    return False
+                self._fail("Todas as tentativas de encontrar o botão falharam: %s", e)
+                self.artifacts.screenshot("erro_botao_confirmar_data_nao_encontrado", self.driver, failure=True)
+                return False
             
-            # Aguardar carregamento da próxima etapa
-            time.sleep(4)
-            self.driver.save_screenshot("apos_confirmar_data.png")
+            self.artifacts.screenshot("apos_confirmar_data", self.driver)
             
             # Verificar se avançou para a próxima etapa ou se concluiu o processo
             # Uma vez que não conhecemos detalhes exatos do site após essa etapa,
@@ -406,30 +665,116 @@ class LogzzFormFiller:
             try:
                 # Verificar primeiro por um possível sucesso/conclusão
                 try:
-                    success_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'sucesso') or contains(text(), 'confirmad') or contains(text(), 'Pagamento')]"))
+                    success_element = WebDriverWait(self.driver, self.timeouts["completion"]).until(
+                        EC.presence_of_element_located((By.XPATH, COMPLETION_XPATH))
                     )
                     is_success = True
                     logging.info("Terceira etapa preenchida com sucesso - Processo concluído ou passou para etapa de pagamento")
-                    self.driver.save_screenshot("processo_concluido.png")
+                    self.artifacts.screenshot("processo_concluido", self.driver)
                 except (TimeoutException, NoSuchElementException):
                     # Se não encontrou confirmação de sucesso, verificar se foi para outra etapa
-                    next_step_element = WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Pagamento') or contains(text(), 'Cartão') or contains(text(), 'Finalizar')]"))
+                    next_step_element = WebDriverWait(self.driver, self.timeouts["completion"]).until(
+                        EC.presence_of_element_located((By.XPATH, "//*[contains(text(), 'Pagamento') or contains(text(), 'Cartão')]"))
                     )
                     is_success = True
                     logging.info("Terceira etapa preenchida com sucesso - Passou para a próxima etapa")
-                    self.driver.save_screenshot("proxima_etapa_carregada.png")
+                    self.artifacts.screenshot("proxima_etapa_carregada", self.driver)
             except (TimeoutException, NoSuchElementException) as e:
                 is_success = False
-                logging.error(f"Falha ao verificar conclusão da terceira etapa: {str(e)}")
+                self._fail("Falha ao verificar conclusão da terceira etapa: %s", e)
                 # Capturar screenshot em caso de erro
-                self.driver.save_screenshot("erro_verificacao_etapa3.png")
+                self.artifacts.screenshot("erro_verificacao_etapa3", self.driver, failure=True)
             
             return is_success
             
         except Exception as e:
-            logging.error(f"Erro ao preencher a terceira etapa: {str(e)}")
+            self._fail("Erro ao preencher a terceira etapa: %s", e)
             # Capturar screenshot em caso de erro
-            self.driver.save_screenshot("erro_etapa3.png")
+            self.artifacts.screenshot("erro_etapa3", self.driver, failure=True)
             return False
+
+    @timed_stage("order")
+    def fill_all(self, data: Dict[str, Any], retry_policy: Optional[RetryPolicy] = None,
+                 progress: Optional[OrderProgress] = None) -> OrderResult:
+        """
+        Executa as três etapas do formulário em sequência.
+        
+        Se uma etapa falhar, apenas ela é tentada de novo na mesma sessão, conforme
+        a política de novas tentativas; o pedido não volta à primeira etapa.
+        
+        Args:
+            data: Dicionário contendo os dados do cliente
+            retry_policy: Política de novas tentativas; usa a configuração do ambiente se omitida
+            progress: Onde registrar o progresso do pedido; fica disponível em self.progress
+            
+        Returns:
+            OrderResult: Resultado estruturado do pedido; verdadeiro se as três etapas foram concluídas
+        """
+        self.progress = progress or OrderProgress()
+        self.failure_reason = None
+        stage_functions = {
+            "information": lambda: self.fill_stage_one(data),
+            "address": lambda: self.fill_stage_two(data),
+            "scheduling": lambda: self.fill_stage_three(data),
+        }
+        success = run_stages(stage_functions, self.current_stage, retry_policy, self.progress,
+                             confirmed=self.order_confirmed)
+        return OrderResult.from_filler(self, success)
+
+    @timed_stage("quote")
+    def quote(self, data: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Executa as etapas de informações e endereço e lê os dias de entrega, sem escolher nenhum.
+        
+        Args:
+            data: Dicionário contendo os dados do cliente e o endereço
+            
+        Returns:
+            list: Dias de entrega disponíveis, ou None se as duas etapas não foram concluídas
+        """
+        self.progress = OrderProgress()
+        self.failure_reason = None
+        if not (run_once(self.progress, "information", lambda: self.fill_stage_one(data))
+                and run_once(self.progress, "address", lambda: self.fill_stage_two(data))):
+            return None
+        with span("quote.days"):
+            wait_network_idle(self.driver, self.timeouts["network_idle"])
+            try:
+                self.days = WebDriverWait(self.driver, self.timeouts["element"], poll_frequency=0.1).until(
+                    lambda d: self.available_days()
+                )
+            except TimeoutException:
+                logging.warning("Nenhum dia de entrega apareceu em %ss", self.timeouts['element'])
+                self.days = []
+        return self.days
+
+    def reset_for_next_order(self):
+        """
+        Prepara a mesma sessão para o próximo pedido.
+        
+        Limpa cookies e armazenamento do site e recarrega o checkout aproveitando
+        o cache do navegador, em vez de abrir uma sessão nova.
+        """
+        logging.info("Preparando a sessão para o próximo pedido")
+        self.browser.reset_session(url=self.url)
+        self.strategies = {}
+        self.days = []
+        self.selected_day = None
+        self.failure_reason = None
+        if self._default_artifacts:
+            self.artifacts = default_recorder()
+
+    def fill_many(self, orders: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], OrderResult]]:
+        """
+        Processa vários pedidos em sequência na mesma sessão do navegador.
+        
+        Args:
+            orders: Dados dos clientes, um por pedido
+            
+        Yields:
+            tuple: Dados do cliente e o resultado do pedido (OrderResult)
+        """
+        for index, data in enumerate(orders):
+            if index:
+                self.reset_for_next_order()
+            yield data, self.fill_all(data)
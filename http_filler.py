@@ -0,0 +1,292 @@
+"""
+Envio do checkout da Logzz por HTTP direto, sem navegador.
+
+Reproduz as requisições que o formulário faz em cada etapa (informações,
+endereço e agendamento), incluindo o token CSRF e o cookie de sessão. Quando a
+resposta do site não tem o formato esperado, levanta FlowChangedError para que
+o chamador volte ao preenchimento pelo Selenium, desde que nenhuma etapa tenha
+sido aceita ainda.
+"""
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from form_filler import choose_day_index
+from metrics import timed_stage
+from results import OrderResult
+
+# Caminhos (relativos à URL da oferta) das requisições de cada etapa
+DEFAULT_ENDPOINTS = {
+    "information": "information",
+    "address": "address",
+    "scheduling": "scheduling",
+}
+
+CSRF_PATTERNS = [
+    re.compile(r'<meta\s+name="csrf-token"\s+content="([^"]+)"'),
+    re.compile(r'<input[^>]+name="_token"[^>]+value="([^"]+)"'),
+    re.compile(r'<input[^>]+name="authenticity_token"[^>]+value="([^"]+)"'),
+]
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def shared_adapter() -> HTTPAdapter:
+    """
+    Retorna o adaptador HTTP compartilhado pelo processo.
+
+    Cada pedido tem sua própria sessão (cookies e token), mas as conexões TCP/TLS
+    com o site são reaproveitadas entre pedidos através deste adaptador.
+    """
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        return _adapter
+
+
+class FlowChangedError(Exception):
+    """
+    O site respondeu de um jeito que o fluxo HTTP não reconhece.
+    """
+
+
+class LogzzHttpFiller:
+    """
+    Preenche o checkout da Logzz enviando diretamente as requisições de cada etapa.
+
+    Tem a mesma interface de LogzzFormFiller (fill_stage_one, fill_stage_two,
+    fill_stage_three e fill_all).
+    """
+    def __init__(self, url: str, endpoints: Optional[Dict[str, str]] = None, timeout: float = 15,
+                 on_commit: Optional[Callable[[str], None]] = None):
+        """
+        Inicializa o preenchedor HTTP.
+
+        Args:
+            url: URL da página de checkout da oferta
+            endpoints: Caminhos das etapas que substituem os de DEFAULT_ENDPOINTS
+            timeout: Tempo máximo de cada requisição, em segundos
+            on_commit: Função chamada com o nome da etapa antes do envio irreversível
+                       (ver OrderProgress.commit)
+        """
+        self.url = url.rstrip("/")
+        self.endpoints = {**DEFAULT_ENDPOINTS, **(endpoints or {})}
+        self.timeout = timeout
+        self.on_commit = on_commit
+        self.session = requests.Session()
+        self.session.mount("https://", shared_adapter())
+        self.session.mount("http://", shared_adapter())
+        self.session.headers.update({
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+            "Accept-Language": "pt-BR,pt;q=0.9",
+        })
+        self.csrf_token = None
+        # Dias de entrega disponíveis, retornados pela etapa de endereço, no formato de form_filler.DAYS_JS
+        self.days: List[Dict[str, Any]] = []
+        self.selected_day: Optional[Dict[str, Any]] = None
+        # Etapas que o site já aceitou: depois da primeira, o pedido não pode ser refeito do zero
+        self.accepted: List[str] = []
+        self.failure_reason: Optional[str] = None
+        # Etapa em andamento e duração de cada etapa, para o resultado do pedido
+        self.stage: Optional[str] = None
+        self.stage_seconds: Dict[str, float] = {}
+
+    def _post(self, step: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Envia os campos de uma etapa e retorna a resposta JSON.
+
+        Raises:
+            FlowChangedError: Se a resposta não for o JSON esperado
+        """
+        response = self.session.post(
+            f"{self.url}/{self.endpoints[step]}",
+            data={"_token": self.csrf_token, **fields},
+            headers={
+                "X-CSRF-TOKEN": self.csrf_token,
+                "X-Requested-With": "XMLHttpRequest",
+                "Accept": "application/json",
+                "Referer": self.url,
+            },
+            timeout=self.timeout,
+        )
+        if response.status_code in (404, 405, 419):
+            raise FlowChangedError(f"Etapa '{step}' respondeu {response.status_code}")
+        try:
+            body = response.json()
+        except ValueError:
+            raise FlowChangedError(f"Etapa '{step}' não respondeu JSON (status {response.status_code})")
+        if not isinstance(body, dict) or "success" not in body:
+            raise FlowChangedError(f"Resposta da etapa '{step}' sem o campo 'success'")
+        if body["success"]:
+            self.accepted.append(step)
+        else:
+            reason = body.get('message') or body.get('errors')
+            logging.error("Etapa '%s' recusada pelo site: %s", step, reason)
+            self.failure_reason = f"Etapa '{step}' recusada pelo site: {reason}"
+        return body
+
+    @timed_stage("http_stage_one")
+    def fill_stage_one(self, data: Dict[str, Any]) -> bool:
+        """
+        Abre a página da oferta (sessão e token CSRF) e envia nome e telefone.
+
+        Args:
+            data: Dicionário contendo os dados do cliente
+
+        Returns:
+            bool: True se o site aceitou a etapa
+        """
+        logging.info("Acessando o checkout por HTTP: %s", self.url)
+        response = self.session.get(self.url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise FlowChangedError(f"Página da oferta respondeu {response.status_code}")
+        for pattern in CSRF_PATTERNS:
+            match = pattern.search(response.text)
+            if match:
+                self.csrf_token = match.group(1)
+                break
+        else:
+            raise FlowChangedError("Token CSRF não encontrado na página da oferta")
+
+        body = self._post("information", {"order[name]": data["nome"], "order[phone]": data["telefone"]})
+        return bool(body["success"])
+
+    @timed_stage("http_stage_two")
+    def fill_stage_two(self, data: Dict[str, Any]) -> bool:
+        """
+        Envia o endereço e guarda os dias de entrega disponíveis.
+
+        Args:
+            data: Dicionário contendo os dados do endereço
+
+        Returns:
+            bool: True se o site aceitou a etapa
+        """
+        endereco = data["endereco"]
+        body = self._post("address", {
+            "order[zipcode]": endereco["cep"],
+            "order[address]": endereco.get("logradouro", ""),
+            "order[address_number]": endereco["numero"],
+            "order[address_complement]": endereco.get("complemento", ""),
+            "order[neighborhood]": endereco.get("bairro", ""),
+            "order[additional_information]": endereco.get("informacoes_adicionais", ""),
+        })
+        if not body["success"]:
+            return False
+        if not isinstance(body.get("days"), list):
+            raise FlowChangedError("Resposta da etapa de endereço sem a lista de dias")
+        self.days = [
+            {"indice": index, "id": day.get("id"), "valor": day.get("value"), "rotulo": day.get("label"),
+             "disponivel": True}
+            for index, day in enumerate(body["days"])
+        ]
+        logging.info("%s dias de entrega disponíveis", len(self.days))
+        return True
+
+    @timed_stage("http_stage_three")
+    def fill_stage_three(self, data: Dict[str, Any]) -> bool:
+        """
+        Escolhe o dia de entrega (ver form_filler.choose_day_index) e confirma.
+
+        Args:
+            data: Dicionário contendo os dados para escolha da data
+
+        Returns:
+            bool: True se o site aceitou a etapa
+        """
+        try:
+            date_index = choose_day_index(self.days, data)
+        except ValueError as e:
+            return self._refuse(str(e))
+        if not 0 <= date_index < len(self.days):
+            return self._refuse(f"Índice de data {date_index} indisponível ({len(self.days)} dias)")
+        self.selected_day = self.days[date_index]
+        logging.info("Selecionando data por HTTP: %s", self.selected_day['rotulo'] or self.selected_day['valor'])
+        if self.on_commit is not None:
+            self.on_commit("scheduling")
+        body = self._post("scheduling", {"order[delivery_date]": self.selected_day["valor"]})
+        return bool(body["success"])
+
+    def _refuse(self, reason: str) -> bool:
+        logging.error(reason)
+        self.failure_reason = reason
+        return False
+
+    def fill_all(self, data: Dict[str, Any]) -> OrderResult:
+        """
+        Executa as três etapas em sequência, parando na primeira recusa.
+
+        Returns:
+            OrderResult: Resultado do pedido; verdadeiro se as três etapas foram aceitas
+
+        Raises:
+            FlowChangedError: Se alguma resposta não tiver o formato esperado
+        """
+        stages = (("information", self.fill_stage_one), ("address", self.fill_stage_two),
+                  ("scheduling", self.fill_stage_three))
+        try:
+            for self.stage, fill in stages:
+                started = time.perf_counter()
+                try:
+                    success = fill(data)
+                finally:
+                    self.stage_seconds[self.stage] = round(time.perf_counter() - started, 3)
+                if not success:
+                    return self.result(False)
+            return self.result(True)
+        except requests.RequestException as e:
+            logging.error("Erro de rede no checkout por HTTP: %s", e)
+            self.failure_reason = f"Erro de rede no checkout por HTTP: {e}"
+            return self.result(False)
+
+    def result(self, success: bool) -> OrderResult:
+        """
+        Resultado do pedido até a etapa em andamento.
+        """
+        return OrderResult(
+            success=success,
+            stage_reached=self.stage,
+            failed_stage=None if success else self.stage,
+            stage_seconds=dict(self.stage_seconds),
+            days=list(self.days),
+            selected_day=self.selected_day,
+            failure_reason=None if success else self.failure_reason,
+        )
+
+
+def fill_with_fallback(data: Dict[str, Any], url: str, selenium_fill,
+                       endpoints: Optional[Dict[str, str]] = None,
+                       on_commit: Optional[Callable[[str], None]] = None) -> OrderResult:
+    """
+    Tenta o checkout por HTTP e, se o fluxo do site mudou, usa o Selenium.
+
+    O navegador refaz o pedido desde a primeira etapa, então só é usado se o
+    site ainda não aceitou nenhuma etapa por HTTP; depois disso, uma mudança
+    de fluxo faz o pedido falhar na etapa em que estava, sem reenvio.
+
+    Args:
+        data: Dicionário contendo os dados do cliente
+        url: URL da página de checkout da oferta
+        selenium_fill: Função que recebe os dados e executa o fluxo pelo navegador
+        endpoints: Caminhos das etapas específicos da oferta
+        on_commit: Função chamada antes do envio irreversível pelo HTTP (ver LogzzHttpFiller)
+
+    Returns:
+        OrderResult: Resultado do pedido (o de selenium_fill, se o navegador foi usado)
+    """
+    filler = LogzzHttpFiller(url, endpoints, on_commit=on_commit)
+    try:
+        return filler.fill_all(data)
+    except FlowChangedError as e:
+        if filler.accepted:
+            logging.error("Fluxo HTTP não reconhecido (%s) depois de o site aceitar %s; o pedido não será reenviado",
+                          e, ", ".join(filler.accepted))
+            filler.failure_reason = f"Fluxo HTTP não reconhecido: {e}"
+            return filler.result(False)
+        logging.warning("Fluxo HTTP não reconhecido (%s), usando o navegador", e)
+        return selenium_fill(data)
@@ -0,0 +1,130 @@
+"""
+Idempotência das submissões: chave por pedido, deduplicação de pedidos em
+andamento e cache de resultados.
+
+O n8n reenvia a requisição quando ela demora; com a mesma chave, o reenvio
+aguarda o preenchimento que já está em andamento (ou recebe o resultado já
+pronto) em vez de abrir outro navegador e duplicar o pedido na Logzz.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from typing import Any, Callable, Dict, Optional
+from cache import TTLCache
+
+# Cabeçalho HTTP com a chave informada pelo chamador
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Campos comparados apenas pelos dígitos ("(11) 99999-9999" == "11999999999")
+DIGIT_FIELDS = {"telefone", "cep", "numero"}
+
+# Campos que não identificam o pedido
+IGNORED_FIELDS = {"callback_url"}
+
+
+def _normalize(value: Any, key: Optional[str] = None) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v, k) for k, v in value.items() if k not in IGNORED_FIELDS}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        if key in DIGIT_FIELDS:
+            return re.sub(r"\D", "", value)
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def idempotency_key(data: Dict[str, Any], supplied: Optional[str] = None) -> str:
+    """
+    Retorna a chave de idempotência do pedido.
+
+    Args:
+        data: Dicionário contendo os dados do cliente
+        supplied: Chave informada pelo chamador; tem prioridade sobre o hash
+
+    Returns:
+        str: A chave informada ou o SHA-256 dos dados normalizados
+    """
+    if supplied and supplied.strip():
+        return supplied.strip()
+    canonical = json.dumps(_normalize(data), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Executa cada chave uma única vez por vez e guarda os resultados bem-sucedidos.
+
+    Chamadas concorrentes com a mesma chave aguardam a execução em andamento e
+    recebem o mesmo resultado; repetições dentro do TTL são respondidas pelo cache.
+    """
+    def __init__(self, results: TTLCache):
+        """
+        Args:
+            results: Cache (normalmente persistido em disco) dos resultados por chave
+        """
+        self.results = results
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Executa fn() para a chave, reaproveitando execução em andamento ou resultado recente.
+
+        Args:
+            key: Chave de idempotência
+            fn: Função sem argumentos que executa o pedido e retorna um dict com 'sucesso'
+
+        Returns:
+            dict: Resultado do pedido
+        """
+        cached = self.results.get(key)
+        if cached is not None:
+            logging.info("Pedido %s repetido, respondendo com o resultado anterior", key[:12])
+            return cached
+
+        with self._lock:
+            # O líder guarda o resultado antes de sair de _calls: conferimos de novo
+            # sob o lock para não iniciar uma segunda execução logo depois da primeira
+            cached = self.results.get(key)
+            if cached is not None:
+                logging.info("Pedido %s repetido, respondendo com o resultado anterior", key[:12])
+                return cached
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            logging.info("Pedido %s já está em andamento, aguardando o resultado", key[:12])
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            # Só resultados de sucesso são reaproveitados; falhas podem ser tentadas de novo
+            if call.result.get("sucesso"):
+                self.results.put(key, call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
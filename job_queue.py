@@ -0,0 +1,313 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from typing import Dict, Any, Optional, Tuple
+from results import OutcomeUnknownError
+
+# Estados possíveis de um pedido na fila
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+# Interrompido depois de enviar a confirmação: o site pode ter registrado o pedido, então ele não é refeito
+INTERRUPTED = "interrupted"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    callback_url TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    idempotency_key TEXT,
+    committed_stage TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+# Colunas que bancos criados por versões anteriores não têm
+MIGRATIONS = {
+    "idempotency_key": "ALTER TABLE jobs ADD COLUMN idempotency_key TEXT",
+    "committed_stage": "ALTER TABLE jobs ADD COLUMN committed_stage TEXT",
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS jobs_idempotency_key ON jobs (idempotency_key, created_at);
+"""
+
+
+INTERRUPTED_ERROR = "Pedido interrompido depois de enviar a confirmação; o site pode tê-lo registrado"
+
+
+class QueueFullError(Exception):
+    """
+    A fila atingiu o limite de pedidos pendentes.
+    """
+
+
+def record_commit(db_path: str, job_id: str, stage: str):
+    """
+    Grava no pedido que ele vai enviar uma etapa irreversível (ver OrderProgress.commit).
+
+    Chamada durante o preenchimento, possivelmente em um processo de trabalho,
+    com uma conexão própria e antes do envio: se o processo cair depois disso,
+    JobQueue.start sabe que o pedido pode ter sido registrado pelo site.
+
+    Args:
+        db_path: Caminho do banco SQLite da fila
+        job_id: Identificador do pedido
+        stage: Etapa que será enviada
+    """
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        with conn:
+            conn.execute("UPDATE jobs SET committed_stage = ? WHERE id = ?", (stage, job_id))
+    finally:
+        conn.close()
+
+
+class JobQueue:
+    """
+    Fila durável de pedidos de preenchimento, persistida em SQLite.
+
+    Os pedidos são executados em segundo plano por um número fixo de workers.
+    Ao reiniciar, pedidos que estavam em execução quando o processo caiu voltam
+    para a fila se ainda não tinham enviado a confirmação (ver record_commit);
+    os demais ficam como interrompidos, para não gerar um pedido duplicado.
+    """
+    def __init__(self, db_path, run_job, workers=2, max_pending=100, callback_timeout=10, idempotency_ttl=24 * 3600):
+        """
+        Inicializa a fila.
+
+        Args:
+            db_path (str): Caminho do banco SQLite
+            run_job: Função que recebe os dados do cliente e o id do pedido e retorna o resultado (dict)
+            workers (int): Quantidade de pedidos executados em paralelo
+            max_pending (int): Limite de pedidos aguardando na fila
+            callback_timeout (float): Tempo máximo (segundos) do POST de callback
+            idempotency_ttl (float): Por quanto tempo (segundos) um pedido concluído com
+                sucesso é devolvido a quem reenviar a mesma chave de idempotência
+        """
+        self.db_path = db_path
+        self.run_job = run_job
+        self.workers = workers
+        self.max_pending = max_pending
+        self.callback_timeout = callback_timeout
+        self.idempotency_ttl = idempotency_ttl
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+        self._conn.executescript(INDEXES)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        """
+        Recupera pedidos interrompidos e inicia os workers.
+        """
+        with self._lock, self._conn:
+            interrupted = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND committed_stage IS NOT NULL",
+                (INTERRUPTED, INTERRUPTED_ERROR, time.time(), RUNNING),
+            ).rowcount
+            recovered = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            ).rowcount
+        if interrupted:
+            logging.warning("%s pedidos interrompidos depois de enviar a confirmação não serão refeitos", interrupted)
+        if recovered:
+            logging.info("%s pedidos interrompidos voltaram para a fila", recovered)
+
+        logging.info("Iniciando %s workers da fila de pedidos", self.workers)
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """
+        Sinaliza os workers para pararem após o pedido em andamento.
+
+        Args:
+            timeout (float): Tempo máximo de espera por cada worker
+        """
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, data: Dict[str, Any], callback_url: Optional[str] = None,
+               idempotency_key: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Enfileira um pedido.
+
+        Com uma chave de idempotência, um pedido igual que ainda está na fila ou em
+        execução, ou que terminou com sucesso (ou foi interrompido depois de enviar
+        a confirmação) dentro do TTL, é reaproveitado em vez de criar outro.
+
+        Args:
+            data: Dicionário contendo os dados do cliente
+            callback_url: URL opcional que recebe um POST quando o pedido terminar
+            idempotency_key: Chave que identifica repetições do mesmo pedido
+
+        Returns:
+            tuple: Identificador do pedido e True se ele foi criado agora (False se reaproveitado)
+
+        Raises:
+            QueueFullError: Se a fila já tem max_pending pedidos aguardando
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            if idempotency_key:
+                existing = self._conn.execute(
+                    "SELECT id, status FROM jobs WHERE idempotency_key = ? AND ("
+                    "status IN (?, ?) OR (status IN (?, ?) AND finished_at >= ?)"
+                    ") ORDER BY created_at DESC LIMIT 1",
+                    (idempotency_key, QUEUED, RUNNING, SUCCEEDED, INTERRUPTED, time.time() - self.idempotency_ttl),
+                ).fetchone()
+                if existing is not None:
+                    logging.info("Pedido repetido, reaproveitando %s (%s)", existing['id'], existing['status'])
+                    return existing["id"], False
+            pending = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFullError(f"Fila cheia ({pending} pedidos aguardando)")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, callback_url, created_at, idempotency_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(data), callback_url, time.time(), idempotency_key),
+            )
+        logging.info("Pedido %s enfileirado", job_id)
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta o estado de um pedido.
+
+        Args:
+            job_id: Identificador retornado por submit()
+
+        Returns:
+            dict: Estado do pedido, ou None se não existir
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return self._row_to_dict(row)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retorna a quantidade de pedidos em cada estado.
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0, INTERRUPTED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _claim_next(self):
+        """
+        Marca o pedido mais antigo da fila como em execução e o retorna.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), row["id"]),
+            )
+        return row
+
+    def _worker_loop(self):
+        while True:
+            with self._wakeup:
+                if self._stopping:
+                    return
+            row = self._claim_next()
+            if row is None:
+                with self._wakeup:
+                    if not self._stopping:
+                        self._wakeup.wait(1)
+                continue
+            self._execute(row)
+
+    def _execute(self, row):
+        job_id = row["id"]
+        logging.info("Executando pedido %s", job_id)
+        result, error = None, None
+        try:
+            result = self.run_job(json.loads(row["payload"]), job_id)
+            status = SUCCEEDED if result.get("sucesso") else FAILED
+        except OutcomeUnknownError as e:
+            # O processo que preenchia o pedido morreu: só o que foi gravado por record_commit diz até onde ele foi
+            logging.error("Pedido %s interrompido: %s", job_id, e)
+            status = INTERRUPTED if self._committed_stage(job_id) else FAILED
+            error = str(e)
+        except Exception as e:
+            logging.error("Erro ao executar pedido %s: %s", job_id, e)
+            status, error = FAILED, str(e)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+            )
+        logging.info("Pedido %s finalizado com status %s", job_id, status)
+
+        if row["callback_url"]:
+            self._send_callback(row["callback_url"], self.get(job_id))
+
+    def _committed_stage(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT committed_stage FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["committed_stage"] if row else None
+
+    def _send_callback(self, url, job):
+        """
+        Envia o estado final do pedido para a URL de callback (melhor esforço).
+        """
+        body = json.dumps(job).encode("utf-8")
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=self.callback_timeout) as response:
+                logging.info("Callback do pedido %s enviado (%s)", job['id'], response.status)
+        except Exception as e:
+            logging.warning("Falha ao enviar callback do pedido %s para %s: %s", job['id'], url, e)
+
+    @staticmethod
+    def _row_to_dict(row):
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "resultado": json.loads(row["result"]) if row["result"] else None,
+            "erro": row["error"],
+            "tentativas": row["attempts"],
+            "criado_em": row["created_at"],
+            "iniciado_em": row["started_at"],
+            "finalizado_em": row["finished_at"],
+            "chave_idempotencia": row["idempotency_key"],
+            "etapa_enviada": row["committed_stage"],
+        }
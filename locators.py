@@ -0,0 +1,159 @@
+"""
+Registro declarativo dos seletores de cada campo do formulário.
+
+Cada campo tem uma lista de estratégias de localização em ordem de preferência.
+Todas as estratégias são testadas de uma só vez, em uma única chamada
+execute_script, e a primeira que encontrar um elemento visível e habilitado vence.
+A estratégia vencedora passa a ser tentada primeiro nos próximos pedidos, então
+uma mudança no site custa um pedido lento em vez de todos.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+import metrics
+
+Locator = namedtuple("Locator", ["strategy", "by", "value"])
+
+# Seletores conhecidos de cada campo; valores com {index} são preenchidos na busca
+DEFAULT_LOCATORS = {
+    "name": [
+        Locator("id", By.XPATH, '//*[@id="order_name"]'),
+    ],
+    "phone": [
+        Locator("xpath", By.XPATH, '//*[@id="information"]/div[2]/div/div[1]/div[2]/div/input'),
+    ],
+    "continue_information": [
+        Locator("xpath", By.XPATH, '//*[@id="information"]/div[2]/div/div[2]/button'),
+    ],
+    "cep": [
+        Locator("id_order_zipcode", By.XPATH, '//*[@id="order_zipcode"]'),
+        Locator("id_cep", By.ID, "cep"),
+        Locator("placeholder", By.XPATH, "//input[@placeholder='CEP']"),
+    ],
+    "street": [
+        Locator("id_order_address", By.XPATH, '//*[@id="order_address"]'),
+        Locator("id_order_street", By.XPATH, '//*[@id="order_street"]'),
+        Locator("placeholder", By.XPATH, "//input[@placeholder='Endereço' or @placeholder='Rua' or @placeholder='Logradouro']"),
+    ],
+    "neighborhood": [
+        Locator("id", By.XPATH, '//*[@id="order_neighborhood"]'),
+        Locator("placeholder", By.XPATH, "//input[@placeholder='Bairro']"),
+    ],
+    "number": [
+        Locator("xpath", By.XPATH, '//*[@id="address"]/div[2]/div/div[4]/div[1]/input'),
+        Locator("placeholder_or_id", By.XPATH, "//input[@placeholder='Número' or @id='number']"),
+    ],
+    "complement": [
+        Locator("id", By.XPATH, '//*[@id="order_address_complement"]'),
+    ],
+    "additional_info": [
+        Locator("xpath", By.XPATH, '//*[@id="address"]/div[2]/div/div[5]/div/textarea'),
+    ],
+    "confirm_address": [
+        Locator("xpath", By.XPATH, '//*[@id="address"]/div[2]/div/div[7]/button'),
+        Locator("button_text", By.XPATH, "//button[contains(text(), 'Continuar') or contains(text(), 'Salvar') or contains(text(), 'Próximo')]"),
+    ],
+    "day": [
+        Locator("id", By.ID, "day-{index}"),
+        Locator("card_class", By.XPATH, "//div[contains(@class, 'card-day-{index}')]"),
+    ],
+    "confirm_day": [
+        Locator("xpath", By.XPATH, '//*[@id="scheduling"]/div[2]/div/div[3]/button'),
+        Locator("button_text", By.XPATH, "//button[contains(text(), 'Finalizar') or contains(text(), 'Continuar') or contains(text(), 'Próximo')]"),
+    ],
+}
+
+# Testa todos os candidatos na página e retorna [índice, elemento] do primeiro visível e habilitado
+PROBE_JS = """
+var candidates = arguments[0];
+function lookup(by, value) {
+    if (by === 'id') { return document.getElementById(value); }
+    if (by === 'css selector') { return document.querySelector(value); }
+    if (by === 'name') { return document.getElementsByName(value)[0] || null; }
+    return document.evaluate(value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+for (var i = 0; i < candidates.length; i++) {
+    var el;
+    try { el = lookup(candidates[i][0], candidates[i][1]); } catch (e) { el = null; }
+    if (el && !el.disabled && el.getClientRects().length > 0) { return [i, el]; }
+}
+return null;
+"""
+
+
+class LocatorRegistry:
+    """
+    Seletores por campo, com a ordem de tentativa aprendida em execução.
+    """
+    def __init__(self, locators: Optional[Dict[str, List[Locator]]] = None):
+        """
+        Inicializa o registro.
+
+        Args:
+            locators: Seletores que substituem os de DEFAULT_LOCATORS, por campo
+        """
+        self.locators = {**DEFAULT_LOCATORS, **(locators or {})}
+        self._preferred = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, field: str) -> List[Locator]:
+        """
+        Retorna os seletores do campo, com o último vencedor em primeiro lugar.
+        """
+        locators = self.locators[field]
+        with self._lock:
+            preferred = self._preferred.get(field)
+        if preferred is None:
+            return list(locators)
+        return sorted(locators, key=lambda locator: locator.strategy != preferred)
+
+    def remember(self, field: str, strategy: str):
+        """
+        Registra a estratégia que encontrou o campo para tentá-la primeiro da próxima vez.
+        """
+        with self._lock:
+            previous = self._preferred.get(field)
+            self._preferred[field] = strategy
+        if previous is not None and previous != strategy:
+            logging.warning("Seletor do campo '%s' mudou de '%s' para '%s'", field, previous, strategy)
+
+    def find(self, driver, field: str, timeout: float, **params) -> Tuple[object, str]:
+        """
+        Aguarda o campo testando todos os seletores em cada verificação.
+
+        Args:
+            driver: Instância do WebDriver
+            field: Nome do campo no registro
+            timeout: Tempo máximo de espera em segundos
+            **params: Valores para os marcadores dos seletores (ex.: index=0)
+
+        Returns:
+            tuple: Elemento encontrado e a estratégia que o encontrou
+
+        Raises:
+            TimeoutException: Se nenhum seletor encontrar o campo dentro do limite
+        """
+        candidates = self.candidates(field)
+        probe = [[locator.by, locator.value.format(**params)] for locator in candidates]
+        started = time.perf_counter()
+        try:
+            index, element = WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.execute_script(PROBE_JS, probe)
+            )
+        except TimeoutException:
+            metrics.observe_selector(field, "none", False, time.perf_counter() - started)
+            raise TimeoutException(f"Nenhum seletor encontrou o campo '{field}' em {timeout}s")
+
+        strategy = candidates[index].strategy
+        metrics.observe_selector(field, strategy, True, time.perf_counter() - started)
+        self.remember(field, strategy)
+        return element, strategy
+
+
+# Registro compartilhado pelo processo, para que o aprendizado valha para todos os pedidos
+default_registry = LocatorRegistry()
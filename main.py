@@ -18,15 +18,16 @@ dados_cliente = {
 browser = Browser(headless=False)  # Coloque True para rodar sem abrir janela
 driver = browser.start()
 
-# Preencher formulário
-filler = LogzzFormFiller(browser)
-sucesso = filler.fill_stage_one(dados_cliente)
-sucesso = filler.fill_stage_two(dados_cliente)
+try:
+    # Preencher formulário
+    filler = LogzzFormFiller(browser)
+    sucesso = filler.fill_stage_one(dados_cliente)
+    sucesso = filler.fill_stage_two(dados_cliente)
 
-if sucesso:
-    print("Formulário preenchido com sucesso.")
-else:
-    print("Erro ao preencher o formulário.")
-
-# Encerrar navegador
-driver.quit()
+    if sucesso:
+        print("Formulário preenchido com sucesso.")
+    else:
+        print("Erro ao preencher o formulário.")
+finally:
+    # Encerrar navegador mesmo se o preenchimento levantar uma exceção
+    browser.close()
@@ -0,0 +1,208 @@
+"""
+Métricas Prometheus do preenchimento de pedidos.
+
+Mede a duração de cada etapa, de cada passo interno (inicialização do navegador,
+carregamento da página, esperas) e de cada espera por seletor, além de contar
+qual seletor alternativo funcionou e o resultado de cada etapa.
+
+Com processos de trabalho (LOGZZ_WORKER_PROCESSES > 0), as etapas rodam nos
+workers: cada processo grava suas métricas em arquivos de um diretório
+compartilhado (modo multiprocesso do prometheus_client, PROMETHEUS_MULTIPROC_DIR),
+que o servidor soma a cada coleta.
+"""
+import atexit
+import inspect
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import wraps
+import config
+
+# O modo multiprocesso é escolhido quando prometheus_client é importado, então o
+# diretório é definido antes; os workers herdam a variável de ambiente
+if config.WORKER_PROCESSES > 0 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="logzz-metrics-")
+    atexit.register(shutil.rmtree, os.environ["PROMETHEUS_MULTIPROC_DIR"], True)
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+from prometheus_client import (CollectorRegistry, Counter, Histogram, CONTENT_TYPE_LATEST, REGISTRY,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+# Faixas pensadas para operações de navegador: de dezenas de milissegundos a dezenas de segundos
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60)
+
+STAGE_SECONDS = Histogram(
+    "logzz_stage_duration_seconds", "Duração de cada etapa do pedido", ["stage"], buckets=BUCKETS
+)
+STAGE_RESULTS = Counter(
+    "logzz_stage_results_total", "Resultado de cada etapa do pedido", ["stage", "result"]
+)
+STEP_SECONDS = Histogram(
+    "logzz_step_duration_seconds", "Duração de passos internos das etapas", ["step"], buckets=BUCKETS
+)
+SELECTOR_WAIT_SECONDS = Histogram(
+    "logzz_selector_wait_seconds", "Duração da espera por cada seletor", ["field", "strategy", "result"], buckets=BUCKETS
+)
+SELECTOR_WINS = Counter(
+    "logzz_selector_wins_total", "Quantas vezes cada seletor encontrou o campo", ["field", "strategy"]
+)
+PAGE_LOAD_SECONDS = Histogram(
+    "logzz_page_load_seconds", "Carregamento da página do checkout: primeiro pedido da sessão ou seguintes",
+    ["order"], buckets=BUCKETS
+)
+CEP_CACHE_LOOKUPS = Counter(
+    "logzz_cep_cache_lookups_total", "Consultas ao cache de CEP por resultado", ["result"]
+)
+STAGE_RETRIES = Counter(
+    "logzz_stage_retries_total", "Novas tentativas de uma etapa que falhou, sem refazer o pedido", ["stage"]
+)
+WORKER_RESTARTS = Counter(
+    "logzz_worker_restarts_total", "Processos de trabalho recriados pelo supervisor", ["reason"]
+)
+TASKS_CANCELLED = Counter(
+    "logzz_worker_tasks_cancelled_total", "Tarefas que excederam o tempo máximo e tiveram o navegador encerrado"
+)
+ORPHANS_REAPED = Counter(
+    "logzz_orphan_processes_reaped_total", "Processos do Chrome órfãos encerrados pelo supervisor"
+)
+
+
+class LiveCollector:
+    """
+    Gauges lidos do estado atual do servidor (pool, fila, supervisor) a cada coleta.
+
+    Ficam fora dos arquivos do modo multiprocesso: só o processo do servidor conhece esse estado.
+    """
+    def __init__(self):
+        # (nome, descrição, rótulo, função que retorna {valor do rótulo: valor})
+        self.sources = []
+
+    def add(self, name, documentation, label, read):
+        self.sources.append((name, documentation, label, read))
+
+    def collect(self):
+        for name, documentation, label, read in self.sources:
+            family = GaugeMetricFamily(name, documentation, labels=[label])
+            for key, value in read().items():
+                family.add_metric([key], value)
+            yield family
+
+
+LIVE = LiveCollector()
+if not MULTIPROCESS:
+    REGISTRY.register(LIVE)
+
+
+@contextmanager
+def span(step):
+    """
+    Mede a duração de um passo interno.
+
+    Args:
+        step (str): Nome do passo, por exemplo 'stage_one.page_load'
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STEP_SECONDS.labels(step).observe(time.perf_counter() - started)
+
+
+def timed_stage(stage):
+    """
+    Decorador que mede a duração de uma etapa e conta seu resultado.
+
+    A função decorada deve retornar um valor verdadeiro em caso de sucesso; funciona
+    também com corrotinas (async def).
+
+    Args:
+        stage (str): Nome da etapa, por exemplo 'stage_one'
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                result = "error"
+                try:
+                    value = await func(*args, **kwargs)
+                    result = "success" if value else "failure"
+                    return value
+                finally:
+                    STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+                    STAGE_RESULTS.labels(stage, result).inc()
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = "error"
+            try:
+                value = func(*args, **kwargs)
+                result = "success" if value else "failure"
+                return value
+            finally:
+                STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+                STAGE_RESULTS.labels(stage, result).inc()
+        return wrapper
+    return decorator
+
+
+def observe_selector(field, strategy, found, seconds):
+    """
+    Registra uma espera por seletor e, se encontrou o campo, conta a vitória da estratégia.
+
+    Args:
+        field (str): Campo procurado, por exemplo 'cep'
+        strategy (str): Estratégia de localização, por exemplo 'id' ou 'placeholder'
+        found (bool): True se o seletor encontrou o campo
+        seconds (float): Duração da espera
+    """
+    SELECTOR_WAIT_SECONDS.labels(field, strategy, "found" if found else "timeout").observe(seconds)
+    if found:
+        SELECTOR_WINS.labels(field, strategy).inc()
+
+
+def register_pool(pool):
+    """
+    Expõe o estado de um BrowserPool como gauges, lidos a cada coleta.
+    """
+    LIVE.add("logzz_pool_browsers", "Navegadores do pool por estado", "state",
+             lambda: {state: pool.stats()[state] for state in ("total", "idle", "in_use")})
+
+
+def register_queue(queue):
+    """
+    Expõe a quantidade de pedidos por estado de uma JobQueue, lida a cada coleta.
+    """
+    LIVE.add("logzz_queue_jobs", "Pedidos da fila por estado", "status", queue.stats)
+
+
+def register_supervisor(supervisor):
+    """
+    Expõe os workers vivos e as tarefas (capacidade, em execução e aguardando) de um Supervisor.
+    """
+    LIVE.add("logzz_supervisor_workers", "Processos de trabalho do supervisor por estado", "state",
+             lambda: {state: supervisor.stats()[state] for state in ("workers", "alive")})
+    LIVE.add("logzz_supervisor_tasks", "Tarefas do supervisor por estado", "state",
+             lambda: {state: supervisor.stats()[state] for state in ("capacity", "busy", "pending")})
+
+
+def render():
+    """
+    Gera as métricas no formato de texto do Prometheus.
+
+    No modo multiprocesso, soma as métricas gravadas por todos os processos.
+
+    Returns:
+        tuple: Corpo da resposta e content type
+    """
+    if not MULTIPROCESS:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(LIVE)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,346 @@
+"""
+Servidor local que imita o checkout da Logzz.
+
+Serve a página da oferta com as três etapas do formulário (informações, endereço
+com preenchimento automático pelo CEP e escolha do dia de entrega), com os mesmos
+ids e caminhos XPath usados pelo LogzzFormFiller, e as requisições de cada etapa
+usadas pelo preenchedor HTTP. Latência e falhas podem ser injetadas para medir o
+comportamento dos preenchedores sem depender do site real.
+
+Uso:
+    python mock_logzz.py --porta 8999 --latencia-etapa 0.3 --falha-etapa 0.05
+    # URL da oferta: http://127.0.0.1:8999/pay/MOCK/oferta-teste
+"""
+import argparse
+import datetime
+import random
+import re
+import secrets
+import threading
+import time
+from flask import Flask, jsonify, request, session
+
+app = Flask(__name__)
+app.secret_key = secrets.token_hex(16)
+
+# Quantidade de dias de entrega oferecidos na etapa de agendamento
+DAYS_AVAILABLE = 5
+
+# Latências (segundos) e probabilidades de falha injetadas; ver configure()
+SETTINGS = {
+    "page_latency": 0.0,       # resposta da página da oferta
+    "stage_latency": 0.0,      # resposta de cada etapa (information, address, scheduling)
+    "cep_latency": 0.0,        # busca de endereço pelo CEP
+    "days_latency": 0.0,       # renderização dos cards de dia no navegador
+    "jitter": 0.0,             # variação relativa das latências (0.2 = ±20%)
+    "stage_failure": 0.0,      # probabilidade de uma etapa ser recusada
+    "cep_failure": 0.0,        # probabilidade de a busca de CEP falhar
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="csrf-token" content="{token}">
+<title>Checkout</title>
+<style>
+body {{ font-family: sans-serif; max-width: 640px; margin: 24px auto; }}
+input, textarea {{ display: block; width: 100%; margin: 4px 0; }}
+.card-day {{ display: inline-block; border: 1px solid #ccc; padding: 8px; margin: 4px; }}
+.erro {{ color: #b00; }}
+</style>
+</head>
+<body>
+<h1>Checkout de teste</h1>
+<div id="checkout">
+<div id="information">
+    <div><h2>Informações</h2></div>
+    <div>
+        <div>
+            <div>
+                <div><div><input id="order_name" name="order[name]" placeholder="Nome completo"></div></div>
+                <div><div><input id="order_phone" name="order[phone]" placeholder="Telefone"></div></div>
+            </div>
+            <div><button type="button" onclick="sendInformation()">Continuar</button></div>
+        </div>
+    </div>
+</div>
+</div>
+<p id="mensagem" class="erro"></p>
+
+<template id="address-template">
+<div id="address">
+    <div><h2>Endereço e entrega</h2></div>
+    <div>
+        <div>
+            <div><input id="order_zipcode" name="order[zipcode]" placeholder="CEP" onchange="lookupCep(this.value)"></div>
+            <div><input id="order_address" name="order[address]" placeholder="Endereço"></div>
+            <div><input id="order_neighborhood" name="order[neighborhood]" placeholder="Bairro"></div>
+            <div>
+                <div><input id="order_address_number" name="order[address_number]" placeholder="Número"></div>
+                <div><input id="order_address_complement" name="order[address_complement]" placeholder="Complemento"></div>
+            </div>
+            <div><div><textarea name="order[additional_information]" placeholder="Informações adicionais"></textarea></div></div>
+            <div><small>Frete grátis</small></div>
+            <div><button type="button" onclick="sendAddress()">Continuar</button></div>
+        </div>
+    </div>
+</div>
+</template>
+
+<template id="scheduling-template">
+<div id="scheduling">
+    <div><h2>Escolha o dia para receber o entregador</h2></div>
+    <div>
+        <div>
+            <div id="days"></div>
+            <div><small>O entregador passa entre 8h e 18h</small></div>
+            <div><button type="button" onclick="sendScheduling()">Finalizar</button></div>
+        </div>
+    </div>
+</div>
+</template>
+
+<template id="payment-template">
+<div id="payment">
+    <div><h2>Pagamento</h2></div>
+    <p>Pedido agendado com sucesso</p>
+</div>
+</template>
+
+<script>
+var DAYS_LATENCY = {days_latency};
+var token = document.querySelector('meta[name="csrf-token"]').content;
+var base = window.location.pathname.replace(/\\/$/, '');
+
+function value(name) {{
+    var el = document.getElementsByName(name)[0];
+    return el ? el.value : '';
+}}
+
+function showStep(id) {{
+    var template = document.getElementById(id + '-template');
+    document.getElementById('checkout').appendChild(template.content.cloneNode(true));
+}}
+
+function post(step, fields) {{
+    var body = new URLSearchParams(fields);
+    body.append('_token', token);
+    return fetch(base + '/' + step, {{
+        method: 'POST',
+        headers: {{'X-CSRF-TOKEN': token, 'X-Requested-With': 'XMLHttpRequest', 'Accept': 'application/json'}},
+        body: body
+    }}).then(function(r) {{ return r.json(); }}).then(function(data) {{
+        document.getElementById('mensagem').textContent = data.success ? '' : (data.message || 'Verifique os dados');
+        return data;
+    }});
+}}
+
+function sendInformation() {{
+    post('information', {{'order[name]': value('order[name]'), 'order[phone]': value('order[phone]')}}).then(function(data) {{
+        if (data.success && !document.getElementById('address')) {{ showStep('address'); }}
+    }});
+}}
+
+function lookupCep(cep) {{
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/cep/' + encodeURIComponent(cep));
+    xhr.onload = function() {{
+        if (xhr.status !== 200) {{ return; }}
+        var data = JSON.parse(xhr.responseText);
+        document.getElementById('order_address').value = data.logradouro;
+        document.getElementById('order_neighborhood').value = data.bairro;
+    }};
+    xhr.send();
+}}
+
+function sendAddress() {{
+    post('address', {{
+        'order[zipcode]': value('order[zipcode]'),
+        'order[address]': value('order[address]'),
+        'order[address_number]': value('order[address_number]'),
+        'order[address_complement]': value('order[address_complement]'),
+        'order[neighborhood]': value('order[neighborhood]'),
+        'order[additional_information]': value('order[additional_information]')
+    }}).then(function(data) {{
+        if (!data.success || document.getElementById('scheduling')) {{ return; }}
+        showStep('scheduling');
+        setTimeout(function() {{
+            var html = data.days.map(function(day, i) {{
+                return '<label class="card-day card-day-' + i + '">' +
+                    '<input type="radio" id="' + day.id + '" name="order[delivery_date]" value="' + day.value + '"> ' +
+                    day.label + '</label>';
+            }}).join('');
+            document.getElementById('days').innerHTML = html;
+        }}, DAYS_LATENCY * 1000);
+    }});
+}}
+
+function sendScheduling() {{
+    var checked = document.querySelector('input[name="order[delivery_date]"]:checked');
+    post('scheduling', {{'order[delivery_date]': checked ? checked.value : ''}}).then(function(data) {{
+        if (data.success && !document.getElementById('payment')) {{ showStep('payment'); }}
+    }});
+}}
+</script>
+</body>
+</html>
+"""
+
+
+def configure(**settings):
+    """
+    Ajusta latências e probabilidades de falha (chaves de SETTINGS).
+    """
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Configurações desconhecidas: {', '.join(sorted(unknown))}")
+    SETTINGS.update(settings)
+
+
+def _delay(key):
+    latency = SETTINGS[key]
+    if latency > 0:
+        jitter = SETTINGS["jitter"]
+        time.sleep(random.uniform(latency * (1 - jitter), latency * (1 + jitter)))
+
+
+def _fails(key):
+    return random.random() < SETTINGS[key]
+
+
+def available_days():
+    """
+    Gera os próximos dias úteis como opções de entrega.
+    """
+    days = []
+    current = datetime.date.today()
+    while len(days) < DAYS_AVAILABLE:
+        current += datetime.timedelta(days=1)
+        if current.weekday() < 5:
+            days.append({
+                "id": f"day-{len(days)}",
+                "value": current.isoformat(),
+                "label": current.strftime("%d/%m"),
+            })
+    return days
+
+
+def check_request(expected_stage):
+    """
+    Valida o token CSRF e a ordem das etapas; retorna uma resposta de erro ou None.
+    """
+    token = request.headers.get("X-CSRF-TOKEN") or request.form.get("_token")
+    if not token or token != session.get("token"):
+        return jsonify({"message": "CSRF token mismatch"}), 419
+    if session.get("stage") != expected_stage:
+        return jsonify({"success": False, "message": "Etapa fora de ordem"}), 422
+    _delay("stage_latency")
+    if _fails("stage_failure"):
+        return jsonify({"success": False, "message": "Falha simulada, tente novamente"})
+    return None
+
+
+@app.route("/pay/<code>/<slug>", methods=["GET"])
+def offer_page(code, slug):
+    _delay("page_latency")
+    session["token"] = secrets.token_hex(16)
+    session["stage"] = "information"
+    return PAGE_TEMPLATE.format(token=session["token"], days_latency=SETTINGS["days_latency"])
+
+
+@app.route("/cep/<cep>", methods=["GET"])
+def cep_lookup(cep):
+    _delay("cep_latency")
+    digits = re.sub(r"\D", "", cep)
+    if len(digits) != 8 or _fails("cep_failure"):
+        return jsonify({"erro": "CEP não encontrado"}), 404
+    return jsonify({"logradouro": f"Rua Simulada {digits[:5]}", "bairro": f"Bairro {digits[5:]}"})
+
+
+@app.route("/pay/<code>/<slug>/information", methods=["POST"])
+def information(code, slug):
+    error = check_request("information")
+    if error:
+        return error
+    if not request.form.get("order[name]") or not request.form.get("order[phone]"):
+        return jsonify({"success": False, "errors": {"order": "Nome e telefone são obrigatórios"}})
+    session["stage"] = "address"
+    return jsonify({"success": True})
+
+
+@app.route("/pay/<code>/<slug>/address", methods=["POST"])
+def address(code, slug):
+    error = check_request("address")
+    if error:
+        return error
+    if not request.form.get("order[zipcode]") or not request.form.get("order[address_number]"):
+        return jsonify({"success": False, "errors": {"order": "CEP e número são obrigatórios"}})
+    session["stage"] = "scheduling"
+    return jsonify({"success": True, "days": available_days()})
+
+
+@app.route("/pay/<code>/<slug>/scheduling", methods=["POST"])
+def scheduling(code, slug):
+    error = check_request("scheduling")
+    if error:
+        return error
+    values = [day["value"] for day in available_days()]
+    if request.form.get("order[delivery_date]") not in values:
+        return jsonify({"success": False, "errors": {"order": "Data indisponível"}})
+    session["stage"] = "payment"
+    return jsonify({"success": True})
+
+
+def serve_in_background(port=0):
+    """
+    Inicia o servidor em uma thread (para benchmarks) e retorna a URL base.
+
+    Args:
+        port: Porta local; 0 escolhe uma porta livre
+
+    Returns:
+        tuple: URL base (ex.: http://127.0.0.1:8999) e o servidor, para shutdown()
+    """
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="mock-logzz", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def add_arguments(parser):
+    """
+    Registra as opções de latência e falha em um parser de linha de comando.
+    """
+    parser.add_argument("--latencia-pagina", type=float, default=0.0, help="Latência da página da oferta (s)")
+    parser.add_argument("--latencia-etapa", type=float, default=0.0, help="Latência de cada etapa (s)")
+    parser.add_argument("--latencia-cep", type=float, default=0.0, help="Latência da busca de CEP (s)")
+    parser.add_argument("--latencia-dias", type=float, default=0.0, help="Atraso para exibir os cards de dia (s)")
+    parser.add_argument("--variacao", type=float, default=0.0, help="Variação relativa das latências (0.2 = ±20%%)")
+    parser.add_argument("--falha-etapa", type=float, default=0.0, help="Probabilidade de uma etapa ser recusada")
+    parser.add_argument("--falha-cep", type=float, default=0.0, help="Probabilidade de a busca de CEP falhar")
+
+
+def settings_from_args(args):
+    """
+    Converte as opções de add_arguments nas chaves de SETTINGS.
+    """
+    return {
+        "page_latency": args.latencia_pagina,
+        "stage_latency": args.latencia_etapa,
+        "cep_latency": args.latencia_cep,
+        "days_latency": args.latencia_dias,
+        "jitter": args.variacao,
+        "stage_failure": args.falha_etapa,
+        "cep_failure": args.falha_cep,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Checkout local que imita a Logzz")
+    parser.add_argument("--porta", type=int, default=8999)
+    add_arguments(parser)
+    args = parser.parse_args()
+    configure(**settings_from_args(args))
+    app.run(host="127.0.0.1", port=args.porta, threaded=True)
@@ -0,0 +1,127 @@
+"""
+Registro das ofertas (produtos) vendidas pelo checkout da Logzz.
+
+Cada oferta tem sua URL de checkout e pode ajustar limites de espera, seletores
+e caminhos do fluxo HTTP. As ofertas são carregadas de um arquivo JSON:
+
+    {
+        "padrao": "escova",
+        "ofertas": {
+            "escova": {
+                "url": "https://entrega.logzz.com.br/pay/QYSLBC/ohcky-1-unidade-escova-alisadora",
+                "timeouts": {"cep_autofill": 6},
+                "seletores": {"cep": [["id_cep", "id", "cep"]]},
+                "endpoints": {"address": "endereco"}
+            }
+        }
+    }
+
+O pedido escolhe a oferta pela chave "oferta"; sem ela, usa a oferta padrão.
+"""
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+import config
+from form_filler import DEFAULT_URL, LogzzFormFiller
+from locators import Locator, LocatorRegistry, default_registry
+
+DEFAULT_OFFER = "padrao"
+
+
+class UnknownOfferError(Exception):
+    """
+    O pedido referencia uma oferta que não está no registro.
+    """
+
+
+@dataclass
+class Offer:
+    """
+    Configuração de uma oferta.
+    """
+    slug: str
+    url: str
+    timeouts: Dict[str, float] = field(default_factory=dict)
+    locators: LocatorRegistry = default_registry
+    endpoints: Dict[str, str] = field(default_factory=dict)
+
+    def filler(self, browser, **kwargs) -> LogzzFormFiller:
+        """
+        Cria um LogzzFormFiller configurado para esta oferta.
+        """
+        return LogzzFormFiller(browser, url=self.url, timeouts=self.timeouts, locators=self.locators, **kwargs)
+
+
+class OfferRegistry:
+    """
+    Ofertas disponíveis, indexadas pelo identificador (slug).
+    """
+    def __init__(self, offers: Dict[str, Offer], default: str):
+        """
+        Inicializa o registro.
+
+        Args:
+            offers: Ofertas por identificador
+            default: Identificador da oferta usada quando o pedido não informa nenhuma
+        """
+        if default not in offers:
+            raise ValueError(f"Oferta padrão '{default}' não está no registro")
+        self.offers = offers
+        self.default = default
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OfferRegistry":
+        """
+        Monta o registro a partir do formato do arquivo JSON.
+        """
+        offers = {}
+        for slug, spec in data["ofertas"].items():
+            locators = default_registry
+            if spec.get("seletores"):
+                locators = LocatorRegistry({
+                    name: [Locator(*item) for item in items] for name, items in spec["seletores"].items()
+                })
+            offers[slug] = Offer(
+                slug=slug,
+                url=spec["url"],
+                timeouts=spec.get("timeouts", {}),
+                locators=locators,
+                endpoints=spec.get("endpoints", {}),
+            )
+        return cls(offers, data.get("padrao") or next(iter(offers)))
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "OfferRegistry":
+        """
+        Carrega o registro do arquivo configurado; sem arquivo, registra só a oferta padrão.
+
+        Args:
+            path: Caminho do arquivo JSON; usa LOGZZ_OFFERS_FILE se omitido
+        """
+        path = path or config.OFFERS_FILE
+        if not path:
+            return cls({DEFAULT_OFFER: Offer(DEFAULT_OFFER, DEFAULT_URL)}, DEFAULT_OFFER)
+        with open(path, encoding="utf-8") as f:
+            registry = cls.from_dict(json.load(f))
+        logging.info("%s ofertas carregadas de %s", len(registry.offers), path)
+        return registry
+
+    def get(self, slug: Optional[str] = None) -> Offer:
+        """
+        Retorna a oferta pelo identificador (ou a padrão, se omitido).
+
+        Raises:
+            UnknownOfferError: Se a oferta não existir
+        """
+        slug = slug or self.default
+        try:
+            return self.offers[slug]
+        except KeyError:
+            raise UnknownOfferError(f"Oferta desconhecida: {slug}")
+
+    def for_order(self, data: Dict[str, Any]) -> Offer:
+        """
+        Retorna a oferta escolhida pelos dados do pedido (chave 'oferta').
+        """
+        return self.get(data.get("oferta"))
@@ -0,0 +1,142 @@
+"""
+Utilitários para inspecionar e encerrar árvores de processos (Linux, via /proc).
+"""
+import ctypes
+import logging
+import os
+import signal
+from typing import Dict, List, Optional, Tuple
+
+# prctl(2): o processo passa a adotar os descendentes órfãos em vez do init
+PR_SET_CHILD_SUBREAPER = 36
+
+
+def _read_stat(pid: int) -> Optional[Tuple[str, str, int]]:
+    """
+    Lê nome, estado e ppid de um processo em /proc/<pid>/stat.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # O nome do processo fica entre parênteses e pode conter espaços
+    name = stat[stat.find("(") + 1:stat.rfind(")")]
+    fields = stat[stat.rfind(")") + 2:].split()
+    return name, fields[0], int(fields[1])
+
+
+def _parent_map() -> Dict[int, int]:
+    """
+    Mapeia pid -> ppid de todos os processos visíveis em /proc.
+    """
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        stat = _read_stat(int(entry))
+        if stat is not None:
+            parents[int(entry)] = stat[2]
+    return parents
+
+
+def children(pid: int) -> List[int]:
+    """
+    Retorna os pids dos filhos diretos de um processo.
+    """
+    return [child for child, parent in _parent_map().items() if parent == pid]
+
+
+def descendants(pid: int) -> List[int]:
+    """
+    Retorna os pids de todos os descendentes de um processo.
+
+    Args:
+        pid: Processo raiz
+
+    Returns:
+        list: Pids dos descendentes (filhos, netos, ...), sem incluir a raiz
+    """
+    children = {}
+    for child, parent in _parent_map().items():
+        children.setdefault(parent, []).append(child)
+    found = []
+    pending = list(children.get(pid, []))
+    while pending:
+        current = pending.pop()
+        found.append(current)
+        pending.extend(children.get(current, []))
+    return found
+
+
+def process_name(pid: int) -> Optional[str]:
+    stat = _read_stat(pid)
+    return stat[0] if stat else None
+
+
+def is_zombie(pid: int) -> bool:
+    stat = _read_stat(pid)
+    return stat is not None and stat[1] == "Z"
+
+
+def kill_tree(pid: int, sig: int = signal.SIGKILL) -> List[int]:
+    """
+    Envia um sinal a um processo e a todos os seus descendentes.
+
+    Os descendentes são listados antes do sinal, já que ao morrer a raiz eles
+    seriam adotados por outro processo e sairiam da árvore.
+
+    Args:
+        pid: Processo raiz
+        sig: Sinal enviado (padrão: SIGKILL)
+
+    Returns:
+        list: Pids que receberam o sinal
+    """
+    killed = []
+    for target in [pid] + descendants(pid):
+        try:
+            os.kill(target, sig)
+            killed.append(target)
+        except (ProcessLookupError, PermissionError):
+            continue
+    return killed
+
+
+def set_child_subreaper() -> bool:
+    """
+    Faz o processo atual adotar descendentes órfãos (Chrome de workers mortos),
+    para que possam ser encerrados e recolhidos por ele.
+
+    Returns:
+        bool: True se o sistema aceitou a configuração
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except (OSError, AttributeError) as e:
+        logging.warning("Não foi possível adotar processos órfãos: %s", e)
+        return False
+
+
+def rss_bytes(pids: List[int]) -> int:
+    """
+    Soma a memória residente (RSS) dos processos informados.
+
+    Args:
+        pids: Pids dos processos
+
+    Returns:
+        int: Memória residente total em bytes
+    """
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
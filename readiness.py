@@ -0,0 +1,150 @@
+"""
+Esperas orientadas a eventos para saber quando a página está pronta.
+
+Substituem pausas fixas (time.sleep) por sinais concretos: documento carregado,
+nenhuma requisição XHR/fetch pendente, campo preenchido pelo site.
+Todas as funções retornam assim que o sinal chega e respeitam um limite máximo.
+"""
+import logging
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Intervalo entre verificações das esperas
+POLL_INTERVAL = 0.1
+
+# Contador de requisições pendentes injetado na página (XHR e fetch)
+NETWORK_TRACKER_JS = """
+(function() {
+    if (window.__logzzPending !== undefined) { return; }
+    window.__logzzPending = 0;
+    window.__logzzLastActivity = Date.now();
+    function begin() { window.__logzzPending++; window.__logzzLastActivity = Date.now(); }
+    function end() { window.__logzzPending = Math.max(0, window.__logzzPending - 1); window.__logzzLastActivity = Date.now(); }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        begin();
+        this.addEventListener('loadend', end);
+        return originalSend.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function() {
+            begin();
+            return originalFetch.apply(this, arguments).finally(end);
+        };
+    }
+})();
+"""
+
+NETWORK_STATE_JS = """
+if (window.__logzzPending === undefined) { return null; }
+return [window.__logzzPending, Date.now() - window.__logzzLastActivity];
+"""
+
+
+def install_network_tracker(driver):
+    """
+    Instala o contador de requisições pendentes.
+
+    Registra o script para ser executado antes dos scripts do site em cada nova
+    página (via CDP, quando disponível) e também o executa na página atual.
+
+    Args:
+        driver: Instância do WebDriver
+    """
+    if not getattr(driver, "_logzz_tracker_registered", False):
+        try:
+            driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": NETWORK_TRACKER_JS})
+            driver._logzz_tracker_registered = True
+        except (WebDriverException, AttributeError) as e:
+            logging.warning("Não foi possível registrar o monitor de rede via CDP: %s", e)
+    try:
+        driver.execute_script(NETWORK_TRACKER_JS)
+    except WebDriverException:
+        pass
+
+
+def wait_document_ready(driver, timeout):
+    """
+    Aguarda document.readyState == 'complete'.
+
+    Args:
+        driver: Instância do WebDriver
+        timeout (float): Tempo máximo de espera em segundos
+
+    Returns:
+        bool: True se o documento ficou pronto dentro do limite
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        return True
+    except TimeoutException:
+        logging.warning("Documento não ficou pronto em %ss", timeout)
+        return False
+
+
+def wait_network_idle(driver, timeout, idle_time=0.5):
+    """
+    Aguarda até não haver requisições XHR/fetch pendentes por idle_time segundos.
+
+    Se o monitor de rede não estiver instalado na página, considera a rede
+    ociosa assim que o documento estiver carregado.
+
+    Args:
+        driver: Instância do WebDriver
+        timeout (float): Tempo máximo de espera em segundos
+        idle_time (float): Tempo sem atividade de rede para considerar ociosa
+
+    Returns:
+        bool: True se a rede ficou ociosa dentro do limite
+    """
+    idle_ms = idle_time * 1000
+
+    def is_idle(d):
+        state = d.execute_script(NETWORK_STATE_JS)
+        if state is None:
+            return d.execute_script("return document.readyState") == "complete"
+        pending, quiet_ms = state
+        return pending == 0 and quiet_ms >= idle_ms
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(is_idle)
+        return True
+    except TimeoutException:
+        logging.warning("Rede não ficou ociosa em %ss, prosseguindo", timeout)
+        return False
+
+
+def wait_for_any_value(driver, xpaths, timeout):
+    """
+    Aguarda até que algum dos campos indicados tenha valor não vazio.
+
+    Usado para detectar o autopreenchimento do endereço após digitar o CEP.
+
+    Args:
+        driver: Instância do WebDriver
+        xpaths (list): XPaths dos campos a observar
+        timeout (float): Tempo máximo de espera em segundos
+
+    Returns:
+        bool: True se algum campo foi preenchido dentro do limite
+    """
+    script = """
+    var xpaths = arguments[0];
+    for (var i = 0; i < xpaths.length; i++) {
+        var el = document.evaluate(xpaths[i], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        if (el && el.value && el.value.trim() !== '') { return true; }
+    }
+    return false;
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script(script, xpaths)
+        )
+        return True
+    except TimeoutException:
+        logging.warning("Nenhum dos campos foi preenchido em %ss", timeout)
+        return False
+
@@ -0,0 +1,86 @@
+"""
+Resultado estruturado de um pedido, devolvido por fill_all.
+
+Reúne o que antes ficava espalhado em linhas de log: até onde o pedido chegou,
+a duração de cada etapa, o seletor que encontrou cada campo, o dia de entrega
+escolhido, o motivo da falha e os artefatos capturados. É verdadeiro quando o
+pedido foi concluído, então quem tratava o retorno como bool segue funcionando.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from stages import STAGES, OrderProgress
+
+
+class OutcomeUnknownError(Exception):
+    """
+    A execução foi interrompida sem resultado: o pedido pode ter sido enviado ao site.
+
+    Quem recebe este erro não deve reenviar o pedido automaticamente, para não
+    gerar um pedido duplicado.
+    """
+
+
+@dataclass
+class OrderResult:
+    """
+    Resultado de um pedido executado pelo preenchedor.
+    """
+    success: bool
+    job_id: Optional[str] = None
+    stage_reached: Optional[str] = None
+    failed_stage: Optional[str] = None
+    stage_seconds: Dict[str, float] = field(default_factory=dict)
+    strategies: Dict[str, str] = field(default_factory=dict)
+    days: List[Dict[str, Any]] = field(default_factory=list)
+    selected_day: Optional[Dict[str, Any]] = None
+    failure_reason: Optional[str] = None
+    artifacts: List[str] = field(default_factory=list)
+    progress: Optional[OrderProgress] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    @classmethod
+    def from_filler(cls, filler, success: bool) -> "OrderResult":
+        """
+        Monta o resultado a partir do estado do preenchedor (síncrono ou assíncrono) após fill_all.
+        """
+        progress = filler.progress
+        stage_seconds = {}
+        for entry in progress.history:
+            stage_seconds[entry["etapa"]] = round(stage_seconds.get(entry["etapa"], 0.0) + entry["segundos"], 3)
+        started = [stage for stage in STAGES if progress.attempts[stage]]
+        return cls(
+            success=success,
+            job_id=filler.artifacts.job_id,
+            stage_reached=started[-1] if started else None,
+            failed_stage=None if success else progress.current,
+            stage_seconds=stage_seconds,
+            strategies=dict(filler.strategies),
+            days=list(filler.days),
+            selected_day=filler.selected_day,
+            failure_reason=None if success else filler.failure_reason,
+            artifacts=list(filler.artifacts.paths),
+            progress=progress,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Formato das respostas da API e do registro de execuções (chaves em português).
+        """
+        result = {
+            "sucesso": self.success,
+            "id": self.job_id,
+            "etapa_alcancada": self.stage_reached,
+            "etapa_falha": self.failed_stage,
+            "etapas_segundos": self.stage_seconds,
+            "seletores": self.strategies,
+            "dia_escolhido": self.selected_day,
+            "motivo_falha": self.failure_reason,
+            "artefatos": self.artifacts,
+        }
+        if self.days:
+            result["dias_disponiveis"] = self.days
+        if self.progress is not None and self.progress.history:
+            result["progresso"] = self.progress.to_dict()
+        return result
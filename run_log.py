@@ -0,0 +1,124 @@
+"""
+Registro de execuções em JSON Lines: uma linha por pedido, só acrescentada, com rotação por tamanho.
+
+Cada linha é o resultado estruturado do pedido (ver results.py) com o tipo da
+tarefa, a oferta e o horário, sem dados pessoais do cliente. O arquivo pode ser
+acompanhado com `tail -f` e agregado com jq ou pandas sem interpretar texto livre.
+
+A serialização e a escrita em disco acontecem em uma thread de fundo: quem
+executa o pedido só coloca o dicionário em uma fila.
+
+O resultado é registrado por quem o finaliza (runner.OrderRunner e
+AsyncOrderRunner, ou o supervisor quando há processos de trabalho), de modo que
+servidor, fila e lote (batch.py) escrevem no mesmo registro. Cada arquivo tem um
+único processo escritor: os workers do supervisor não registram nada, quem grava
+é o processo principal, já que a rotação do arquivo não é segura entre processos.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from results import OrderResult
+import config
+
+
+class _JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # O QueueHandler padrão formata a mensagem na thread de quem registra; aqui
+    # a fila é do próprio processo, então o registro segue intacto para a thread de fundo
+    def prepare(self, record):
+        return record
+
+
+class RunLog:
+    """
+    Arquivo JSON Lines com os resultados dos pedidos, escrito em segundo plano.
+    """
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        """
+        Args:
+            path: Arquivo do registro; os anteriores ficam em path.1, path.2, ...
+            max_bytes: Tamanho a partir do qual o arquivo é rotacionado
+            backups: Quantidade de arquivos rotacionados mantidos
+        """
+        self.path = path
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                                            encoding="utf-8", delay=True)
+        file_handler.setFormatter(_JsonLinesFormatter())
+        self._queue = queue.SimpleQueue()
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+        self._listener.start()
+        self._closed = False
+        # Logger próprio, fora da hierarquia raiz: as linhas não aparecem no log de texto
+        self._logger = logging.Logger("logzz.runs", logging.INFO)
+        self._logger.addHandler(_DeferredQueueHandler(self._queue))
+
+    def record(self, kind: str, result: Dict[str, Any], offer: Optional[str] = None):
+        """
+        Acrescenta o resultado de uma tarefa ao registro.
+
+        Args:
+            kind: Tipo da tarefa (ver runner.ORDER, runner.STAGE_ONE e runner.QUOTE)
+            result: Resultado da tarefa, no formato de OrderResult.to_dict
+            offer: Oferta do pedido
+        """
+        self._logger.info({"ts": round(time.time(), 3), "tipo": kind, "oferta": offer, **result})
+
+    def run(self, kind: str, data: Dict[str, Any], job_id: Optional[str], task: Callable[[], Dict[str, Any]]):
+        """
+        Executa a tarefa e registra o resultado ou, se ela levantar uma exceção, a falha.
+
+        Args:
+            kind: Tipo da tarefa
+            data: Dados do cliente (só a oferta vai para o registro)
+            job_id: Id do pedido na fila, registrado na falha
+            task: Função que executa a tarefa e retorna o resultado no formato de OrderResult.to_dict
+
+        Returns:
+            dict: O resultado da tarefa
+        """
+        try:
+            result = task()
+        except Exception as e:
+            self.record(kind, OrderResult(success=False, job_id=job_id, failure_reason=str(e)).to_dict(),
+                        data.get("oferta"))
+            raise
+        self.record(kind, result, data.get("oferta"))
+        return result
+
+    def close(self):
+        """
+        Grava as linhas pendentes e fecha o arquivo; chamadas repetidas não fazem nada.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+_default_run_log = None
+_default_run_log_lock = threading.Lock()
+
+
+def default_run_log() -> Optional[RunLog]:
+    """
+    Retorna o registro compartilhado do processo (None se LOGZZ_RUN_LOG_PATH estiver vazio).
+    """
+    global _default_run_log
+    if not config.RUN_LOG_PATH:
+        return None
+    with _default_run_log_lock:
+        if _default_run_log is None:
+            _default_run_log = RunLog(config.RUN_LOG_PATH, config.RUN_LOG_MAX_BYTES, config.RUN_LOG_BACKUPS)
+            atexit.register(_default_run_log.close)
+        return _default_run_log
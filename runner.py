@@ -0,0 +1,260 @@
+"""
+Execução de pedidos com navegadores do pool, separada do servidor web.
+
+A mesma classe atende o servidor em processo único e os processos de trabalho
+do supervisor (ver supervisor.py), cada um com seus próprios navegadores.
+"""
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from browser_contexts import SharedChrome
+from browser_pool import ShardedBrowserPool
+from http_filler import fill_with_fallback
+from artifacts import default_recorder
+from job_queue import record_commit
+from offers import OfferRegistry
+from processes import kill_tree
+from results import OrderResult
+from run_log import RunLog
+from stages import OrderProgress, run_once
+import config
+
+# Tipos de tarefa aceitos por OrderRunner.run
+ORDER = "pedido"
+STAGE_ONE = "etapa_um"
+QUOTE = "cotacao"
+
+
+class OrderRunner:
+    """
+    Executa pedidos (ou só a primeira etapa) com navegadores separados por oferta.
+    """
+    def __init__(self, offers: Optional[OfferRegistry] = None, pool: Optional[ShardedBrowserPool] = None,
+                 run_log: Optional[RunLog] = None):
+        """
+        Args:
+            offers: Registro de ofertas; carrega o configurado se omitido
+            pool: Pool de navegadores; cria um com o tamanho de LOGZZ_POOL_SIZE se omitido
+            run_log: Registro onde run grava o resultado de cada tarefa (None para não registrar)
+        """
+        self.offers = offers or OfferRegistry.load()
+        self.run_log = run_log
+        self.shared = None
+        if pool is None:
+            pool, self.shared = browser_pool(config.POOL_SIZE)
+        self.pool = pool
+        # Navegador em uso por cada thread, para cancel
+        self._active: Dict[int, Any] = {}
+
+    def start(self):
+        """
+        Pré-inicia os navegadores da oferta padrão.
+        """
+        self.pool.start(self.offers.default, self.offers.get().url)
+
+    @contextmanager
+    def _browser(self, offer):
+        """
+        Empresta um navegador do pool da oferta e o registra como o da thread atual.
+        """
+        with self.pool.browser(offer.slug, offer.url) as browser:
+            thread_id = threading.get_ident()
+            self._active[thread_id] = browser
+            try:
+                yield browser
+            finally:
+                self._active.pop(thread_id, None)
+
+    def cancel(self, thread_id: int) -> bool:
+        """
+        Encerra à força o navegador da tarefa que roda na thread indicada.
+
+        A tarefa travada recebe um erro do WebDriver e termina; o pool descarta
+        o navegador. Os navegadores das demais tarefas não são afetados.
+
+        Returns:
+            bool: True se a thread estava usando um navegador
+        """
+        browser = self._active.get(thread_id)
+        pids = browser.process_ids() if browser is not None else []
+        if not pids:
+            return False
+        killed = kill_tree(pids[0])
+        logging.warning("%s processos do navegador da tarefa cancelada encerrados", len(killed))
+        return True
+
+    def fill_with_browser(self, data: Dict[str, Any], progress: Optional[OrderProgress] = None,
+                          job_id: Optional[str] = None) -> OrderResult:
+        """
+        Executa as três etapas do formulário com um navegador do pool da oferta.
+
+        Args:
+            data: Dicionário contendo os dados do cliente
+            progress: Onde registrar o progresso das etapas
+            job_id: Id do pedido na fila, usado no resultado e no diretório de artefatos
+        """
+        offer = self.offers.for_order(data)
+        with self._browser(offer) as browser:
+            filler = offer.filler(browser, artifacts=default_recorder(job_id))
+            return filler.fill_all(data, progress=progress)
+
+    def run_order(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa um pedido completo com o motor configurado em LOGZZ_SUBMIT_ENGINE.
+        """
+        on_commit = commit_recorder(job_id)
+        with_browser = lambda order: self.fill_with_browser(order, OrderProgress(on_commit), job_id)
+        if config.SUBMIT_ENGINE == "http":
+            offer = self.offers.for_order(data)
+            return order_result(fill_with_fallback(data, offer.url, with_browser, offer.endpoints, on_commit), job_id)
+        return order_result(with_browser(data), job_id)
+
+    def run_stage_one(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa apenas a primeira etapa (nome e telefone).
+        """
+        offer = self.offers.for_order(data)
+        with self._browser(offer) as browser:
+            filler = offer.filler(browser, artifacts=default_recorder(job_id))
+            filler.progress = OrderProgress()
+            success = run_once(filler.progress, "information", lambda: filler.fill_stage_one(data))
+        return OrderResult.from_filler(filler, success).to_dict()
+
+    def run_quote(self, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa as etapas de informações e endereço e devolve os dias de entrega disponíveis.
+        """
+        offer = self.offers.for_order(data)
+        with self._browser(offer) as browser:
+            filler = offer.filler(browser, artifacts=default_recorder(job_id))
+            days = filler.quote(data)
+        return quote_result(filler, days)
+
+    def run(self, kind: str, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa uma tarefa pelo tipo (ORDER, STAGE_ONE ou QUOTE).
+
+        Args:
+            kind: Tipo da tarefa
+            data: Dicionário contendo os dados do cliente
+            job_id: Id do pedido na fila (JobQueue), se a tarefa veio dela
+        """
+        if self.run_log is None:
+            return self._run(kind, data, job_id)
+        return self.run_log.run(kind, data, job_id, lambda: self._run(kind, data, job_id))
+
+    def _run(self, kind: str, data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+        if kind == STAGE_ONE:
+            return self.run_stage_one(data, job_id)
+        if kind == ORDER:
+            return self.run_order(data, job_id)
+        if kind == QUOTE:
+            return self.run_quote(data, job_id)
+        raise ValueError(f"Tipo de tarefa desconhecido: {kind}")
+
+    def close(self):
+        self.pool.close()
+        if self.shared is not None:
+            self.shared.close()
+
+
+def order_result(result: OrderResult, job_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Converte o resultado de um pedido no dicionário da resposta, com o id do pedido na fila.
+
+    O checkout por HTTP não cria artefatos, então o resultado dele só tem id se o pedido veio da fila.
+    """
+    if job_id:
+        result.job_id = job_id
+    return result.to_dict()
+
+
+def commit_recorder(job_id: Optional[str]):
+    """
+    Função que grava no pedido da fila (LOGZZ_JOB_DB_PATH) a etapa enviada, antes do envio.
+
+    Returns:
+        Função para OrderProgress(on_commit=...), ou None se a tarefa não veio da fila
+    """
+    if not job_id:
+        return None
+
+    def record(stage):
+        try:
+            record_commit(config.JOB_DB_PATH, job_id, stage)
+        except sqlite3.Error as e:
+            logging.error("Não foi possível registrar o envio da etapa '%s' do pedido %s: %s", stage, job_id, e)
+    return record
+
+
+def quote_result(filler, days) -> Dict[str, Any]:
+    """
+    Resultado de uma cotação: o formato de um pedido mais a lista 'dias' da resposta de /cotacao.
+    """
+    result = OrderResult.from_filler(filler, bool(days)).to_dict()
+    result["dias"] = days or []
+    return result
+
+
+def browser_pool(size: int):
+    """
+    Cria o pool de navegadores configurado no ambiente.
+
+    Com LOGZZ_CONTEXTS_PER_CHROME > 0, cada navegador do pool é um contexto
+    isolado em um Chrome compartilhado (ver browser_contexts.py).
+
+    Returns:
+        tuple: O pool e o SharedChrome que hospeda os contextos (ou None)
+    """
+    shared = None
+    if config.CONTEXTS_PER_CHROME > 0:
+        shared = SharedChrome(config.CONTEXTS_PER_CHROME, config.HEADLESS)
+    pool = ShardedBrowserPool(
+        size=size,
+        max_uses=config.POOL_MAX_USES,
+        headless=config.HEADLESS,
+        checkout_timeout=config.POOL_CHECKOUT_TIMEOUT,
+        browser_factory=shared.context if shared else None,
+    )
+    return pool, shared
+
+
+def create_runner(run_log: Optional[RunLog] = None):
+    """
+    Cria o executor do backend configurado em LOGZZ_DRIVER_BACKEND ("selenium" ou "cdp").
+
+    Args:
+        run_log: Registro onde o executor grava o resultado de cada tarefa
+    """
+    if config.DRIVER_BACKEND == "cdp":
+        # Importado só aqui: o backend CDP depende do pacote websockets
+        from async_runner import AsyncOrderRunner
+        return AsyncOrderRunner(run_log=run_log)
+    return OrderRunner(run_log=run_log)
+
+
+def worker_slots() -> int:
+    """
+    Tarefas simultâneas de cada processo de trabalho: uma por navegador (ou aba, no backend CDP).
+    """
+    return config.CDP_MAX_CONTEXTS if config.DRIVER_BACKEND == "cdp" else config.WORKER_BROWSERS
+
+
+def worker_runner():
+    """
+    Cria o executor de um processo de trabalho do supervisor, com LOGZZ_WORKER_BROWSERS
+    navegadores (ou, no backend CDP, um Chrome com LOGZZ_CDP_MAX_CONTEXTS abas).
+
+    O executor do worker não grava o registro de execuções: quem registra é o supervisor.
+    """
+    if config.DRIVER_BACKEND == "cdp":
+        runner = create_runner()
+        runner.start()
+        return runner
+    pool, shared = browser_pool(config.WORKER_BROWSERS)
+    runner = OrderRunner(pool=pool)
+    runner.shared = shared
+    runner.start()
+    return runner
@@ -0,0 +1,336 @@
+"""
+Máquina de estados das etapas do checkout, com retomada a partir da etapa que falhou.
+
+Em vez de refazer o pedido inteiro (nova página, nome e telefone de novo)
+quando a etapa de endereço ou de agendamento falha, a sessão do navegador é
+mantida e apenas a etapa que falhou é tentada de novo, com espera exponencial
+entre as tentativas e um orçamento de tentativas por pedido.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import config
+from metrics import STAGE_RETRIES
+
+# Etapas do checkout, na ordem em que são preenchidas
+STAGES = ["information", "address", "scheduling"]
+
+# Estados de cada etapa no progresso do pedido
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class RetryPolicy:
+    """
+    Quantas vezes e com que espera uma etapa que falhou é tentada de novo.
+    """
+    def __init__(self, stage_retries: int = 2, budget: int = 3, base_delay: float = 1.0,
+                 max_delay: float = 8.0, window: float = 90.0):
+        """
+        Args:
+            stage_retries: Novas tentativas permitidas para cada etapa
+            budget: Total de novas tentativas permitidas no pedido, somando as etapas
+            base_delay: Espera antes da primeira nova tentativa, em segundos (dobra a cada tentativa)
+            max_delay: Espera máxima entre tentativas, em segundos
+            window: Tempo máximo, a partir da primeira falha, em que a sessão é mantida para novas tentativas
+        """
+        self.stage_retries = stage_retries
+        self.budget = budget
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        return cls(
+            stage_retries=config.STAGE_RETRIES,
+            budget=config.STAGE_RETRY_BUDGET,
+            base_delay=config.STAGE_RETRY_BASE_DELAY,
+            max_delay=config.STAGE_RETRY_MAX_DELAY,
+            window=config.STAGE_RETRY_WINDOW,
+        )
+
+    def delay(self, attempt: int) -> float:
+        """
+        Espera antes da nova tentativa de número attempt (1 para a primeira).
+        """
+        return min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+
+
+class OrderProgress:
+    """
+    Progresso de um pedido pelas etapas do checkout.
+    """
+    def __init__(self, on_commit: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            on_commit: Função chamada com o nome da etapa em commit, antes do envio irreversível
+        """
+        self.on_commit = on_commit
+        self.states = {stage: PENDING for stage in STAGES}
+        self.attempts = {stage: 0 for stage in STAGES}
+        self.retries = 0
+        self.history: List[Dict[str, Any]] = []
+        self.first_failure_at: Optional[float] = None
+        # Etapas que já enviaram uma ação que não pode ser repetida (ver commit)
+        self.committed = set()
+
+    @property
+    def current(self) -> Optional[str]:
+        """
+        Primeira etapa ainda não concluída (None se o pedido terminou).
+        """
+        for stage in STAGES:
+            if self.states[stage] != DONE:
+                return stage
+        return None
+
+    def start(self, stage: str):
+        self.states[stage] = RUNNING
+        self.attempts[stage] += 1
+
+    def finish(self, stage: str, success: bool, seconds: float):
+        self.states[stage] = DONE if success else FAILED
+        self.history.append({
+            "etapa": stage,
+            "tentativa": self.attempts[stage],
+            "sucesso": success,
+            "segundos": round(seconds, 3),
+        })
+        if not success and self.first_failure_at is None:
+            self.first_failure_at = time.monotonic()
+
+    def commit(self, stage: str):
+        """
+        Marca que a etapa enviou uma ação irreversível (como a confirmação do dia de entrega).
+
+        A partir daí a etapa não é mais refeita: se falhar, run_stages só verifica
+        se o site aceitou a ação, para não gerar um pedido duplicado.
+        """
+        self.committed.add(stage)
+        if self.on_commit is not None:
+            self.on_commit(stage)
+
+    def skip(self, stage: str):
+        """
+        Marca uma etapa como concluída sem executá-la (a página já passou dela).
+        """
+        self.states[stage] = DONE
+        self.history.append({"etapa": stage, "tentativa": self.attempts[stage], "sucesso": True, "segundos": 0.0})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "etapas": dict(self.states),
+            "tentativas": dict(self.attempts),
+            "novas_tentativas": self.retries,
+            "historico": list(self.history),
+        }
+
+
+def run_stages(stage_functions: Dict[str, Callable[[], bool]], current_stage: Callable[[], int],
+               policy: Optional[RetryPolicy] = None, progress: Optional[OrderProgress] = None,
+               sleep: Callable[[float], None] = time.sleep, confirmed: Optional[Callable[[], bool]] = None) -> bool:
+    """
+    Executa as etapas em ordem, repetindo só a etapa que falhou.
+
+    Antes de cada nova tentativa, verifica em que etapa a página está: se a
+    etapa que "falhou" na verdade avançou (por exemplo, o agendamento apareceu
+    depois do limite de espera), ela é dada como concluída sem ser refeita.
+    Uma etapa que já enviou uma ação irreversível (ver OrderProgress.commit)
+    nunca é refeita: só se verifica, com confirmed, se o pedido foi aceito.
+
+    Args:
+        stage_functions: Função sem argumentos de cada etapa, por nome (ver STAGES)
+        current_stage: Função que retorna o índice (1 a 3) da etapa visível na página
+        policy: Política de novas tentativas; usa a configuração do ambiente se omitida
+        progress: Onde registrar o progresso do pedido
+        sleep: Função de espera (substituível para testes)
+        confirmed: Função que verifica, sem reenviar nada, se o site já confirmou o pedido
+
+    Returns:
+        bool: True se todas as etapas foram concluídas
+    """
+    policy = policy or RetryPolicy.from_config()
+    progress = progress or OrderProgress()
+
+    while progress.current is not None:
+        stage = progress.current
+        if progress.attempts[stage]:
+            # Nova tentativa: conferimos se a etapa já não foi concluída pelo site
+            try:
+                visible = current_stage()
+            except Exception as e:
+                logging.warning("Não foi possível verificar a etapa atual da página: %s", e)
+                visible = 0
+            if _already_passed(stage, visible, progress):
+                continue
+
+        progress.start(stage)
+        started = time.perf_counter()
+        try:
+            success = bool(stage_functions[stage]())
+        except Exception as e:
+            logging.error("Erro inesperado na etapa '%s': %s", stage, e)
+            success = False
+        progress.finish(stage, success, time.perf_counter() - started)
+        if success:
+            continue
+
+        if stage in progress.committed:
+            if _settle_committed(stage, _probe(confirmed), progress):
+                continue
+            return False
+
+        delay = _retry_delay(stage, policy, progress)
+        if delay is None:
+            return False
+        sleep(delay)
+
+    return True
+
+
+async def run_stages_async(stage_functions: Dict[str, Callable[[], Awaitable[bool]]],
+                           current_stage: Callable[[], Awaitable[int]], policy: Optional[RetryPolicy] = None,
+                           progress: Optional[OrderProgress] = None,
+                           confirmed: Optional[Callable[[], Awaitable[bool]]] = None) -> bool:
+    """
+    Versão assíncrona de run_stages, para etapas que são corrotinas.
+    """
+    policy = policy or RetryPolicy.from_config()
+    progress = progress or OrderProgress()
+
+    while progress.current is not None:
+        stage = progress.current
+        if progress.attempts[stage]:
+            try:
+                visible = await current_stage()
+            except Exception as e:
+                logging.warning("Não foi possível verificar a etapa atual da página: %s", e)
+                visible = 0
+            if _already_passed(stage, visible, progress):
+                continue
+
+        progress.start(stage)
+        started = time.perf_counter()
+        try:
+            success = bool(await stage_functions[stage]())
+        except Exception as e:
+            logging.error("Erro inesperado na etapa '%s': %s", stage, e)
+            success = False
+        progress.finish(stage, success, time.perf_counter() - started)
+        if success:
+            continue
+
+        if stage in progress.committed:
+            try:
+                accepted = bool(confirmed is not None and await confirmed())
+            except Exception as e:
+                logging.warning("Não foi possível verificar se o pedido foi confirmado: %s", e)
+                accepted = False
+            if _settle_committed(stage, accepted, progress):
+                continue
+            return False
+
+        delay = _retry_delay(stage, policy, progress)
+        if delay is None:
+            return False
+        await asyncio.sleep(delay)
+
+    return True
+
+
+def run_once(progress: OrderProgress, stage: str, fill: Callable[[], bool]) -> bool:
+    """
+    Executa uma etapa uma única vez, fora de run_stages, registrando o progresso.
+
+    Usada quando só parte do pedido é executada (primeira etapa, cotação), para
+    que o resultado tenha o mesmo formato do pedido completo.
+    """
+    progress.start(stage)
+    started = time.perf_counter()
+    success = False
+    try:
+        success = bool(fill())
+    finally:
+        progress.finish(stage, success, time.perf_counter() - started)
+    return success
+
+
+async def run_once_async(progress: OrderProgress, stage: str, fill: Callable[[], Awaitable[bool]]) -> bool:
+    """
+    Versão assíncrona de run_once.
+    """
+    progress.start(stage)
+    started = time.perf_counter()
+    success = False
+    try:
+        success = bool(await fill())
+    finally:
+        progress.finish(stage, success, time.perf_counter() - started)
+    return success
+
+
+def _already_passed(stage: str, visible: int, progress: OrderProgress) -> bool:
+    """
+    Marca a etapa como concluída se a página já estiver em uma etapa posterior.
+    """
+    if visible > STAGES.index(stage) + 1:
+        logging.info("A página já passou da etapa '%s', seguindo sem refazê-la", stage)
+        progress.skip(stage)
+        return True
+    return False
+
+
+def _probe(confirmed: Optional[Callable[[], bool]]) -> bool:
+    if confirmed is None:
+        return False
+    try:
+        return bool(confirmed())
+    except Exception as e:
+        logging.warning("Não foi possível verificar se o pedido foi confirmado: %s", e)
+        return False
+
+
+def _settle_committed(stage: str, accepted: bool, progress: OrderProgress) -> bool:
+    """
+    Decide o destino de uma etapa que falhou depois de enviar uma ação irreversível.
+
+    Returns:
+        bool: True se o site confirmou o pedido (a etapa é dada como concluída); False se o pedido deve falhar
+    """
+    if accepted:
+        logging.info("A etapa '%s' falhou depois do envio, mas o site confirmou o pedido", stage)
+        progress.skip(stage)
+        return True
+    logging.error("Etapa '%s' falhou depois de enviar a confirmação; não será refeita para evitar pedido duplicado",
+                  stage)
+    return False
+
+
+def _retry_delay(stage: str, policy: RetryPolicy, progress: OrderProgress) -> Optional[float]:
+    """
+    Decide se a etapa que falhou pode ser tentada de novo.
+
+    Returns:
+        float: Espera antes da nova tentativa, ou None se o pedido deve falhar
+    """
+    retries_used = progress.attempts[stage] - 1
+    if retries_used >= policy.stage_retries:
+        logging.error("Etapa '%s' falhou %s vezes, desistindo do pedido", stage, progress.attempts[stage])
+        return None
+    if progress.retries >= policy.budget:
+        logging.error("Orçamento de %s novas tentativas do pedido esgotado na etapa '%s'", policy.budget, stage)
+        return None
+    delay = policy.delay(retries_used + 1)
+    if time.monotonic() + delay - progress.first_failure_at > policy.window:
+        logging.error("Janela de %ss para novas tentativas esgotada na etapa '%s'", policy.window, stage)
+        return None
+
+    progress.retries += 1
+    STAGE_RETRIES.labels(stage).inc()
+    logging.warning("Etapa '%s' falhou; nova tentativa em %.1fs (%s/%s do orçamento)",
+                    stage, delay, progress.retries, policy.budget)
+    return delay
@@ -0,0 +1,466 @@
+"""
+Supervisor de processos de trabalho, cada um com seus próprios navegadores.
+
+Cada worker executa várias tarefas ao mesmo tempo, uma por navegador (ou aba,
+no backend CDP). Um chromedriver travado ou um navegador vazado fica contido no
+processo de trabalho: o supervisor impõe um tempo máximo por tarefa e, quando ele
+é excedido, pede ao worker que encerre só o navegador (ou a aba) daquela tarefa,
+sem derrubar as demais. Se a tarefa não terminar mesmo assim, encerra a árvore de
+processos do worker (worker, chromedriver e Chrome). Também recria workers que
+morreram e recolhe processos do Chrome órfãos ou zumbis.
+"""
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import wait
+from typing import Any, Dict, Optional
+import metrics
+from processes import children, is_zombie, kill_tree, process_name, set_child_subreaper
+from results import OutcomeUnknownError
+
+# Mensagens do supervisor para o worker
+_RUN = "run"
+_CANCEL = "cancel"
+
+
+class WorkerTimeoutError(OutcomeUnknownError):
+    """
+    A tarefa excedeu o tempo máximo e seu navegador foi encerrado.
+    """
+
+
+class WorkerCrashedError(OutcomeUnknownError):
+    """
+    O worker morreu (ou foi encerrado) enquanto executava a tarefa.
+    """
+
+
+class WorkerUnavailableError(Exception):
+    """
+    Nenhum worker ficou livre para a tarefa dentro do limite de espera; ela não chegou a ser executada.
+    """
+
+
+class _Task:
+    def __init__(self, task_id, kind, data, timeout, job_id=None):
+        self.id = task_id
+        self.kind = kind
+        self.data = data
+        self.job_id = job_id
+        self.timeout = timeout
+        self.deadline = None
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+
+class _Worker:
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        # Tarefas em execução no worker, por id
+        self.tasks: Dict[int, _Task] = {}
+        # Tarefas que excederam o tempo máximo e foram canceladas, com o prazo para terminarem
+        self.cancelled: Dict[int, float] = {}
+        self.jobs = 0
+        # Atingiu max_jobs: não recebe novas tarefas e é recriado quando terminar as atuais
+        self.retiring = False
+
+
+def _worker_main(index, conn, target, concurrency=1):
+    """
+    Laço de um processo de trabalho: recebe tarefas pelo pipe e devolve os resultados.
+
+    Até concurrency tarefas são executadas ao mesmo tempo, em threads, cada uma
+    com um navegador do pool do worker. Uma tarefa cancelada pelo supervisor tem
+    o navegador (ou a aba) encerrado por runner.cancel, o que a faz terminar com erro.
+    """
+    # Ctrl+C é tratado pelo supervisor, que encerra os workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s [worker {index}] %(levelname)s %(message)s")
+    module_name, factory_name = target.split(":")
+    runner = getattr(importlib.import_module(module_name), factory_name)()
+    send_lock = threading.Lock()
+    # Thread que executa cada tarefa e tarefas ainda não concluídas, por id
+    threads: Dict[int, int] = {}
+    futures = {}
+
+    def reply(task_id, result, error):
+        with send_lock:
+            try:
+                conn.send((task_id, result, error))
+            except Exception:
+                # Exceção que não pode ser serializada: mandamos só a mensagem
+                conn.send((task_id, None, RuntimeError(f"{type(error).__name__}: {error}")))
+
+    def execute(task_id, kind, data, job_id):
+        threads[task_id] = threading.get_ident()
+        try:
+            result, error = runner.run(kind, data, job_id), None
+        except Exception as e:
+            result, error = None, e
+        finally:
+            threads.pop(task_id, None)
+        reply(task_id, result, error)
+
+    def cancel(task_id):
+        future = futures.get(task_id)
+        if future is not None and future.cancel():
+            reply(task_id, None, RuntimeError("Tarefa cancelada antes de começar"))
+        elif task_id in threads and not runner.cancel(threads[task_id]):
+            logging.warning("Tarefa %s sem navegador para encerrar; aguardando que termine", task_id)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"worker-{index}")
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                return
+            if message is None:
+                return
+            if message[0] == _CANCEL:
+                cancel(message[1])
+                continue
+            task_id = message[1]
+            future = executor.submit(execute, *message[1:])
+            futures[task_id] = future
+            future.add_done_callback(lambda _, task_id=task_id: futures.pop(task_id, None))
+    finally:
+        executor.shutdown(wait=True)
+        runner.close()
+
+
+class Supervisor:
+    """
+    Distribui tarefas entre N processos de trabalho e mantém esses processos saudáveis.
+    """
+    def __init__(self, workers=2, task_timeout=180, max_jobs=200, target="runner:worker_runner", reap_interval=5,
+                 tasks_per_worker=1, cancel_grace=15, queue_timeout=60, run_log=None):
+        """
+        Args:
+            workers (int): Quantidade de processos de trabalho
+            tasks_per_worker (int): Tarefas simultâneas por worker (normalmente, os navegadores de cada um)
+            task_timeout (float): Tempo máximo (segundos) de cada tarefa antes de encerrar o navegador dela
+            max_jobs (int): Tarefas após as quais o worker é recriado (0 para nunca), mantendo a memória estável
+            target (str): "modulo:funcao" que cria, no worker, o objeto com run(kind, data, job_id),
+                          cancel(thread_id) e close()
+            reap_interval (float): Intervalo (segundos) entre as buscas por processos órfãos e zumbis
+            cancel_grace (float): Tempo (segundos) para uma tarefa cancelada terminar antes de o worker
+                                  inteiro ser encerrado
+            queue_timeout (float): Tempo máximo (segundos) de espera por uma vaga em algum worker
+            run_log (RunLog): Registro onde o resultado de cada tarefa é gravado, por este processo
+                              (os workers não escrevem nele)
+        """
+        self.workers = workers
+        self.task_timeout = task_timeout
+        self.cancel_grace = cancel_grace
+        self.queue_timeout = queue_timeout
+        self.max_jobs = max_jobs
+        self.target = target
+        self.reap_interval = reap_interval
+        self.tasks_per_worker = max(1, tasks_per_worker)
+        self.run_log = run_log
+
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = []
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wakeup_recv, self._wakeup_send = self._context.Pipe(duplex=False)
+        self._ids = itertools.count(1)
+        self._stopping = False
+        self._thread = None
+        self._last_reap = 0.0
+        # Pids de workers aposentados que ainda estão terminando (ver _retire)
+        self._retiring_pids = set()
+
+    def start(self):
+        """
+        Inicia os workers e a thread que os monitora.
+        """
+        if set_child_subreaper():
+            logging.info("Supervisor adotará processos do Chrome que ficarem órfãos")
+        logging.info("Iniciando %s processos de trabalho", self.workers)
+        for index in range(self.workers):
+            self._workers.append(self._spawn(index))
+        self._thread = threading.Thread(target=self._monitor_loop, name="supervisor", daemon=True)
+        self._thread.start()
+
+    def run(self, kind: str, data: Dict[str, Any], timeout: Optional[float] = None,
+            job_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa uma tarefa em um worker e aguarda o resultado.
+
+        Args:
+            kind: Tipo da tarefa (ver runner.ORDER, runner.STAGE_ONE e runner.QUOTE)
+            data: Dicionário contendo os dados do cliente
+            timeout: Tempo máximo de execução; usa task_timeout se omitido
+            job_id: Id do pedido na fila, repassado a runner.run
+
+        Returns:
+            dict: Resultado devolvido pelo worker
+
+        Raises:
+            WorkerUnavailableError: Se nenhum worker ficou livre dentro de queue_timeout
+            WorkerTimeoutError: Se a tarefa excedeu o tempo máximo
+            WorkerCrashedError: Se o worker morreu durante a tarefa
+            RuntimeError: Se o supervisor não foi iniciado ou já foi encerrado
+            Exception: A exceção levantada pela tarefa no worker
+        """
+        if self.run_log is None:
+            return self._run(kind, data, timeout, job_id)
+        return self.run_log.run(kind, data, job_id, lambda: self._run(kind, data, timeout, job_id))
+
+    def _run(self, kind, data, timeout, job_id):
+        task = _Task(next(self._ids), kind, data, self.task_timeout if timeout is None else timeout, job_id)
+        with self._lock:
+            if self._stopping:
+                raise RuntimeError("Supervisor encerrado")
+            if self._thread is None or not self._thread.is_alive():
+                raise RuntimeError("Supervisor não iniciado")
+            self._pending.append(task)
+        self._wake()
+        if not task.done.wait(self.queue_timeout):
+            with self._lock:
+                if task in self._pending:
+                    self._pending.remove(task)
+                    raise WorkerUnavailableError(f"Nenhum worker livre após {self.queue_timeout}s")
+            # Já está em execução: o monitor a encerra no tempo máximo, mas não esperamos além dele
+            if not task.done.wait(task.timeout + self.cancel_grace + self.reap_interval):
+                raise WorkerTimeoutError(f"Tarefa excedeu {task.timeout}s; o pedido pode ter sido enviado")
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            busy = sum(len(worker.tasks) + len(worker.cancelled) for worker in self._workers)
+            return {
+                "workers": len(self._workers),
+                "alive": sum(1 for worker in self._workers if worker.process.is_alive()),
+                "capacity": len(self._workers) * self.tasks_per_worker,
+                "busy": busy,
+                "pending": len(self._pending),
+            }
+
+    def stop(self, timeout=10):
+        """
+        Encerra os workers (e os navegadores deles) e falha as tarefas pendentes.
+        """
+        with self._lock:
+            self._stopping = True
+            pending, self._pending = list(self._pending), deque()
+        for task in pending:
+            task.finish(error=RuntimeError("Supervisor encerrado"))
+        self._wake()
+        if self._thread:
+            self._thread.join(timeout)
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                kill_tree(worker.process.pid)
+                worker.process.join(1)
+            for task in worker.tasks.values():
+                task.finish(error=RuntimeError("Supervisor encerrado"))
+        self._workers = []
+        self._reap()
+
+    def _spawn(self, index):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(index, child_conn, self.target, self.tasks_per_worker),
+            name=f"logzz-worker-{index}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        logging.info("Worker %s iniciado (pid %s)", index, process.pid)
+        return _Worker(index, process, parent_conn)
+
+    def _wake(self):
+        try:
+            self._wakeup_send.send_bytes(b"1")
+        except (OSError, ValueError):
+            pass
+
+    def _monitor_loop(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                workers = list(self._workers)
+            ready = wait([self._wakeup_recv] + [worker.conn for worker in workers], timeout=0.5)
+            if self._wakeup_recv in ready:
+                while self._wakeup_recv.poll():
+                    self._wakeup_recv.recv_bytes()
+            for worker in workers:
+                if worker.conn in ready:
+                    self._receive(worker)
+            self._check_workers()
+            self._dispatch()
+            if time.monotonic() - self._last_reap >= self.reap_interval:
+                self._reap()
+
+    def _receive(self, worker):
+        try:
+            task_id, result, error = worker.conn.recv()
+        except (EOFError, OSError):
+            # O worker morreu; _check_workers trata a tarefa e recria o processo
+            return
+        if worker.cancelled.pop(task_id, None) is not None:
+            # Quem esperava já recebeu WorkerTimeoutError: só liberamos a vaga
+            logging.info("Tarefa cancelada %s terminou no worker %s", task_id, worker.index)
+        task = worker.tasks.pop(task_id, None)
+        if task is not None:
+            task.finish(result, error)
+        if worker.retiring and not worker.tasks and not worker.cancelled:
+            self._retire(worker)
+
+    def _check_workers(self):
+        now = time.monotonic()
+        for worker in list(self._workers):
+            if not worker.process.is_alive():
+                logging.error("Worker %s morreu (código %s), recriando", worker.index, worker.process.exitcode)
+                metrics.WORKER_RESTARTS.labels("crash").inc()
+                self._fail_tasks(worker, f"Worker {worker.index} morreu durante a tarefa")
+                self._replace(worker)
+                continue
+            for task in [task for task in worker.tasks.values() if now > task.deadline]:
+                self._cancel(worker, task, now)
+            if any(now > deadline for deadline in worker.cancelled.values()):
+                logging.error("Tarefa cancelada não terminou em %ss no worker %s, encerrando o worker e seus navegadores",
+                              self.cancel_grace, worker.index)
+                metrics.WORKER_RESTARTS.labels("timeout").inc()
+                # As demais tarefas do worker morrem com ele
+                self._fail_tasks(worker, f"Worker {worker.index} encerrado por tarefa que não respondeu ao cancelamento")
+                self._replace(worker)
+
+    def _cancel(self, worker, task, now):
+        """
+        Responde com WorkerTimeoutError a quem espera a tarefa e pede ao worker que encerre o navegador dela.
+
+        A vaga da tarefa continua ocupada até o worker confirmar que ela terminou (ver _receive).
+        """
+        logging.error("Tarefa %s excedeu %ss no worker %s, encerrando o navegador dela",
+                      task.id, task.timeout, worker.index)
+        metrics.TASKS_CANCELLED.inc()
+        worker.tasks.pop(task.id)
+        worker.cancelled[task.id] = now + self.cancel_grace
+        task.finish(error=WorkerTimeoutError(f"Tarefa excedeu {task.timeout}s; o pedido pode ter sido enviado"))
+        try:
+            worker.conn.send((_CANCEL, task.id))
+        except (OSError, ValueError):
+            pass
+
+    def _fail_tasks(self, worker, message):
+        """
+        Falha as tarefas em andamento de um worker que será encerrado.
+
+        Não se sabe até onde cada uma chegou, então o erro avisa que o pedido
+        pode ter sido enviado, para que não seja reenviado automaticamente.
+        """
+        tasks, worker.tasks = list(worker.tasks.values()), {}
+        worker.cancelled = {}
+        for task in tasks:
+            task.finish(error=WorkerCrashedError(f"{message}; resultado desconhecido, o pedido pode ter sido enviado"))
+
+    def _replace(self, worker):
+        """
+        Encerra o worker (com toda a árvore de processos) e coloca outro no lugar.
+        """
+        if worker.process.is_alive():
+            killed = kill_tree(worker.process.pid)
+            logging.warning("%s processos do worker %s encerrados", len(killed), worker.index)
+        worker.process.join(5)
+        worker.conn.close()
+        replacement = self._spawn(worker.index)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+        self._reap()
+
+    def _retire(self, worker):
+        """
+        Coloca um worker novo no lugar de um que atingiu max_jobs e encerra o antigo em segundo plano.
+
+        O antigo fecha os próprios navegadores ao sair, o que pode levar alguns
+        segundos: esperar por ele aqui pararia o monitor e, com ele, os limites
+        de tempo e a detecção de falhas dos demais workers.
+        """
+        logging.info("Worker %s atingiu %s tarefas, recriando", worker.index, worker.jobs)
+        replacement = self._spawn(worker.index)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = replacement
+            self._retiring_pids.add(worker.process.pid)
+        threading.Thread(target=self._stop_retired, args=(worker,), name=f"retire-worker-{worker.index}",
+                         daemon=True).start()
+
+    def _stop_retired(self, worker, timeout=10):
+        try:
+            worker.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        worker.process.join(timeout)
+        if worker.process.is_alive():
+            killed = kill_tree(worker.process.pid)
+            logging.warning("%s processos do worker aposentado %s encerrados", len(killed), worker.index)
+            worker.process.join(5)
+        worker.conn.close()
+        with self._lock:
+            self._retiring_pids.discard(worker.process.pid)
+
+    def _dispatch(self):
+        with self._lock:
+            for worker in self._workers:
+                while self._pending and len(worker.tasks) + len(worker.cancelled) < self.tasks_per_worker:
+                    if worker.retiring or not worker.process.is_alive():
+                        break
+                    task = self._pending.popleft()
+                    try:
+                        worker.conn.send((_RUN, task.id, task.kind, task.data, task.job_id))
+                    except (OSError, ValueError):
+                        self._pending.appendleft(task)
+                        break
+                    task.deadline = time.monotonic() + task.timeout
+                    worker.tasks[task.id] = task
+                    worker.jobs += 1
+                    if self.max_jobs and worker.jobs >= self.max_jobs:
+                        worker.retiring = True
+
+    def _reap(self):
+        """
+        Recolhe processos filhos zumbis e encerra processos do Chrome órfãos adotados.
+        """
+        self._last_reap = time.monotonic()
+        with self._lock:
+            worker_pids = {worker.process.pid for worker in self._workers} | self._retiring_pids
+        for pid in children(os.getpid()):
+            if pid in worker_pids:
+                continue
+            if is_zombie(pid):
+                try:
+                    os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    pass
+                continue
+            name = process_name(pid) or ""
+            if "chrom" in name or "headless_shell" in name:
+                logging.warning("Encerrando processo órfão %s (pid %s)", name, pid)
+                kill_tree(pid)
+                metrics.ORPHANS_REAPED.inc()
@@ -0,0 +1,136 @@
+"""
+Expiração, descarte LRU e persistência dos caches locais.
+"""
+import json
+import os
+
+import pytest
+
+import cache
+from cache import CepCache, TTLCache
+
+
+class Clock:
+    """
+    Relógio controlado pelo teste, no lugar do módulo time usado pelo cache.
+    """
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def test_item_expires_after_ttl(clock):
+    items = TTLCache(ttl=10)
+    items.put("a", 1)
+
+    clock.now += 9
+    assert items.get("a") == 1
+    clock.now += 2
+    assert items.get("a") is None
+    assert items.stats()["itens"] == 0
+
+
+def test_per_item_ttl_overrides_default(clock):
+    items = TTLCache(ttl=10)
+    items.put("a", 1, ttl=100)
+
+    clock.now += 50
+    assert items.get("a") == 1
+
+
+def test_least_recently_used_item_is_evicted():
+    items = TTLCache(ttl=60, max_items=2)
+    items.put("a", 1)
+    items.put("b", 2)
+    items.get("a")
+    items.put("c", 3)
+
+    assert items.get("b") is None
+    assert items.get("a") == 1
+    assert items.get("c") == 3
+
+
+def test_stats_count_hits_and_misses():
+    items = TTLCache(ttl=60)
+    items.put("a", 1)
+    items.get("a")
+    items.get("b")
+
+    assert items.stats() == {"itens": 1, "acertos": 1, "faltas": 1, "taxa_acerto": 0.5}
+
+
+def test_save_and_load_round_trip_skips_expired_items(tmp_path, clock):
+    path = str(tmp_path / "cache.json")
+    items = TTLCache(ttl=60, path=path)
+    items.put("a", {"x": 1})
+    items.put("b", 2, ttl=5)
+    items.save()
+
+    clock.now += 10
+    reloaded = TTLCache(ttl=60, path=path)
+
+    assert reloaded.get("a") == {"x": 1}
+    assert reloaded.get("b") is None
+
+
+def test_save_leaves_no_temporary_files(tmp_path):
+    path = str(tmp_path / "cache.json")
+    items = TTLCache(ttl=60, path=path)
+    items.put("a", 1)
+    items.save()
+
+    assert os.listdir(tmp_path) == ["cache.json"]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["a"][1] == 1
+
+
+def test_failed_save_is_retried_later(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.json")
+    items = TTLCache(ttl=60, path=path)
+    items.put("a", 1)
+
+    def fail(src, dst):
+        raise OSError("disco cheio")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(cache.os, "replace", fail)
+        items.save()
+    assert os.listdir(tmp_path) == []
+
+    items.save()
+    assert os.listdir(tmp_path) == ["cache.json"]
+
+
+def test_cep_cache_normalizes_and_ignores_incomplete_addresses():
+    ceps = CepCache(ttl=60)
+    ceps.put_address("01001-000", "Praça da Sé", "Sé")
+    ceps.put_address("02002-000", "", "Santana")
+    ceps.put_address("123", "Rua A", "Centro")
+
+    assert ceps.get_address("01001000") == {"logradouro": "Praça da Sé", "bairro": "Sé"}
+    assert ceps.get_address("02002-000") is None
+    assert ceps.stats()["itens"] == 1
+
+
+def test_cep_cache_prewarm_uses_only_complete_records():
+    ceps = CepCache(ttl=60)
+    records = [
+        {"endereco": {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé"}},
+        {"endereco": {"cep": "02002-000"}},
+        {"nome": "Sem endereço"},
+    ]
+
+    assert ceps.prewarm(records) == 1
+    assert ceps.get_address("01001-000")["bairro"] == "Sé"
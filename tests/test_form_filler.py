@@ -0,0 +1,74 @@
+"""
+Checkout pelo Chrome contra o servidor local que imita a Logzz (mock_logzz.py).
+
+Os testes são pulados quando o Chrome não está instalado na máquina.
+"""
+import shutil
+
+import pytest
+
+import config
+import mock_logzz
+from artifacts import OFF, ArtifactRecorder
+from browser import Browser
+from cache import CepCache
+from form_filler import LogzzFormFiller
+
+OFFER_PATH = "/pay/MOCK/oferta-teste"
+CHROME_NAMES = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+
+
+@pytest.fixture(scope="module")
+def offer_url():
+    base_url, server = mock_logzz.serve_in_background()
+    yield base_url + OFFER_PATH
+    server.shutdown()
+
+
+@pytest.fixture
+def browser():
+    if not config.CHROME_BINARY and not any(shutil.which(name) for name in CHROME_NAMES):
+        pytest.skip("Chrome não encontrado")
+    browser = Browser(headless=True)
+    try:
+        browser.start()
+    except Exception as e:
+        pytest.skip(f"Não foi possível iniciar o Chrome: {e}")
+    yield browser
+    browser.close()
+
+
+def filler_for(browser, offer_url, cep_cache=None):
+    cep_cache = cep_cache or CepCache(config.CEP_CACHE_TTL, config.CEP_CACHE_MAX_ITEMS)
+    return LogzzFormFiller(browser, url=offer_url, artifacts=ArtifactRecorder(None, OFF), cep_cache=cep_cache)
+
+
+def order(**extra):
+    data = {
+        "nome": "Maria da Silva",
+        "telefone": "11999998888",
+        "endereco": {"cep": "01001-000", "numero": "100"},
+    }
+    data.update(extra)
+    return data
+
+
+def test_fill_stage_one(browser, offer_url):
+    assert filler_for(browser, offer_url).fill_stage_one(order())
+
+
+def test_fill_all_completes_order(browser, offer_url):
+    result = filler_for(browser, offer_url).fill_all(order(data_index="1"))
+
+    assert result, result.failure_reason
+    assert result.stage_reached == "scheduling"
+    assert result.selected_day == result.days[1]
+
+
+def test_fill_all_with_cached_address(browser, offer_url):
+    cep_cache = CepCache(config.CEP_CACHE_TTL, config.CEP_CACHE_MAX_ITEMS)
+    cep_cache.put_address("01001-000", "Praça da Sé", "Sé")
+
+    result = filler_for(browser, offer_url, cep_cache).fill_all(order())
+
+    assert result, result.failure_reason
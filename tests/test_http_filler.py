@@ -0,0 +1,86 @@
+"""
+Checkout por HTTP contra o servidor local que imita a Logzz (mock_logzz.py).
+"""
+import pytest
+import mock_logzz
+from http_filler import LogzzHttpFiller, fill_with_fallback
+
+OFFER_PATH = "/pay/MOCK/oferta-teste"
+
+
+@pytest.fixture(scope="module")
+def offer_url():
+    base_url, server = mock_logzz.serve_in_background()
+    yield base_url + OFFER_PATH
+    server.shutdown()
+
+
+def order(**extra):
+    data = {
+        "nome": "Maria da Silva",
+        "telefone": "11999998888",
+        "endereco": {"cep": "01001-000", "numero": "100", "logradouro": "Praça da Sé", "bairro": "Sé"},
+    }
+    data.update(extra)
+    return data
+
+
+def test_fill_all_completes_order(offer_url):
+    filler = LogzzHttpFiller(offer_url)
+    result = filler.fill_all(order(data_index="1"))
+
+    assert result
+    assert filler.accepted == ["information", "address", "scheduling"]
+    assert result.stage_reached == "scheduling"
+    assert result.selected_day == result.days[1]
+    assert set(result.stage_seconds) == {"information", "address", "scheduling"}
+
+
+def test_fill_all_chooses_day_by_date(offer_url):
+    wanted = mock_logzz.available_days()[2]["value"]
+    result = LogzzHttpFiller(offer_url).fill_all(order(data_entrega=wanted))
+
+    assert result
+    assert result.selected_day["valor"] == wanted
+
+
+def test_unavailable_delivery_date_fails_without_submitting(offer_url):
+    filler = LogzzHttpFiller(offer_url)
+    result = filler.fill_all(order(data_entrega="1999-01-01", data_index="1"))
+
+    assert not result
+    assert result.failed_stage == "scheduling"
+    assert "1999-01-01" in result.failure_reason
+    assert result.selected_day is None
+    assert "scheduling" not in filler.accepted
+
+
+@pytest.mark.parametrize("data_index", [99, -1, "abc"])
+def test_invalid_day_index_fails_without_submitting(offer_url, data_index):
+    filler = LogzzHttpFiller(offer_url)
+    result = filler.fill_all(order(data_index=data_index))
+
+    assert not result
+    assert result.failed_stage == "scheduling"
+    assert result.failure_reason
+    assert "scheduling" not in filler.accepted
+
+
+def test_flow_change_before_any_accepted_stage_uses_browser(offer_url):
+    calls = []
+    result = fill_with_fallback(order(), offer_url, lambda data: calls.append(data) or True,
+                                endpoints={"information": "etapa-inexistente"})
+
+    assert result is True
+    assert len(calls) == 1
+
+
+def test_flow_change_after_accepted_stage_does_not_resubmit(offer_url):
+    calls = []
+    result = fill_with_fallback(order(), offer_url, lambda data: calls.append(data) or True,
+                                endpoints={"scheduling": "etapa-inexistente"})
+
+    assert calls == []
+    assert not result
+    assert result.failed_stage == "scheduling"
+    assert "Fluxo HTTP" in result.failure_reason
@@ -0,0 +1,141 @@
+"""
+Chave de idempotência e deduplicação de pedidos concorrentes.
+"""
+import threading
+import time
+
+import pytest
+
+from cache import TTLCache
+from idempotency import SingleFlight, idempotency_key
+
+
+def order(**extra):
+    data = {
+        "nome": "Maria da Silva",
+        "telefone": "(11) 99999-8888",
+        "endereco": {"cep": "01001-000", "numero": "100", "logradouro": "Praça da Sé"},
+    }
+    data.update(extra)
+    return data
+
+
+def test_key_ignores_field_order():
+    reordered = {
+        "endereco": {"logradouro": "Praça da Sé", "numero": "100", "cep": "01001-000"},
+        "telefone": "(11) 99999-8888",
+        "nome": "Maria da Silva",
+    }
+
+    assert idempotency_key(reordered) == idempotency_key(order())
+
+
+def test_key_ignores_whitespace_case_and_punctuation_in_digit_fields():
+    noisy = {
+        "nome": "  maria   DA silva ",
+        "telefone": "11999998888",
+        "endereco": {"cep": "01001000", "numero": " 100 ", "logradouro": "praça  da sé"},
+    }
+
+    assert idempotency_key(noisy) == idempotency_key(order())
+
+
+def test_key_ignores_callback_url():
+    assert idempotency_key(order(callback_url="http://exemplo/retorno")) == idempotency_key(order())
+
+
+def test_key_changes_with_the_order():
+    assert idempotency_key(order(data_index=1)) != idempotency_key(order())
+    assert idempotency_key(order(nome="João")) != idempotency_key(order())
+
+
+def test_supplied_key_wins():
+    assert idempotency_key(order(), "  chave-do-cliente ") == "chave-do-cliente"
+    assert idempotency_key(order(), "   ") == idempotency_key(order())
+
+
+@pytest.fixture
+def flights():
+    return SingleFlight(TTLCache(60))
+
+
+def test_concurrent_identical_requests_run_once(flights):
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def fill():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"sucesso": True, "id": len(calls)}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.run("chave", fill))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    # Todos os reenvios chegam enquanto o primeiro ainda está em andamento
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == [{"sucesso": True, "id": 1}] * 5
+    assert flights.in_flight() == 0
+
+
+def test_successful_result_is_reused(flights):
+    calls = []
+
+    def fill():
+        calls.append(1)
+        return {"sucesso": True}
+
+    flights.run("chave", fill)
+    flights.run("chave", fill)
+
+    assert calls == [1]
+
+
+def test_failed_result_can_be_retried(flights):
+    calls = []
+
+    def fill():
+        calls.append(1)
+        return {"sucesso": False}
+
+    flights.run("chave", fill)
+    flights.run("chave", fill)
+
+    assert calls == [1, 1]
+
+
+def test_waiters_receive_the_leader_error(flights):
+    started = threading.Event()
+    release = threading.Event()
+
+    def fill():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("navegador travou")
+
+    errors = []
+
+    def run():
+        try:
+            flights.run("chave", fill)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=run) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["navegador travou"] * 3
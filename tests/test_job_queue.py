@@ -0,0 +1,79 @@
+"""
+Recuperação de pedidos da fila depois de uma queda do processo.
+"""
+import time
+
+import pytest
+
+from job_queue import FAILED, INTERRUPTED, QUEUED, RUNNING, JobQueue, record_commit
+from results import OutcomeUnknownError
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def wait_for(queue, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Pedido {job_id} ficou em {queue.get(job_id)['status']}")
+
+
+def crash_while_running(db_path, committed_stage=None):
+    """
+    Deixa um pedido em execução no banco, como se o processo tivesse caído no meio dele.
+    """
+    queue = JobQueue(db_path, lambda data, job_id: {"sucesso": True}, workers=0)
+    job_id, _ = queue.submit({"nome": "Maria"}, idempotency_key="chave")
+    queue._claim_next()
+    if committed_stage:
+        record_commit(db_path, job_id, committed_stage)
+    return job_id
+
+
+def test_restart_requeues_job_that_submitted_nothing(db_path):
+    job_id = crash_while_running(db_path)
+
+    queue = JobQueue(db_path, lambda data, job_id: {"sucesso": True}, workers=0)
+    queue.start()
+
+    assert queue.get(job_id)["status"] == QUEUED
+
+
+def test_restart_does_not_rerun_job_that_submitted_confirmation(db_path):
+    job_id = crash_while_running(db_path, committed_stage="scheduling")
+    calls = []
+
+    queue = JobQueue(db_path, lambda data, job_id: calls.append(job_id) or {"sucesso": True}, workers=1)
+    queue.start()
+    time.sleep(0.3)
+    queue.stop()
+
+    job = queue.get(job_id)
+    assert job["status"] == INTERRUPTED
+    assert job["etapa_enviada"] == "scheduling"
+    assert job["erro"]
+    assert calls == []
+    assert queue.submit({"nome": "Maria"}, idempotency_key="chave") == (job_id, False)
+
+
+@pytest.mark.parametrize("committed_stage, status", [(None, FAILED), ("scheduling", INTERRUPTED)])
+def test_lost_worker_is_interrupted_only_after_commit(db_path, committed_stage, status):
+    def run_job(data, job_id):
+        if committed_stage:
+            record_commit(db_path, job_id, committed_stage)
+        raise OutcomeUnknownError("Worker morreu durante a tarefa")
+
+    queue = JobQueue(db_path, run_job, workers=1)
+    queue.start()
+    job_id, _ = queue.submit({"nome": "Maria"})
+    job = wait_for(queue, job_id, (FAILED, INTERRUPTED))
+    queue.stop()
+
+    assert job["status"] == status
+    assert queue.stats()[RUNNING] == 0
@@ -0,0 +1,106 @@
+"""
+Página do checkout local (mock_logzz.py) conferida com os seletores de locators.py, sem navegador.
+
+Se o site mudar e locators.py for atualizado, a página de teste precisa acompanhar;
+caso contrário os testes com o Chrome passam a medir só as estratégias de reserva.
+"""
+import re
+from html.parser import HTMLParser
+
+import pytest
+
+import mock_logzz
+from locators import DEFAULT_LOCATORS
+
+VOID_TAGS = {"area", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+# Só os seletores no formato //*[@id="..."]/tag[n]/..., que não dependem de um mecanismo de XPath
+ID_PATH = re.compile(r'^//\*\[@id="(?P<id>[^"]+)"\](?P<steps>(?:/\w+(?:\[\d+\])?)*)$')
+STEP = re.compile(r"(\w+)(?:\[(\d+)\])?")
+# Os cards de dia são criados pelo JavaScript da página
+RENDERED_BY_SCRIPT = {"day"}
+
+
+class Node:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.parent = parent
+        self.children = []
+
+
+class PageParser(HTMLParser):
+    """
+    Monta a árvore da página; o conteúdo de <template> entra como filho, como fica depois de inserido.
+    """
+    def __init__(self):
+        super().__init__()
+        self.root = Node("#document", [])
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+
+def walk(node):
+    yield node
+    for child in node.children:
+        yield from walk(child)
+
+
+def resolve(root, xpath):
+    """
+    Elementos encontrados por um seletor //*[@id="..."]/tag[n]/... na árvore.
+    """
+    match = ID_PATH.match(xpath)
+    nodes = [node for node in walk(root) if node.attrs.get("id") == match["id"]]
+    for tag, position in STEP.findall(match["steps"]):
+        found = []
+        for node in nodes:
+            children = [child for child in node.children if child.tag == tag]
+            found.extend(children[int(position) - 1:int(position)] if position else children)
+        nodes = found
+    return nodes
+
+
+@pytest.fixture(scope="module")
+def page():
+    parser = PageParser()
+    parser.feed(mock_logzz.PAGE_TEMPLATE.format(token="token", days_latency=0))
+    return parser.root
+
+
+@pytest.mark.parametrize("field", sorted(set(DEFAULT_LOCATORS) - RENDERED_BY_SCRIPT))
+def test_preferred_locator_matches_the_mock_page(page, field):
+    preferred = DEFAULT_LOCATORS[field][0]
+    if not ID_PATH.match(preferred.value):
+        pytest.skip(f"Seletor preferido de '{field}' não é um caminho a partir de um id")
+
+    nodes = resolve(page, preferred.value)
+
+    assert len(nodes) == 1, f"{field}: {preferred.value} encontrou {len(nodes)} elementos"
+    assert nodes[0].tag in ("input", "textarea", "button")
+
+
+@pytest.mark.parametrize("field, element_id", [
+    ("name", "order_name"),
+    ("phone", "order_phone"),
+    ("cep", "order_zipcode"),
+    ("street", "order_address"),
+    ("neighborhood", "order_neighborhood"),
+    ("number", "order_address_number"),
+    ("complement", "order_address_complement"),
+])
+def test_locator_finds_the_expected_field(page, field, element_id):
+    [node] = resolve(page, DEFAULT_LOCATORS[field][0].value)
+
+    assert node.attrs["id"] == element_id
@@ -0,0 +1,59 @@
+"""
+Registro de execuções gravado por quem finaliza o resultado da tarefa.
+"""
+import json
+
+import pytest
+
+from run_log import RunLog
+from supervisor import Supervisor, WorkerTimeoutError
+
+
+@pytest.fixture
+def run_log(tmp_path):
+    run_log = RunLog(str(tmp_path / "runs.jsonl"))
+    yield run_log
+    run_log.close()
+
+
+def lines(run_log):
+    run_log.close()
+    with open(run_log.path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_run_records_the_result(run_log):
+    result = run_log.run("pedido", {"oferta": "padrao"}, "job-1", lambda: {"sucesso": True, "id": "job-1"})
+
+    assert result == {"sucesso": True, "id": "job-1"}
+    [line] = lines(run_log)
+    assert line["tipo"] == "pedido"
+    assert line["oferta"] == "padrao"
+    assert line["sucesso"] is True
+
+
+def test_run_records_the_failure_and_reraises(run_log):
+    def fail():
+        raise RuntimeError("navegador travou")
+
+    with pytest.raises(RuntimeError):
+        run_log.run("pedido", {}, "job-1", fail)
+
+    [line] = lines(run_log)
+    assert line["sucesso"] is False
+    assert line["id"] == "job-1"
+    assert line["motivo_falha"] == "navegador travou"
+
+
+def test_supervisor_records_tasks_lost_in_the_worker(run_log):
+    supervisor = Supervisor(workers=1, task_timeout=1, max_jobs=0, target="test_supervisor:FakeRunner",
+                            cancel_grace=1, run_log=run_log)
+    supervisor.start()
+    try:
+        supervisor.run("ok", {})
+        with pytest.raises(WorkerTimeoutError):
+            supervisor.run("stuck", {})
+    finally:
+        supervisor.stop()
+
+    assert [line["sucesso"] for line in lines(run_log)] == [True, False]
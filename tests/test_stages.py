@@ -0,0 +1,167 @@
+"""
+Máquina de estados das etapas, com etapas falsas no lugar do navegador.
+"""
+import asyncio
+
+from stages import DONE, OrderProgress, RetryPolicy, run_stages, run_stages_async
+
+POLICY = RetryPolicy(stage_retries=2, budget=3, base_delay=0, max_delay=0)
+
+
+class FakeCheckout:
+    """
+    Etapas que respondem conforme um roteiro e contam as chamadas.
+
+    Args:
+        outcomes: Resultados de cada chamada, por etapa (depois do roteiro, sucesso)
+        visible: Etapa visível na página informada em cada nova tentativa
+        commit_on: Etapa que marca o commit antes de responder
+    """
+    def __init__(self, outcomes=None, visible=1, commit_on=None):
+        self.outcomes = {stage: list(results) for stage, results in (outcomes or {}).items()}
+        self.visible = visible
+        self.commit_on = commit_on
+        self.progress = OrderProgress()
+        self.calls = []
+
+    def stage(self, name):
+        def fill():
+            self.calls.append(name)
+            if name == self.commit_on:
+                self.progress.commit(name)
+            results = self.outcomes.get(name)
+            return results.pop(0) if results else True
+        return fill
+
+    def functions(self):
+        return {name: self.stage(name) for name in ("information", "address", "scheduling")}
+
+    def run(self, confirmed=None):
+        return run_stages(self.functions(), lambda: self.visible, policy=POLICY, progress=self.progress,
+                          sleep=lambda seconds: None, confirmed=confirmed)
+
+
+def test_runs_every_stage_once_in_order():
+    checkout = FakeCheckout()
+
+    assert checkout.run()
+    assert checkout.calls == ["information", "address", "scheduling"]
+
+
+def test_retry_replays_only_the_failed_stage():
+    checkout = FakeCheckout({"address": [False]})
+
+    assert checkout.run()
+    assert checkout.calls == ["information", "address", "address", "scheduling"]
+    assert checkout.progress.retries == 1
+
+
+def test_stage_the_site_already_passed_is_not_replayed():
+    checkout = FakeCheckout({"address": [False]}, visible=3)
+
+    assert checkout.run()
+    assert checkout.calls == ["information", "address", "scheduling"]
+    assert checkout.progress.states["address"] == DONE
+
+
+def test_committed_stage_is_never_retried():
+    probes = []
+
+    def not_confirmed():
+        probes.append("scheduling")
+        return False
+
+    checkout = FakeCheckout({"scheduling": [False]}, commit_on="scheduling")
+
+    assert not checkout.run(confirmed=not_confirmed)
+    assert checkout.calls.count("scheduling") == 1
+    assert probes == ["scheduling"]
+
+
+def test_committed_stage_accepted_by_the_site_completes():
+    checkout = FakeCheckout({"scheduling": [False]}, commit_on="scheduling")
+
+    assert checkout.run(confirmed=lambda: True)
+    assert checkout.calls.count("scheduling") == 1
+    assert checkout.progress.states["scheduling"] == DONE
+
+
+def test_committed_stage_fails_when_confirmation_probe_raises():
+    def probe():
+        raise RuntimeError("página fechada")
+
+    checkout = FakeCheckout({"scheduling": [False]}, commit_on="scheduling")
+
+    assert not checkout.run(confirmed=probe)
+    assert checkout.calls.count("scheduling") == 1
+
+
+def test_stage_raising_counts_as_failure_and_is_retried():
+    checkout = FakeCheckout()
+    functions = checkout.functions()
+    failures = [RuntimeError("navegador travou")]
+
+    def information():
+        checkout.calls.append("information")
+        if failures:
+            raise failures.pop()
+        return True
+
+    functions["information"] = information
+    assert run_stages(functions, lambda: 1, policy=POLICY, progress=checkout.progress, sleep=lambda seconds: None)
+    assert checkout.calls == ["information", "information", "address", "scheduling"]
+
+
+def test_retries_stop_at_the_stage_limit():
+    checkout = FakeCheckout({"address": [False] * 5})
+
+    assert not checkout.run()
+    assert checkout.calls == ["information"] + ["address"] * (POLICY.stage_retries + 1)
+
+
+def test_retries_stop_when_the_order_budget_is_spent():
+    policy = RetryPolicy(stage_retries=2, budget=1, base_delay=0, max_delay=0)
+    checkout = FakeCheckout({"information": [False], "address": [False]})
+
+    result = run_stages(checkout.functions(), lambda: 1, policy=policy, progress=checkout.progress,
+                        sleep=lambda seconds: None)
+
+    assert not result
+    assert checkout.calls == ["information", "information", "address"]
+
+
+def test_commit_calls_on_commit_before_returning():
+    recorded = []
+    progress = OrderProgress(on_commit=recorded.append)
+
+    progress.commit("scheduling")
+
+    assert recorded == ["scheduling"]
+    assert "scheduling" in progress.committed
+
+
+def test_async_committed_stage_is_never_retried():
+    progress = OrderProgress()
+    calls = []
+
+    def stage(name, result=True):
+        async def fill():
+            calls.append(name)
+            if name == "scheduling":
+                progress.commit(name)
+            return result
+        return fill
+
+    async def visible():
+        return 3
+
+    async def not_confirmed():
+        return False
+
+    functions = {"information": stage("information"), "address": stage("address"),
+                 "scheduling": stage("scheduling", result=False)}
+    result = asyncio.run(run_stages_async(functions, visible, policy=POLICY, progress=progress,
+                                          confirmed=not_confirmed))
+
+    assert not result
+    assert calls == ["information", "address", "scheduling"]
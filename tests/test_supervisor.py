@@ -0,0 +1,104 @@
+"""
+Tempo máximo por tarefa no supervisor, com um executor falso no lugar dos navegadores.
+"""
+import os
+import threading
+import time
+
+import pytest
+
+from supervisor import Supervisor, WorkerCrashedError, WorkerTimeoutError, WorkerUnavailableError
+
+
+class FakeRunner:
+    """
+    Executor de tarefas sem navegador: "hang" trava até ser cancelada, "stuck" ignora o cancelamento.
+    """
+    def __init__(self):
+        self.hung = {}
+
+    def run(self, kind, data, job_id=None):
+        if kind == "hang":
+            released = threading.Event()
+            self.hung[threading.get_ident()] = released
+            released.wait()
+            raise RuntimeError("navegador encerrado")
+        if kind == "stuck":
+            time.sleep(60)
+        time.sleep(data.get("seconds", 0))
+        return {"sucesso": True, "pid": os.getpid()}
+
+    def cancel(self, thread_id):
+        released = self.hung.pop(thread_id, None)
+        if released is None:
+            return False
+        released.set()
+        return True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = Supervisor(workers=1, task_timeout=1, max_jobs=0, target="test_supervisor:FakeRunner",
+                            tasks_per_worker=3, cancel_grace=1)
+    supervisor.start()
+    yield supervisor
+    supervisor.stop()
+
+
+def run_together(supervisor, *tasks):
+    outcomes = [None] * len(tasks)
+
+    def run(position, kind, data, timeout):
+        try:
+            outcomes[position] = supervisor.run(kind, data, timeout=timeout)["sucesso"]
+        except Exception as e:
+            outcomes[position] = type(e)
+
+    threads = [threading.Thread(target=run, args=(position, *task)) for position, task in enumerate(tasks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def test_timeout_cancels_only_the_expired_task(supervisor):
+    pid = supervisor.run("ok", {})["pid"]
+
+    outcomes = run_together(supervisor, ("hang", {}, None), ("ok", {"seconds": 2}, 5), ("ok", {"seconds": 2}, 5))
+
+    assert outcomes == [WorkerTimeoutError, True, True]
+    assert supervisor.run("ok", {})["pid"] == pid
+
+
+def test_task_ignoring_cancel_takes_the_worker_down(supervisor):
+    pid = supervisor.run("ok", {})["pid"]
+
+    outcomes = run_together(supervisor, ("stuck", {}, None), ("ok", {"seconds": 5}, 10))
+
+    assert outcomes == [WorkerTimeoutError, WorkerCrashedError]
+    assert supervisor.run("ok", {})["pid"] != pid
+
+
+def test_run_fails_fast_when_not_started():
+    with pytest.raises(RuntimeError):
+        Supervisor(workers=1, target="test_supervisor:FakeRunner").run("ok", {})
+
+
+def test_task_waiting_for_a_free_worker_gives_up():
+    supervisor = Supervisor(workers=1, task_timeout=5, max_jobs=0, target="test_supervisor:FakeRunner",
+                            queue_timeout=0.5)
+    supervisor.start()
+    busy = threading.Thread(target=supervisor.run, args=("ok", {"seconds": 2}))
+    try:
+        busy.start()
+        time.sleep(0.3)
+        with pytest.raises(WorkerUnavailableError):
+            supervisor.run("ok", {})
+        assert supervisor.stats()["pending"] == 0
+    finally:
+        busy.join()
+        supervisor.stop()
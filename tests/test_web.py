@@ -0,0 +1,30 @@
+"""
+Validação das requisições do servidor web, sem navegadores.
+"""
+import pytest
+
+import web
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Sem navegadores nem fila: os testes não passam da validação
+    monkeypatch.setattr(web, "iniciar_servicos", lambda: None)
+    return web.app.test_client()
+
+
+@pytest.mark.parametrize("body, content_type", [
+    ("{inválido", "application/json"),
+    ('{"nome": "Maria"}', "application/json"),
+    ('{"nome": "Maria"}\n{inválido\n', "application/x-ndjson"),
+    ("nome,data_index\nMaria,abc\n", "text/csv"),
+])
+def test_invalid_batch_returns_400_before_running(client, monkeypatch, body, content_type):
+    calls = []
+    monkeypatch.setattr(web, "executar_pedido", lambda data, job_id=None: calls.append(data))
+
+    response = client.post("/preencher/lote", data=body, content_type=content_type)
+
+    assert response.status_code == 400
+    assert response.get_json()["sucesso"] is False
+    assert calls == []
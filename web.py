@@ -1,16 +1,206 @@
-from flask import Flask, request, jsonify
-from form_filler import LogzzFormFiller
-from browser import Browser
+import atexit
+import csv
+import io
+import json
+import threading
+from flask import Flask, Response, request, jsonify
+from browser_pool import PoolExhaustedError
+from offers import UnknownOfferError
+from runner import ORDER, QUOTE, STAGE_ONE, create_runner, worker_slots
+from supervisor import Supervisor, WorkerCrashedError, WorkerTimeoutError, WorkerUnavailableError
+from idempotency import IDEMPOTENCY_HEADER, SingleFlight, idempotency_key
+from cache import TTLCache, normalize_cep
+from job_queue import JobQueue, QueueFullError
+from batch import BatchSummary, read_records, run_batch
+from run_log import default_run_log
+import config
+import metrics
 
 app = Flask(__name__)
 
+# Resultado de cada tarefa em JSON Lines (LOGZZ_RUN_LOG_PATH), gravado por quem executa a tarefa
+run_log = default_run_log()
+
+# Pedidos executados no próprio processo ou, com LOGZZ_WORKER_PROCESSES > 0, em
+# processos de trabalho isolados, cada um com seus navegadores
+runner = create_runner(run_log)
+supervisor = Supervisor(
+    workers=config.WORKER_PROCESSES,
+    task_timeout=config.WORKER_TASK_TIMEOUT,
+    max_jobs=config.WORKER_MAX_JOBS,
+    tasks_per_worker=worker_slots(),
+    cancel_grace=config.WORKER_CANCEL_GRACE,
+    queue_timeout=config.WORKER_QUEUE_TIMEOUT,
+    run_log=run_log,
+) if config.WORKER_PROCESSES > 0 else None
+
+def executar(kind, dados_cliente, job_id=None):
+    """
+    Executa uma tarefa no processo de trabalho ou, sem supervisor, no próprio servidor.
+    """
+    if supervisor is not None:
+        return supervisor.run(kind, dados_cliente, job_id=job_id)
+    return runner.run(kind, dados_cliente, job_id)
+
+def executar_pedido(dados_cliente, job_id=None):
+    """
+    Executa um pedido completo com o motor configurado em LOGZZ_SUBMIT_ENGINE.
+    """
+    return executar(ORDER, dados_cliente, job_id)
+
+# Pedidos processados em segundo plano, persistidos em SQLite
+jobs = JobQueue(
+    config.JOB_DB_PATH,
+    executar_pedido,
+    workers=config.JOB_WORKERS,
+    max_pending=config.JOB_MAX_PENDING,
+    callback_timeout=config.CALLBACK_TIMEOUT,
+    idempotency_ttl=config.IDEMPOTENCY_TTL,
+)
+
+# Reenvios de /preencher aguardam o preenchimento em andamento ou recebem o resultado anterior
+idempotent_fills = SingleFlight(TTLCache(config.IDEMPOTENCY_TTL, path=config.IDEMPOTENCY_CACHE_PATH))
+atexit.register(idempotent_fills.results.save)
+
+# Dias de entrega por oferta e CEP: consultas repetidas não abrem o navegador de novo
+quotes = SingleFlight(TTLCache(config.QUOTE_CACHE_TTL, max_items=config.QUOTE_CACHE_MAX_ITEMS))
+
+if supervisor is not None:
+    # Os navegadores ficam nos workers; o pool deste processo não é usado
+    metrics.register_supervisor(supervisor)
+else:
+    metrics.register_pool(runner.pool)
+metrics.register_queue(jobs)
+
+_servicos_lock = threading.Lock()
+_servicos_iniciados = False
+
+def iniciar_servicos():
+    """
+    Inicia, uma única vez, o supervisor (ou os navegadores deste processo) e a fila de pedidos.
+
+    Chamada antes da primeira requisição, no processo que atende o servidor, para
+    valer também quando um servidor WSGI importa o app sem executar este módulo.
+    """
+    global _servicos_iniciados
+    with _servicos_lock:
+        if _servicos_iniciados:
+            return
+        if supervisor is not None:
+            supervisor.start()
+            atexit.register(supervisor.stop)
+        else:
+            runner.start()
+            atexit.register(runner.close)
+        jobs.start()
+        _servicos_iniciados = True
+
+@app.before_request
+def garantir_servicos():
+    iniciar_servicos()
+
+@app.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
 @app.route('/preencher', methods=['POST'])
 def preencher():
     dados_cliente = request.json
-    browser = Browser(headless=True)
-    filler = LogzzFormFiller(browser)
-    sucesso = filler.fill_stage_one(dados_cliente)
-    return jsonify({"sucesso": sucesso})
+    chave = idempotency_key(dados_cliente, request.headers.get(IDEMPOTENCY_HEADER))
+
+    try:
+        resultado = idempotent_fills.run(chave, lambda: executar(STAGE_ONE, dados_cliente))
+    except UnknownOfferError as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 400
+    except (PoolExhaustedError, WorkerUnavailableError) as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 503
+    except (WorkerTimeoutError, WorkerCrashedError) as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 504
+    response = jsonify(resultado)
+    response.headers[IDEMPOTENCY_HEADER] = chave
+    return response
+
+@app.route('/cotacao', methods=['POST'])
+def cotar():
+    """
+    Executa só as etapas de informações e endereço e devolve os dias de entrega
+    disponíveis, para escolher a data ('data_entrega') antes de enviar o pedido.
+    """
+    dados_cliente = request.json
+    cep = normalize_cep((dados_cliente.get("endereco") or {}).get("cep", ""))
+    if not cep:
+        return jsonify({"sucesso": False, "erro": "Informe endereco.cep"}), 400
+    try:
+        oferta = runner.offers.for_order(dados_cliente)
+    except UnknownOfferError as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 400
+
+    chave = f"{oferta.slug}:{cep}"
+    em_cache = quotes.results.get(chave) is not None
+    try:
+        resultado = quotes.run(chave, lambda: executar(QUOTE, dados_cliente))
+    except (PoolExhaustedError, WorkerUnavailableError) as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 503
+    except (WorkerTimeoutError, WorkerCrashedError) as e:
+        return jsonify({"sucesso": False, "erro": str(e)}), 504
+    return jsonify({**resultado, "oferta": oferta.slug, "cep": cep, "em_cache": em_cache})
+
+@app.route('/preencher/lote', methods=['POST'])
+def preencher_lote():
+    """
+    Processa um lote (JSON, JSON Lines ou CSV) e devolve os resultados em JSON Lines
+    conforme cada pedido termina; a última linha traz o resumo do lote.
+    """
+    content_type = request.mimetype or ""
+    if "csv" in content_type:
+        fmt = "csv"
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "jsonl"
+    else:
+        fmt = "json"
+    try:
+        # Lê o lote inteiro antes de responder: um corpo inválido precisa virar 400,
+        # não um erro no meio de uma resposta 200 já enviada
+        records = list(read_records(io.StringIO(request.get_data(as_text=True)), fmt))
+    except (ValueError, csv.Error) as e:
+        return jsonify({"sucesso": False, "erro": f"Lote inválido: {e}"}), 400
+    if not all(isinstance(record, dict) for record in records):
+        return jsonify({"sucesso": False, "erro": "Lote inválido: cada registro deve ser um objeto"}), 400
+
+    def gerar():
+        summary = BatchSummary()
+        for result in run_batch(records, executar_pedido, workers=config.WORKER_PROCESSES or config.POOL_SIZE, summary=summary):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        yield json.dumps({"resumo": summary.to_dict()}, ensure_ascii=False) + "\n"
+
+    return Response(gerar(), mimetype="application/x-ndjson")
+
+@app.route('/pedidos', methods=['POST'])
+def enfileirar_pedido():
+    dados_cliente = dict(request.json)
+    callback_url = dados_cliente.pop("callback_url", None)
+    try:
+        runner.offers.for_order(dados_cliente)
+    except UnknownOfferError as e:
+        return jsonify({"erro": str(e)}), 400
+    try:
+        chave = idempotency_key(dados_cliente, request.headers.get(IDEMPOTENCY_HEADER))
+        job_id, criado = jobs.submit(dados_cliente, callback_url=callback_url, idempotency_key=chave)
+    except QueueFullError as e:
+        return jsonify({"erro": str(e)}), 429
+    if not criado:
+        # Repetição de um pedido em andamento ou já concluído: devolvemos o existente
+        return jsonify(jobs.get(job_id)), 200
+    return jsonify({"id": job_id, "status": "queued", "chave_idempotencia": chave}), 202
+
+@app.route('/pedidos/<job_id>', methods=['GET'])
+def consultar_pedido(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"erro": "Pedido não encontrado"}), 404
+    return jsonify(job)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8888)
\ No newline at end of file
+    iniciar_servicos()
+    app.run(host='0.0.0.0', port=8888, threaded=True)